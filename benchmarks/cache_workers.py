@@ -0,0 +1,94 @@
+"""Доля попаданий в кэш страницы index при нескольких воркерах.
+
+Каждый воркер — отдельный процесс, как воркер gunicorn. Воркеры
+читают случайные страницы index и время от времени публикуют пост.
+С LocMemCache у каждого процесса свой кэш: записи дублируются, а
+инвалидация в одном процессе не видна другим. С core.cache.SQLiteCache
+кэш общий.
+
+    python benchmarks/cache_workers.py --workers 4 --requests 300
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import common
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'sqlite': 'core.cache.SQLiteCache',
+}
+
+
+def worker(database, backend, location, requests, pages, write_every, seed):
+    os.environ['CACHE_BACKEND'] = BACKENDS[backend]
+    os.environ['CACHE_LOCATION'] = location
+    common.setup(database)
+    from django.test import Client
+    from posts.models import Post, User
+
+    rng = random.Random(seed)
+    client = Client()
+    author = User.objects.first()
+    hits = 0
+    timings = []
+    for i in range(1, requests + 1):
+        if write_every and i % write_every == 0:
+            Post.objects.create(text=f'Новый пост {seed}:{i}', author=author)
+        started = time.perf_counter()
+        response = client.get('/', {'page': rng.randint(1, pages)})
+        timings.append(time.perf_counter() - started)
+        hits += response.context['feed_cache'].hit
+    return hits, timings
+
+
+def run(backend, database, args):
+    location = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers) as pool:
+        results = pool.starmap(worker, [
+            (database, backend, location, args.requests, args.pages,
+             args.write_every, seed)
+            for seed in range(args.workers)
+        ])
+    hits = sum(result[0] for result in results)
+    timings = [timing for result in results for timing in result[1]]
+    total = args.workers * args.requests
+    print(
+        f'{backend:8} hit rate {hits / total:6.1%}  '
+        f'median {statistics.median(timings) * 1000:7.2f} ms  '
+        f'mean {statistics.mean(timings) * 1000:7.2f} ms'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument(
+        '--write-every', type=int, default=100,
+        help='Каждый N-й запрос воркера публикует пост (0 — без записи).'
+    )
+    parser.add_argument(
+        '--backend', choices=BACKENDS, action='append',
+        help='По умолчанию сравниваются все бэкенды.'
+    )
+    args = parser.parse_args()
+    database = common.temp_database()
+    common.setup(database, migrate=True)
+    common.seed_posts(posts=args.posts)
+    from django.db import connections
+    connections.close_all()
+    print(f'{args.workers} воркеров x {args.requests} запросов к index')
+    for backend in args.backend or BACKENDS:
+        run(backend, database, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Общая подготовка Django для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория, например:
+    python benchmarks/cache_workers.py
+и работают на временной базе SQLite, а не на yatube/db.sqlite3.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+def temp_database():
+    return os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+
+def setup(database, migrate=False):
+    """Настраивает Django на базу database; migrate создаёт схему."""
+    import django
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+
+    settings.DATABASES['default']['NAME'] = database
+    django.setup()
+    setup_test_environment()
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+
+def seed_posts(users=20, posts=200):
+    """Минимальный набор данных: авторы и их посты."""
+    from posts.models import Post, User
+
+    User.objects.bulk_create(
+        User(username=f'bench_{i}') for i in range(users)
+    )
+    authors = list(User.objects.filter(username__startswith='bench_'))
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=authors[i % len(authors)])
+        for i in range(posts)
+    )
+    return authors
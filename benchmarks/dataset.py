@@ -0,0 +1,120 @@
+"""Синтетический набор данных для бенчмарков.
+
+Число подписчиков и постов у авторов распределено по степенному закону:
+несколько популярных авторов и длинный хвост. Строки генерируются в
+формате posts.transfer и загружаются тем же Importer, что и команда
+import_posts, поэтому счётчики и ленты подписок после загрузки
+согласованы.
+
+    python benchmarks/dataset.py --users 1000 --posts 20000 > data.jsonl
+"""
+import argparse
+import random
+import sys
+from datetime import timedelta
+
+import common
+
+SCALES = {
+    'small': dict(users=100, groups=5, posts=1000, comments=2000,
+                  follows=10),
+    'medium': dict(users=2000, groups=20, posts=20000, comments=50000,
+                   follows=30),
+    'large': dict(users=20000, groups=100, posts=200000, comments=500000,
+                  follows=50),
+}
+
+
+def power_law_weights(count, alpha):
+    """Веса Ципфа: у автора ранга r вес 1 / r**alpha."""
+    return [1 / rank ** alpha for rank in range(1, count + 1)]
+
+
+def generate(users=100, groups=5, posts=1000, comments=2000, follows=10,
+             alpha=1.2, days=365, seed=0):
+    """Отдаёт (model, row) в порядке, который ожидает Importer."""
+    from django.utils import timezone
+    from faker import Faker
+
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    usernames = [f'user_{i}' for i in range(users)]
+    weights = power_law_weights(users, alpha)
+    slugs = [f'group-{i}' for i in range(groups)]
+    for slug in slugs:
+        yield 'group', {
+            'slug': slug,
+            'title': fake.sentence(nb_words=3)[:200],
+            'description': fake.paragraph(),
+        }
+    now = timezone.now()
+    ages = [rng.uniform(0, days * 86400) for _ in range(posts)]
+    for post_id, age in enumerate(ages, start=1):
+        group = rng.choice(slugs) if slugs and rng.random() < .7 else None
+        yield 'post', {
+            'id': post_id,
+            'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            'pub_date': (now - timedelta(seconds=age)).isoformat(),
+            'author': rng.choices(usernames, weights)[0],
+            'group': group,
+            'image': '',
+        }
+    for _ in range(comments if posts else 0):
+        post_id = rng.randint(1, posts)
+        age = rng.uniform(0, ages[post_id - 1])
+        yield 'comment', {
+            'post': post_id,
+            'author': rng.choice(usernames),
+            'text': fake.sentence(),
+            'created': (now - timedelta(seconds=age)).isoformat(),
+        }
+    for username in usernames:
+        authors = set(rng.choices(
+            usernames, weights, k=rng.randint(0, 2 * follows)
+        ))
+        authors.discard(username)
+        for author in sorted(authors):
+            yield 'follow', {'user': username, 'author': author}
+
+
+def load(batch_size=1000, **scale):
+    """Загружает набор в текущую базу; возвращает Importer со статистикой."""
+    from posts.transfer import Importer, original_dates
+
+    importer = Importer(batch_size=batch_size)
+    with original_dates():
+        for model, row in generate(**scale):
+            importer.add(model, row)
+    importer.finish()
+    return importer
+
+
+def add_arguments(parser):
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int)
+    parser.add_argument('--alpha', type=float, default=1.2)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def scale_from_args(args):
+    scale = dict(SCALES[args.scale], alpha=args.alpha, seed=args.seed)
+    for name in SCALES['small']:
+        if getattr(args, name) is not None:
+            scale[name] = getattr(args, name)
+    return scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+    common.setup(common.temp_database())
+    from posts.transfer import write_jsonl
+
+    write_jsonl(generate(**scale_from_args(args)), sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Пропускная способность раздачи картинок при параллельных загрузках.
+
+Приложение запускается в многопоточном WSGI-сервере из стандартной
+библиотеки, клиенты в потоках скачивают случайные файлы. Сравниваются
+django.views.static.serve (прежний путь при DEBUG) и core.media.serve:
+целиком, диапазоном Range, ревалидацией If-None-Match и с передачей
+отдачи прокси через X-Accel-Redirect (замеряется только работа
+приложения).
+
+    python benchmarks/media.py --files 200 --size 200 --clients 8
+"""
+import argparse
+import http.client
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import common
+
+urlpatterns = []
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def fill(root, files, size, seed):
+    """Файлы с именами по содержимому, как у картинок постов."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(files):
+        digest = f'{rng.getrandbits(256):064x}'
+        path = f'posts/{digest[:2]}/{digest}.jpg'
+        os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(root, path), 'wb') as file:
+            file.write(rng.randbytes(size))
+        paths.append(path)
+    return paths
+
+
+def download(port, prefix, path, headers):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    started = time.perf_counter()
+    connection.request('GET', prefix + path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return response.status, len(body), elapsed, response.getheader('ETag')
+
+
+def run(port, prefix, paths, headers, args):
+    rng = random.Random(args.seed)
+    jobs = [rng.choice(paths) for _ in range(args.requests)]
+    with ThreadPoolExecutor(args.clients) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(
+            lambda path: download(port, prefix, path, headers(path)), jobs
+        ))
+        seconds = time.perf_counter() - started
+    statuses = {status for status, *_ in results}
+    timings = sorted(elapsed * 1000 for _, _, elapsed, _ in results)
+    size = sum(length for _, length, _, _ in results) / 2 ** 20
+    return statuses, seconds, timings, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--size', type=int, default=200,
+                        help='Размер файла, КБ.')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    common.setup(common.temp_database())
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import clear_url_caches, re_path
+    from django.views.static import serve as static_serve
+
+    from core import media
+
+    root = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = root
+    settings.DEBUG = False
+    settings.PERF_SAMPLE_RATE = 0.0
+    settings.MEDIA_SENDFILE_HEADER = None
+
+    urlpatterns[:] = [
+        re_path(r'^static-serve/(?P<path>.*)$', static_serve,
+                {'document_root': root}),
+        re_path(r'^media/(?P<path>.*)$', media.serve),
+    ]
+    settings.ROOT_URLCONF = __name__
+    clear_url_caches()
+
+    paths = fill(root, args.files, args.size * 1024, args.seed)
+    server = make_server(
+        '127.0.0.1', 0, WSGIHandler(),
+        server_class=ThreadingServer, handler_class=QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    etags = {
+        path: download(port, '/media/', path, {})[3] for path in paths
+    }
+    scenarios = [
+        ('static.serve', '/static-serve/', lambda path: {}, None),
+        ('media целиком', '/media/', lambda path: {}, None),
+        ('media Range 64К', '/media/',
+         lambda path: {'Range': 'bytes=0-65535'}, None),
+        ('media 304', '/media/',
+         lambda path: {'If-None-Match': etags[path]}, None),
+        ('X-Accel-Redirect', '/media/', lambda path: {},
+         'X-Accel-Redirect'),
+    ]
+    print(f'{args.files} файлов по {args.size} КБ, {args.clients} '
+          f'клиентов, {args.requests} запросов')
+    print(f'{"способ":18} {"коды":>9} {"запр/с":>8} {"МБ/с":>8} '
+          f'{"p50, мс":>8} {"p95, мс":>8}')
+    for name, prefix, headers, sendfile in scenarios:
+        settings.MEDIA_SENDFILE_HEADER = sendfile
+        statuses, seconds, timings, size = run(
+            port, prefix, paths, headers, args
+        )
+        print(f'{name:18} {",".join(map(str, sorted(statuses))):>9} '
+              f'{len(timings) / seconds:8.0f} {size / seconds:8.1f} '
+              f'{statistics.median(timings):8.2f} '
+              f'{timings[int(len(timings) * .95)]:8.2f}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Пересчёт рекомендаций авторов на большом графе подписок.
+
+Граф строится случайно: у каждого пользователя в среднем
+edges / users подписок, популярность авторов распределена по Ципфу.
+Замеряются чтение графа из БД, пакетный rebuild() (сходства,
+рекомендации и запись), точечный refresh() после подписки и чтение
+рекомендаций для страницы.
+
+    python benchmarks/recommendations.py --edges 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import common
+from dataset import power_law_weights
+
+
+def fill(users, edges, alpha, seed, batch=50000):
+    """Пишет пользователей и подписки в БД в обход моделей и сигналов."""
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    rng = random.Random(seed)
+    weights = power_law_weights(users, alpha)
+    now = timezone.now().isoformat()
+    with connection.cursor() as cursor, transaction.atomic():
+        cursor.executemany(
+            'INSERT INTO auth_user (id, password, is_superuser, username, '
+            "first_name, last_name, email, is_staff, is_active, "
+            "date_joined) VALUES (%s, '', 0, %s, '', '', '', 0, 1, %s)",
+            [(pk, f'user_{pk}', now) for pk in range(1, users + 1)]
+        )
+    # Популярные авторы — случайные id, а не первые по порядку.
+    authors = list(range(1, users + 1))
+    rng.shuffle(authors)
+    pairs = set()
+    while len(pairs) < edges:
+        for user_id, author_id in zip(
+            rng.choices(range(1, users + 1), k=batch),
+            rng.choices(authors, weights, k=batch)
+        ):
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+    pairs = list(pairs)[:edges]
+    with connection.cursor() as cursor:
+        for start in range(0, edges, batch):
+            with transaction.atomic():
+                cursor.executemany(
+                    'INSERT INTO posts_follow (user_id, author_id, created) '
+                    'VALUES (%s, %s, %s)',
+                    [row + (now,) for row in pairs[start:start + batch]]
+                )
+    return pairs
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--edges', type=int, default=1000000)
+    parser.add_argument('--alpha', type=float, default=1.0)
+    parser.add_argument('--refresh', type=int, default=200,
+                        help='Сколько раз замерить refresh() и страницу.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    common.setup(common.temp_database(), migrate=True)
+    from django.db import connection
+
+    from posts import recommendations
+    from posts.models import Recommendation, SimilarAuthor, User
+
+    pairs, seconds = timed(
+        lambda: fill(args.users, args.edges, args.alpha, args.seed)
+    )
+    print(f'{args.users} пользователей, {len(pairs)} подписок '
+          f'за {seconds:.1f} с')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    graph, seconds = timed(recommendations.Graph.load)
+    print(f'Граф прочитан из БД за {seconds:.1f} с')
+    _, seconds = timed(lambda: recommendations.rebuild(graph=graph))
+    print(f'rebuild(): {seconds:.1f} с, похожих авторов '
+          f'{SimilarAuthor.objects.count()}, рекомендаций '
+          f'{Recommendation.objects.count()}')
+
+    rng = random.Random(args.seed)
+    users = list(User.objects.filter(
+        pk__in=rng.sample(range(1, args.users + 1), args.refresh)
+    ))
+    refresh = [
+        timed(lambda: recommendations.refresh(user.pk))[1] * 1000
+        for user in users
+    ]
+    page = [
+        timed(lambda: recommendations.suggestions(user))[1] * 1000
+        for user in users
+    ]
+    for name, timings in (('refresh()', refresh), ('suggestions()', page)):
+        timings.sort()
+        print(f'{name:14} p50 {statistics.median(timings):7.2f}  '
+              f'p95 {timings[int(len(timings) * .95)]:7.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
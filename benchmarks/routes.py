@@ -0,0 +1,302 @@
+"""Задержка, число запросов к БД и память для каждого URL приложения posts.
+
+Набор данных строится benchmarks/dataset.py на временной базе. Каждый
+сценарий выполняется --requests раз через тестовый клиент Django;
+результаты (p50/p95/p99, запросы на ответ, пиковая память) пишутся в
+JSON, который можно сравнить с прогоном на другом коммите:
+
+    python benchmarks/routes.py --scale small --output before.json
+    python benchmarks/routes.py --scale small --compare before.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import common
+import dataset
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        return {'p50': timings[0], 'p95': timings[0], 'p99': timings[0]}
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def scenarios():
+    """Сценарии по именам маршрутов posts.urls: (клиент, метод, url, data)."""
+    from django.db.models import Count
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts.models import Follow, Group, Post, User
+    from posts.views import get_comments_page
+
+    rng = random.Random(0)
+    # Самый популярный автор и читатель, подписанный на многих.
+    author = User.objects.annotate(
+        followers=Count('following')
+    ).order_by('-followers').first()
+    reader = User.objects.annotate(
+        follows=Count('follower')
+    ).order_by('-follows').first()
+    other = User.objects.exclude(pk__in=[author.pk, reader.pk]).exclude(
+        following__user=reader
+    ).first()
+    group = Group.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').first()
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    # Самый обсуждаемый пост: его страница не должна зависеть от числа
+    # комментариев, следующие страницы грузятся по курсору.
+    busy_post = Post.objects.annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count').first().pk
+    comments_cursor = get_comments_page(busy_post, None).next_cursor or ''
+    own_post = Post.objects.filter(author=reader).first()
+    if own_post is None:
+        own_post = Post.objects.create(text='Пост читателя', author=reader)
+    pages = max(Post.objects.count() // 10, 1)
+    guest = Client()
+    client = Client()
+    client.force_login(reader)
+
+    def detail():
+        return reverse('posts:post_detail', args=[rng.choice(post_ids)])
+
+    def comment():
+        return reverse('posts:add_comment', args=[rng.choice(post_ids)])
+
+    words = Post.objects.values_list('text', flat=True).first().split()
+
+    def search():
+        return f'{reverse("posts:search")}?q={rng.choice(words).strip(".,")}'
+
+    # Состояние подписки готовится до замера, чтобы каждый запрос
+    # действительно подписывал или отписывал.
+    def follow():
+        Follow.objects.filter(user=reader, author=other).delete()
+        return reverse('posts:profile_follow', args=[other.username])
+
+    def unfollow():
+        Follow.objects.get_or_create(user=reader, author=other)
+        return reverse('posts:profile_unfollow', args=[other.username])
+
+    bulk = list(User.objects.exclude(pk=reader.pk).values_list(
+        'username', flat=True
+    )[:50])
+
+    def follow_bulk():
+        Follow.objects.filter(
+            user=reader, author__username__in=bulk
+        ).delete()
+        return reverse('posts:api_follow_bulk')
+
+    return {
+        'index': [
+            (guest, 'get', lambda: reverse('posts:index'), None),
+            (guest, 'get',
+             lambda: f'{reverse("posts:index")}?page={rng.randint(1, pages)}',
+             None),
+        ],
+        'profile': [(guest, 'get', lambda: reverse(
+            'posts:profile', args=[author.username]
+        ), None)],
+        'post_detail': [
+            (guest, 'get', detail, None),
+            (guest, 'get',
+             lambda: reverse('posts:post_detail', args=[busy_post]), None),
+        ],
+        'post_comments': [(guest, 'get', lambda: reverse(
+            'posts:post_comments', args=[busy_post]
+        ) + f'?cursor={comments_cursor}', None)],
+        'group_list': [(guest, 'get', lambda: reverse(
+            'posts:group_list', args=[group.slug]
+        ), None)],
+        'post_create': [
+            (client, 'get', lambda: reverse('posts:post_create'), None),
+            (client, 'post', lambda: reverse('posts:post_create'),
+             {'text': 'Пост из бенчмарка', 'group': group.pk}),
+        ],
+        'post_edit': [
+            (client, 'get',
+             lambda: reverse('posts:post_edit', args=[own_post.pk]), None),
+            (client, 'post',
+             lambda: reverse('posts:post_edit', args=[own_post.pk]),
+             {'text': 'Отредактированный пост'}),
+        ],
+        'add_comment': [(client, 'post', comment, {'text': 'Комментарий'})],
+        'trending': [
+            (guest, 'get', lambda: reverse('posts:trending'), None),
+        ],
+        'follow_index': [
+            (client, 'get', lambda: reverse('posts:follow_index'), None),
+        ],
+        'search': [
+            (guest, 'get', search, None),
+        ],
+        'api_index': [
+            (guest, 'get', lambda: reverse('posts:api_index'), None),
+        ],
+        'api_post_detail': [(guest, 'get', lambda: reverse(
+            'posts:api_post_detail', args=[rng.choice(post_ids)]
+        ), None)],
+        'api_post_comments': [(guest, 'get', lambda: reverse(
+            'posts:api_post_comments', args=[busy_post]
+        ) + f'?cursor={comments_cursor}', None)],
+        'api_group_list': [(guest, 'get', lambda: reverse(
+            'posts:api_group_list', args=[group.slug]
+        ), None)],
+        'api_profile': [(guest, 'get', lambda: reverse(
+            'posts:api_profile', args=[author.username]
+        ), None)],
+        'api_follow_bulk': [
+            (client, 'post', follow_bulk, {'usernames': bulk}),
+        ],
+        'followers': [(guest, 'get', lambda: reverse(
+            'posts:followers', args=[author.username]
+        ), None)],
+        'following': [(client, 'get', lambda: reverse(
+            'posts:following', args=[reader.username]
+        ), None)],
+        'api_follow_index': [
+            (client, 'get', lambda: reverse('posts:api_follow_index'), None),
+        ],
+        'profile_follow': [(client, 'get', follow, None)],
+        'profile_unfollow': [(client, 'get', unfollow, None)],
+    }
+
+
+def measure(steps, requests, cold):
+    """Прогоняет сценарий; память меряется отдельным проходом."""
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = []
+    statuses = set()
+    for i in range(requests):
+        client, method, url, data = steps[i % len(steps)]
+        url = url()
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data or {})
+            timings.append(time.perf_counter() - started)
+        queries.append(len(context.captured_queries))
+        statuses.add(response.status_code)
+    peaks = []
+    for client, method, url, data in steps:
+        url = url()
+        gc.collect()
+        tracemalloc.start()
+        getattr(client, method)(url, data or {})
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {
+        'requests': requests,
+        'status': sorted(statuses),
+        'latency_ms': {
+            name: round(value * 1000, 3)
+            for name, value in percentiles(timings).items()
+        },
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'queries': {
+            'mean': round(statistics.mean(queries), 2),
+            'max': max(queries),
+        },
+        'peak_memory_kb': round(max(peaks) / 1024, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=common.ROOT,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, path):
+    with open(path, encoding='utf-8') as file:
+        before = json.load(file)['routes']
+    print(f'\nСравнение с {path} (p50, запросы):')
+    for name, current in results.items():
+        if name not in before:
+            continue
+        old = before[name]['latency_ms']['p50']
+        new = current['latency_ms']['p50']
+        print(
+            f'{name:18} {old:8.2f} -> {new:8.2f} ms '
+            f'({(new - old) / old:+7.1%})  '
+            f'{before[name]["queries"]["mean"]:6.1f} -> '
+            f'{current["queries"]["mean"]:6.1f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument(
+        '--cold', action='store_true',
+        help='Очищать кэш перед каждым запросом.'
+    )
+    parser.add_argument(
+        '--route', action='append',
+        help='Имя маршрута posts; по умолчанию все.'
+    )
+    parser.add_argument('--output', help='Куда сохранить JSON.')
+    parser.add_argument('--compare', help='JSON прошлого прогона.')
+    args = parser.parse_args()
+    scale = dataset.scale_from_args(args)
+    common.setup(common.temp_database(), migrate=True)
+    started = time.perf_counter()
+    dataset.load(**scale)
+    print(f'Набор {scale} загружен за {time.perf_counter() - started:.1f} с')
+
+    from posts.urls import urlpatterns
+
+    routes = scenarios()
+    missing = {pattern.name for pattern in urlpatterns} - set(routes)
+    if missing:
+        print(f'Нет сценариев для маршрутов: {", ".join(sorted(missing))}')
+    results = {}
+    for name, steps in routes.items():
+        if args.route and name not in args.route:
+            continue
+        results[name] = measure(steps, args.requests, args.cold)
+        latency = results[name]['latency_ms']
+        print(
+            f'{name:18} p50 {latency["p50"]:8.2f}  '
+            f'p95 {latency["p95"]:8.2f}  p99 {latency["p99"]:8.2f} ms  '
+            f'{results[name]["queries"]["mean"]:5.1f} запросов  '
+            f'{results[name]["peak_memory_kb"]:8.1f} KiB'
+        )
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'scale': scale,
+        'requests': args.requests,
+        'cold': args.cold,
+        'routes': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
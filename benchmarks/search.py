@@ -0,0 +1,103 @@
+"""Поиск FTS5 против LIKE на большом числе постов.
+
+Тексты постов собираются из словаря Faker со степенным распределением
+слов, поэтому в выборке есть и частые, и редкие слова. Для каждого
+запроса замеряются count() и первая страница выдачи обоих бэкендов.
+
+    python benchmarks/search.py --posts 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import common
+
+QUERIES_PER_KIND = 3
+
+
+def fill(posts, words_per_post, seed, batch=50000):
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from faker import Faker
+
+    from posts.models import User
+
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    vocabulary = sorted(set(fake.words(20000)))
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    author = User.objects.create(username='search_bench')
+    now = timezone.now().isoformat()
+    with connection.cursor() as cursor:
+        for start in range(0, posts, batch):
+            rows = [
+                (' '.join(rng.choices(vocabulary, weights, k=words_per_post)),
+                 now, author.pk)
+                for _ in range(min(batch, posts - start))
+            ]
+            with transaction.atomic():
+                cursor.executemany(
+                    'INSERT INTO posts_post (text, pub_date, author_id, '
+                    'image, thumbnail, renditions) '
+                    "VALUES (%s, %s, %s, '', '', '')", rows
+                )
+    return vocabulary
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--words', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    common.setup(common.temp_database(), migrate=True)
+    from django.conf import settings
+
+    from posts.search import SimpleBackend, SQLiteFTSBackend
+
+    started = time.perf_counter()
+    vocabulary = fill(args.posts, args.words, args.seed)
+    print(f'{args.posts} постов за {time.perf_counter() - started:.1f} с')
+    fts = SQLiteFTSBackend()
+    started = time.perf_counter()
+    fts.rebuild()
+    print(f'Индекс FTS5 построен за {time.perf_counter() - started:.1f} с')
+
+    queries = {
+        'частое': vocabulary[:QUERIES_PER_KIND],
+        'редкое': vocabulary[-QUERIES_PER_KIND:],
+        'два слова': [
+            f'{vocabulary[i]} {vocabulary[i + 10]}'
+            for i in range(QUERIES_PER_KIND)
+        ],
+    }
+    backends = {'LIKE': SimpleBackend(), 'FTS5': fts}
+    per_page = settings.POSTS_ON_PAGE
+    print(f'{"запрос":24} {"бэкенд":6} {"найдено":>9} '
+          f'{"count, мс":>11} {"страница, мс":>13}')
+    for kind, terms in queries.items():
+        for query in terms:
+            for name, backend in backends.items():
+                found = backend.count(query)
+                count_ms = timed(lambda: backend.count(query), args.repeat)
+                page_ms = timed(
+                    lambda: backend.hits(query, 0, per_page), args.repeat
+                )
+                print(f'{kind + ": " + query:24.24} {name:6} {found:9} '
+                      f'{count_ms:11.1f} {page_ms:13.1f}')
+
+
+if __name__ == '__main__':
+    main()
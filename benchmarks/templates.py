@@ -0,0 +1,131 @@
+"""Время рендера страницы ленты на 10 и 100 постов в разных конфигурациях.
+
+Сравниваются загрузчики Django без кэша (как при DEBUG) и с
+cached.Loader, карточки через {% include %} (как было) и через
+{% post_card %}, а также шаблоны Jinja2, если пакет установлен.
+Каждый рендер начинается с get_template, как в обработке запроса.
+
+    python benchmarks/templates.py --repeat 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from importlib.util import find_spec
+
+import common
+
+SIZES = (10, 100)
+# Лента в прежнем виде: шаблон карточки подключается на каждый пост.
+INCLUDE_INDEX = """{% extends 'base.html' %}
+{% block content %}
+  {% include 'posts/includes/switcher.html' with index=True %}
+  {% for post in page_obj %}
+    {% include 'posts/includes/marking_post.html' %}
+    {% if not forloop.last %}<hr>{% endif %}
+  {% endfor %}
+{% endblock content %}"""
+
+
+def engines(template_dir):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    dirs = [template_dir, settings.TEMPLATE_DIR]
+    options = {'context_processors': settings.TEMPLATE_CONTEXT_PROCESSORS}
+    result = {}
+    for name, engine_loaders in [
+        ('django', loaders),
+        ('django cached', [('django.template.loaders.cached.Loader',
+                            loaders)]),
+    ]:
+        engine = DjangoTemplates({
+            'NAME': name, 'DIRS': dirs, 'APP_DIRS': False,
+            'OPTIONS': {**options, 'loaders': engine_loaders},
+        })
+        result[f'{name}, include'] = (engine, 'bench/index.html')
+        result[f'{name}, post_card'] = (engine, 'posts/index.html')
+    if find_spec('jinja2'):
+        from django.template.backends.jinja2 import Jinja2
+
+        engine = Jinja2({
+            'NAME': 'jinja2', 'APP_DIRS': False,
+            'DIRS': [os.path.join(settings.TEMPLATE_DIR, 'jinja2')],
+            'OPTIONS': {
+                **options,
+                'environment': 'core.jinja2.environment',
+                'auto_reload': False,
+            },
+        })
+        result['jinja2, macro'] = (engine, 'posts/index.html')
+    return result
+
+
+def fill(posts):
+    from posts.models import Group, Post
+
+    common.seed_posts(posts=posts)
+    group = Group.objects.create(
+        title='Бенчмарк', slug='bench', description='Группа бенчмарка'
+    )
+    Post.objects.filter(pk__in=list(
+        Post.objects.values_list('pk', flat=True)[::2]
+    )).update(group=group)
+
+
+def timed(func, repeat):
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    common.setup(common.temp_database(), migrate=True)
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.paginator import Paginator
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from posts.models import Post
+
+    fill(max(SIZES))
+    posts = list(Post.objects.for_feed())
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    request.resolver_match = resolve('/')
+
+    template_dir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(template_dir, 'bench'))
+    with open(os.path.join(template_dir, 'bench', 'index.html'), 'w') as f:
+        f.write(INCLUDE_INDEX)
+
+    print(f'{"конфигурация":26} {"постов":>6} {"рендер, мс":>11} '
+          f'{"на пост, мкс":>13}')
+    for name, (engine, template_name) in engines(template_dir).items():
+        for size in SIZES:
+            page = Paginator(posts, size).page(1)
+
+            def render():
+                return engine.get_template(template_name).render(
+                    {'page_obj': page, 'index': True}, request
+                )
+
+            ms = timed(render, args.repeat)
+            print(f'{name:26} {size:6} {ms:11.2f} '
+                  f'{ms * 1000 / size:13.1f}')
+
+
+if __name__ == '__main__':
+    main()
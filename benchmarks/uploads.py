@@ -0,0 +1,116 @@
+"""Пропускная способность загрузки картинок постов.
+
+Генерируются «фотографии» с шумом и EXIF (по умолчанию 4000x3000,
+как у камеры телефона), часть из них — повторы. Каждая проходит тот
+же путь, что загрузка через PostForm: временный файл, posts.uploads
+(уменьшение, перекодирование, хэш) и запись в хранилище. Для
+сравнения замеряется запись тех же файлов как есть.
+
+    python benchmarks/uploads.py --images 50 --duplicates 0.2
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+
+import common
+
+
+def photo(width, height, seed):
+    """JPEG, который плохо сжимается: шум поверх градиента, с EXIF."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    noise = Image.effect_noise((width, height), rng.randint(20, 60))
+    gradient = Image.linear_gradient('L').resize((width, height))
+    image = Image.merge('RGB', (noise, gradient, noise.transpose(
+        Image.FLIP_LEFT_RIGHT
+    )))
+    exif = Image.Exif()
+    exif[0x0112] = rng.choice((1, 6))
+    exif[0x010F] = 'Bench Camera'
+    file = io.BytesIO()
+    image.save(file, 'JPEG', quality=95, exif=exif)
+    return file.getvalue()
+
+
+def temporary_upload(name, content):
+    """Файл загрузки в том виде, в каком его отдаёт обработчик Django."""
+    from django.core.files.uploadedfile import TemporaryUploadedFile
+
+    upload = TemporaryUploadedFile(name, 'image/jpeg', len(content), None)
+    upload.write(content)
+    upload.seek(0)
+    return upload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='Доля загрузок, повторяющих уже загруженные.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    common.setup(common.temp_database(), migrate=True)
+    import tempfile
+
+    from django.conf import settings
+    from django.core.files.storage import FileSystemStorage
+    from django.template.defaultfilters import filesizeformat
+
+    from posts import uploads
+
+    rng = random.Random(args.seed)
+    unique = max(1, round(args.images * (1 - args.duplicates)))
+    started = time.perf_counter()
+    originals = [
+        photo(args.width, args.height, seed) for seed in range(unique)
+    ]
+    sources = originals + rng.choices(originals, k=args.images - unique)
+    rng.shuffle(sources)
+    print(f'{len(sources)} картинок {args.width}x{args.height} '
+          f'({filesizeformat(sum(map(len, sources)))}) '
+          f'за {time.perf_counter() - started:.1f} с')
+
+    raw = FileSystemStorage(tempfile.mkdtemp())
+    hashed = FileSystemStorage(tempfile.mkdtemp())
+    results = {}
+    for name, save in (
+        ('как есть', lambda upload: raw.save(
+            f'posts/{upload.name}', upload
+        )),
+        ('posts.uploads', lambda upload: uploads.store(
+            uploads.process(upload), hashed
+        )),
+    ):
+        timings = []
+        for number, content in enumerate(sources):
+            upload = temporary_upload(f'photo_{number}.jpg', content)
+            started = time.perf_counter()
+            save(upload)
+            timings.append((time.perf_counter() - started) * 1000)
+            upload.close()
+        results[name] = timings
+
+    total = sum(map(len, sources)) / 2 ** 20
+    print(f'{"способ":14} {"p50, мс":>9} {"p95, мс":>9} '
+          f'{"картинок/с":>11} {"МБ/с":>7}')
+    for name, timings in results.items():
+        seconds = sum(timings) / 1000
+        timings.sort()
+        print(f'{name:14} {statistics.median(timings):9.1f} '
+              f'{timings[int(len(timings) * .95)]:9.1f} '
+              f'{len(timings) / seconds:11.1f} {total / seconds:7.1f}')
+    for name, storage in (('как есть', raw), ('posts.uploads', hashed)):
+        files = list(uploads.walk(storage))
+        size = sum(storage.size(path) for path in files)
+        print(f'{name:14} файлов {len(files):4}, {filesizeformat(size)}')
+    print(f'Размер по длинной стороне: {settings.IMAGE_UPLOAD_MAX_SIZE}, '
+          f'JPEG quality {settings.IMAGE_UPLOAD_JPEG_QUALITY}')
+
+
+if __name__ == '__main__':
+    main()
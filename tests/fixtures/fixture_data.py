@@ -9,6 +9,9 @@ from posts.models import Post, Group
 def mock_media(settings):
     with tempfile.TemporaryDirectory() as temp_directory:
         settings.MEDIA_ROOT = temp_directory
+        # Миниатюры — сразу: фоновый поток пережил бы временную папку
+        # и тестовую базу.
+        settings.POST_THUMBNAIL_ASYNC = False
         yield temp_directory
 
 
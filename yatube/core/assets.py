@@ -0,0 +1,63 @@
+"""Раздача статики из STATIC_ROOT после collectstatic.
+
+Если клиент принимает br или gzip и рядом с файлом лежит сжатая
+заранее копия (см. core.storage), отдаётся она с Content-Encoding;
+ответ всегда с Vary: Accept-Encoding. Файлы с хэшем в имени
+(STATIC_IMMUTABLE_PATTERN) кэшируются навсегда, остальные — на
+STATIC_MAX_AGE секунд. Условные запросы и Range — как у медиафайлов
+(core.media).
+"""
+from django.conf import settings
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .media import cache_control, content_type, file_response, resolve
+
+# Кодировки в порядке предпочтения и суффиксы их файлов.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and name.strip():
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+@require_safe
+def serve(request, path):
+    """Файл STATIC_ROOT/path или его сжатая копия."""
+    root = settings.STATIC_ROOT
+    fullpath, status = resolve(root, path)
+    mime = content_type(fullpath)
+    encoding = None
+    accepted = accepted_encodings(request)
+    for name, suffix in ENCODINGS:
+        if name in accepted:
+            try:
+                fullpath, status = resolve(root, path + suffix)
+            except Http404:
+                continue
+            encoding = name
+            break
+    response = file_response(
+        request, fullpath, status, mime, cache_control(
+            path, settings.STATIC_IMMUTABLE_PATTERN, settings.STATIC_MAX_AGE
+        )
+    )
+    if encoding and response.status_code != 304:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,221 @@
+"""Кэш в файле SQLite, общий для всех процессов одного сервера.
+
+Не требует внешних сервисов: воркеры gunicorn видят одни и те же
+записи и инвалидации. Записи вытесняются по давности последнего
+чтения (LRU), когда превышены MAX_ENTRIES или MAX_SIZE (в байтах).
+Число записей и их объём ведут триггеры в строке cache_stats, поэтому
+проверка лимитов при записи не пересчитывает таблицу.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Время последнего чтения обновляется не чаще раза в секунду,
+# чтобы горячие ключи не превращали каждое чтение в запись.
+ACCESS_RESOLUTION = 1
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'accessed REAL NOT NULL, size INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE TABLE IF NOT EXISTS cache_stats ('
+    'id INTEGER PRIMARY KEY CHECK (id = 0), '
+    'entries INTEGER NOT NULL, size INTEGER NOT NULL)',
+    # Для таблицы, созданной до cache_stats, — один пересчёт.
+    'INSERT OR IGNORE INTO cache_stats '
+    'SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache '
+    'WHERE NOT EXISTS (SELECT 1 FROM cache_stats)',
+    'CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache '
+    'BEGIN UPDATE cache_stats SET entries = entries + 1, '
+    'size = size + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache '
+    'BEGIN UPDATE cache_stats SET entries = entries - 1, '
+    'size = size - OLD.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_resized AFTER UPDATE OF size '
+    'ON cache BEGIN UPDATE cache_stats SET '
+    'size = size - OLD.size + NEW.size; END',
+)
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location or os.path.join(
+            tempfile.gettempdir(), 'yatube-cache.sqlite3'
+        )
+        self._max_size = int(
+            params.get('OPTIONS', {}).get('MAX_SIZE', 64 * 1024 * 1024)
+        )
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    @staticmethod
+    def _alive(expires, now):
+        return expires is None or expires > now
+
+    def _write(self, db, key, value, timeout):
+        blob = pickle.dumps(value, self.pickle_protocol)
+        # UPSERT, а не INSERT OR REPLACE: замена через REPLACE не вызывает
+        # триггер удаления, и счётчики cache_stats разошлись бы.
+        db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) '
+            'DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires, accessed = excluded.accessed, '
+            'size = excluded.size',
+            (key, blob, self.get_backend_timeout(timeout), time.time(),
+             len(blob))
+        )
+        self._cull(db)
+
+    @staticmethod
+    def _totals(db):
+        return db.execute('SELECT entries, size FROM cache_stats').fetchone()
+
+    def _cull(self, db):
+        entries, size = self._totals(db)
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        if self._cull_frequency == 0:
+            # Как у бэкендов Django: CULL_FREQUENCY = 0 — очистить всё.
+            db.execute('DELETE FROM cache')
+            return
+        db.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),)
+        )
+        entries, size = self._totals(db)
+        if entries > self._max_entries:
+            excess = entries - self._max_entries
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)',
+                (excess + self._max_entries // self._cull_frequency,)
+            )
+            entries, size = self._totals(db)
+        while size > self._max_size:
+            key, = db.execute(
+                'SELECT key FROM cache ORDER BY accessed LIMIT 1 OFFSET ?',
+                (max(entries // self._cull_frequency - 1, 0),)
+            ).fetchone()
+            db.execute(
+                'DELETE FROM cache WHERE accessed <= '
+                '(SELECT accessed FROM cache WHERE key = ?)',
+                (key,)
+            )
+            entries, size = self._totals(db)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row and self._alive(row[0], time.time()):
+                return False
+            self._write(db, key, value, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        if not self._alive(expires, now):
+            self._db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now)
+            )
+            return default
+        if now - accessed > ACCESS_RESOLUTION:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            self._write(db, key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            return db.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), key, time.time())
+            ).rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов: чтение и запись в одной транзакции."""
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or not self._alive(row[1], time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(value, self.pickle_protocol)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (blob, len(blob), key)
+            )
+            return value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            'SELECT expires FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        return row is not None and self._alive(row[0], time.time())
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
@@ -0,0 +1,63 @@
+"""Окружение для необязательного бэкенда Jinja2 (TEMPLATE_ENGINE=jinja2).
+
+Шаблоны templates/jinja2 повторяют одноимённые шаблоны Django; здесь
+собраны нужные им аналоги тегов и фильтров: url, static, date,
+linebreaksbr, addclass, page_range, post_picture и {% feedcache %}
+(см. posts.feed_cache).
+"""
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from posts.templatetags.pagination import page_range
+from posts.templatetags.pictures import post_picture
+
+from .templatetags.user_filters import addclass
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+class FeedCacheExtension(Extension):
+    """{% feedcache 'имя' %}...{% endfeedcache %} — фрагмент ленты.
+
+    Без feed_cache в контексте тело просто рендерится.
+    """
+
+    tags = {'feedcache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression(), nodes.Name('feed_cache', 'load')]
+        body = parser.parse_statements(
+            ['name:endfeedcache'], drop_needle=True
+        )
+        return nodes.CallBlock(
+            self.call_method('_fragment', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _fragment(self, name, feed, caller):
+        if not feed:
+            return caller()
+        return Markup(feed.fragment(name, caller))
+
+
+def environment(**options):
+    env = Environment(**{
+        **options,
+        'extensions': [*options.get('extensions', ()), FeedCacheExtension],
+    })
+    env.globals.update(
+        url=url, static=static, page_range=page_range,
+        post_picture=post_picture,
+    )
+    env.filters.update(
+        date=defaultfilters.date,
+        linebreaksbr=defaultfilters.linebreaksbr,
+        addclass=addclass,
+    )
+    return env
@@ -0,0 +1,186 @@
+"""Раздача медиафайлов из MEDIA_ROOT.
+
+Файл отдаётся потоком через FileResponse; поддерживаются условные
+запросы (ETag из времени изменения и размера, If-None-Match,
+If-Modified-Since) и один диапазон Range с If-Range. Файлы с именами
+по содержимому (MEDIA_IMMUTABLE_PATTERN: картинки постов и миниатюры
+sorl) помечаются immutable на год, остальные кэшируются на
+MEDIA_MAX_AGE секунд.
+
+С MEDIA_SENDFILE_HEADER файл отдаёт фронтовой прокси: для
+X-Accel-Redirect (nginx) в заголовке путь под MEDIA_SENDFILE_PREFIX,
+для X-Sendfile (Apache, lighttpd) — абсолютный путь файла. Приложение
+тогда только проверяет путь и условные заголовки, а Range и тело
+ответа остаются прокси. file_response используется и для статики
+(core.assets).
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeFile:
+    """Окно файла [start, start + length) для потоковой отдачи.
+
+    fileno() нет намеренно: иначе wsgi.file_wrapper сервера отправил бы
+    через sendfile файл до конца, а не только диапазон.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    """Диапазон (start, end) включительно или None — отдать весь файл.
+
+    Нераспознанный заголовок и несколько диапазонов — весь файл, как
+    разрешает RFC 7233; недостижимый диапазон — ValueError.
+    """
+    match = RANGE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: последние N байт.
+        if int(end) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def cache_control(path, immutable_pattern, max_age):
+    """Параметры Cache-Control: immutable на год для имён по содержимому."""
+    if re.search(immutable_pattern, path):
+        return {
+            'public': True, 'max_age': IMMUTABLE_MAX_AGE, 'immutable': True
+        }
+    return {'public': True, 'max_age': max_age}
+
+
+def _if_range_passes(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def resolve(root, path):
+    """Абсолютный путь и os.stat обычного файла root/path; иначе 404."""
+    try:
+        fullpath = safe_join(root, path)
+        status = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(status.st_mode):
+        raise Http404('Файл не найден')
+    return fullpath, status
+
+
+def content_type(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def file_response(request, fullpath, status, mime, cache, sendfile=None):
+    """Ответ с файлом: 304, Range, HEAD или поток FileResponse.
+
+    cache — параметры patch_cache_control; sendfile — пара (заголовок,
+    значение), с ней тело ответа отдаёт прокси.
+    """
+    size = status.st_size
+    last_modified = int(status.st_mtime)
+    etag = f'"{status.st_mtime_ns:x}-{size:x}"'
+
+    def headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        patch_cache_control(response, **cache)
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        return headers(not_modified)
+    if sendfile is not None:
+        response = HttpResponse(content_type=mime)
+        response[sendfile[0]] = sendfile[1]
+        return headers(response)
+    span = None
+    if _if_range_passes(request, etag, last_modified):
+        try:
+            span = byte_range(request.META.get('HTTP_RANGE', ''), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return headers(response)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=mime)
+        response['Content-Length'] = size
+        return headers(response)
+    file = open(fullpath, 'rb')
+    if span is None:
+        response = FileResponse(file, content_type=mime)
+    else:
+        start, end = span
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            content_type=mime, status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response.block_size = BLOCK_SIZE
+    return headers(response)
+
+
+@require_safe
+def serve(request, path):
+    """Файл MEDIA_ROOT/path; каталоги и пути вне MEDIA_ROOT — 404."""
+    fullpath, status = resolve(settings.MEDIA_ROOT, path)
+    sendfile = None
+    if settings.MEDIA_SENDFILE_HEADER == 'X-Accel-Redirect':
+        sendfile = (
+            'X-Accel-Redirect', quote(settings.MEDIA_SENDFILE_PREFIX + path)
+        )
+    elif settings.MEDIA_SENDFILE_HEADER:
+        sendfile = (settings.MEDIA_SENDFILE_HEADER, fullpath)
+    return file_response(
+        request, fullpath, status, content_type(fullpath),
+        cache_control(
+            path, settings.MEDIA_IMMUTABLE_PATTERN, settings.MEDIA_MAX_AGE
+        ),
+        sendfile
+    )
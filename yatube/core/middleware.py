@@ -0,0 +1,44 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+from . import perf, queries
+
+logger = logging.getLogger('core.perf')
+
+
+class PerformanceMiddleware:
+    """Замеряет выборку запросов: заголовок Server-Timing, строка лога
+    и скользящие гистограммы по view (см. core.views.perf_stats).
+    Для тех же запросов пишутся в лог N+1 и медленные запросы к БД
+    (см. core.queries).
+
+    Доля замеряемых запросов задаётся PERF_SAMPLE_RATE; остальные
+    проходят без обёрток.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return self.get_response(request)
+        with perf.recording() as recorder, \
+                queries.inspect_queries() as inspector:
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        inspector.log(view)
+        sample = recorder.as_dict()
+        perf.histograms.add(view, sample)
+        response['Server-Timing'] = recorder.server_timing()
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **sample,
+        }))
+        return response
@@ -0,0 +1,191 @@
+"""Замеры времени запроса: БД, шаблоны и кэш.
+
+Recorder текущего запроса хранится в thread-local. Запросы к БД
+считаются через connection.execute_wrapper, рендер шаблонов — обёрткой
+Template.render бэкенда Django (только верхний уровень, include и
+extends входят в его время), обращения к кэшу — обёртками get и
+get_many экземпляра кэша этого потока.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import Template
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+METRICS = ('total_ms', 'db_ms', 'queries', 'template_ms', 'cache_ms')
+MISSING = object()
+
+_local = threading.local()
+
+
+class Recorder:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+        self.cache_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.in_get_many = False
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def cache_get(self, get):
+        def wrapper(key, default=None, version=None):
+            if self.in_get_many:
+                # BaseCache.get_many сам вызывает get для каждого ключа.
+                return get(key, default, version=version)
+            started = time.perf_counter()
+            value = get(key, MISSING, version=version)
+            self.cache_time += time.perf_counter() - started
+            if value is MISSING:
+                self.cache_misses += 1
+                return default
+            self.cache_hits += 1
+            return value
+        return wrapper
+
+    def cache_get_many(self, get_many):
+        def wrapper(keys, version=None):
+            keys = list(keys)
+            started = time.perf_counter()
+            self.in_get_many = True
+            try:
+                values = get_many(keys, version=version)
+            finally:
+                self.in_get_many = False
+            self.cache_time += time.perf_counter() - started
+            self.cache_hits += len(values)
+            self.cache_misses += len(keys) - len(values)
+            return values
+        return wrapper
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.queries,
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_ms': round(self.cache_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;dur={self.cache_time * 1000:.1f};'
+            f'desc="{self.cache_hits} hit {self.cache_misses} miss"',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+@contextmanager
+def recording():
+    """Включает Recorder на время блока в текущем потоке."""
+    recorder = Recorder()
+    cache = caches['default']
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder.execute))
+        cache.get = recorder.cache_get(cache.get)
+        cache.get_many = recorder.cache_get_many(cache.get_many)
+        _local.recorder = recorder
+        try:
+            yield recorder
+        finally:
+            _local.recorder = None
+            del cache.get, cache.get_many
+            recorder.finish()
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        recorder = getattr(_local, 'recorder', None)
+        if recorder is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            recorder.template_time += time.perf_counter() - started
+    wrapper.perf_wrapped = True
+    return wrapper
+
+
+def install():
+    """Оборачивает рендер шаблонов; вызывается из CoreConfig.ready()."""
+    if not getattr(Template.render, 'perf_wrapped', False):
+        Template.render = _timed_render(Template.render)
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Histograms:
+    """Скользящие окна последних замеров по каждому view."""
+
+    def __init__(self, window=None):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(self._window)
+
+    def _window(self):
+        return deque(maxlen=self.window or settings.PERF_WINDOW)
+
+    def add(self, view, sample):
+        with self.lock:
+            self.samples[view].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def snapshot(self):
+        with self.lock:
+            samples = {
+                view: list(rows) for view, rows in self.samples.items()
+            }
+        result = {}
+        for view, rows in sorted(samples.items()):
+            summary = {'count': len(rows)}
+            for metric in METRICS:
+                values = sorted(row[metric] for row in rows)
+                summary[metric] = {
+                    'p50': _percentile(values, .5),
+                    'p95': _percentile(values, .95),
+                    'p99': _percentile(values, .99),
+                    'max': values[-1],
+                }
+            buckets = [0] * (len(BUCKETS_MS) + 1)
+            for row in rows:
+                buckets[bisect.bisect_left(BUCKETS_MS, row['total_ms'])] += 1
+            summary['histogram_ms'] = dict(zip(
+                [f'<={bucket}' for bucket in BUCKETS_MS] + ['inf'], buckets
+            ))
+            result[view] = summary
+        return result
+
+
+histograms = Histograms()
@@ -0,0 +1,131 @@
+"""Журнал медленных запросов и поиск N+1.
+
+QueryInspector группирует SQL запроса по нормализованной форме: без
+значений параметров, со свёрнутыми списками IN. SELECT одной формы,
+повторённый QUERY_REPEAT_THRESHOLD раз, считается N+1; запрос дольше
+SLOW_QUERY_MS — медленным. Для обоих запоминается место в коде или
+шаблоне, откуда пришёл запрос.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.queries')
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+SKIP_FILES = (__file__, os.path.join('core', 'perf.py'))
+
+
+def normalize(sql):
+    """Форма запроса: литералы и параметры — ?, списки IN — (...)."""
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql.replace('%s', '?'))
+    sql = LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def origin():
+    """Шаблон и строка, а если запрос не из шаблона — файл проекта."""
+    frame = sys._getframe(1)
+    location = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if frame.f_code.co_name == 'render_annotated' and hasattr(
+            node, 'token'
+        ):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if location is None and filename.startswith(
+            settings.BASE_DIR
+        ) and not filename.endswith(SKIP_FILES):
+            location = '{}:{} in {}'.format(
+                os.path.relpath(filename, settings.BASE_DIR),
+                frame.f_lineno,
+                frame.f_code.co_name
+            )
+        frame = frame.f_back
+    return location
+
+
+class QueryInspector:
+    """execute_wrapper, собирающий формы запросов одного блока кода."""
+
+    def __init__(self, slow_ms=None, threshold=None):
+        self.slow_ms = (
+            settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        )
+        self.threshold = (
+            settings.QUERY_REPEAT_THRESHOLD if threshold is None
+            else threshold
+        )
+        self.shapes = Counter()
+        self.origins = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            shape = normalize(sql)
+            if shape.startswith('SELECT'):
+                self.shapes[shape] += 1
+                if self.shapes[shape] == self.threshold:
+                    self.origins[shape] = origin()
+            if self.slow_ms is not None and duration >= self.slow_ms:
+                self.slow.append((shape, round(duration, 2), origin()))
+
+    @property
+    def repeated(self):
+        """[(форма, сколько раз, откуда)] для подозрений на N+1."""
+        return [
+            (shape, count, self.origins.get(shape))
+            for shape, count in self.shapes.most_common()
+            if count >= self.threshold
+        ]
+
+    def log(self, view):
+        for shape, count, where in self.repeated:
+            logger.warning(
+                'N+1 в %s: %s запросов %s (из %s)', view, count, shape, where
+            )
+        for shape, duration, where in self.slow:
+            logger.warning(
+                'Медленный запрос в %s: %s мс %s (из %s)',
+                view, duration, shape, where
+            )
+
+
+@contextmanager
+def inspect_queries(**kwargs):
+    """Подключает QueryInspector ко всем соединениям на время блока."""
+    inspector = QueryInspector(**kwargs)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+class QueryAssertionsMixin:
+    """Для TestCase: тест падает, если код внутри блока делает N+1."""
+
+    @contextmanager
+    def assertNoNPlusOne(self, threshold=None):
+        with inspect_queries(threshold=threshold) as inspector:
+            yield inspector
+        if inspector.repeated:
+            self.fail('Повторяющиеся запросы (N+1):\n' + '\n'.join(
+                f'{count} x {shape}\n    из {where}'
+                for shape, count, where in inspector.repeated
+            ))
@@ -0,0 +1,63 @@
+"""Хранилище статики с хэшами в именах и сжатыми заранее копиями.
+
+collectstatic кладёт в STATIC_ROOT файлы с хэшем содержимого в имени
+и манифест (ManifestStaticFilesStorage), а затем рядом с текстовыми
+файлами — name.gz и name.br. Копия
+пишется, только если она меньше исходного файла. Выбирает вариант
+при отдаче core.assets.
+"""
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml',
+    '.html', '.ico', '.ttf', '.otf', '.eot',
+)
+# Меньше этого размера сжатие не окупает лишнего файла.
+MIN_SIZE = 256
+
+
+COMPRESSORS = (
+    ('.gz', lambda data: gzip.compress(data, 9, mtime=0)),
+    ('.br', lambda data: brotli.compress(data, quality=11)),
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Файл без записи в манифесте отдаётся по исходному имени,
+    # а не роняет рендер страницы.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = [
+            name for name in {*paths, *self.hashed_files.values()}
+            if name.lower().endswith(COMPRESS_EXTENSIONS) and self.exists(name)
+        ]
+        # zlib и brotli отпускают GIL, файлы сжимаются параллельно.
+        with ThreadPoolExecutor() as pool:
+            for name, written in zip(names, pool.map(self.compress, names)):
+                for compressed in written:
+                    yield name, compressed, True
+
+    def compress(self, name):
+        """Пишет сжатые копии name; возвращает их имена."""
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return []
+        written = []
+        for suffix, compress in COMPRESSORS:
+            content = compress(data)
+            if len(content) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            written.append(self._save(name + suffix, ContentFile(content)))
+        return written
@@ -0,0 +1,130 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+import brotli
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+SOURCE_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = (
+    'body { background: url("../img/logo.png"); }\n'
+    + '.card { margin: 0 auto; padding: 1rem; }\n' * 50
+).encode()
+HASHED_CSS = 'css/app.0123456789ab.css'
+
+
+def write(root, name, content):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(content)
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_DIRS=[SOURCE_ROOT],
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class ManifestStorageTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        write(SOURCE_ROOT, 'css/app.css', CSS)
+        write(SOURCE_ROOT, 'img/logo.png', b'\x89PNG' + b'\0' * 1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SOURCE_ROOT, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        css = staticfiles_storage.stored_name('css/app.css')
+        self.assertRegex(css, settings.STATIC_IMMUTABLE_PATTERN)
+        self.assertEqual(static('css/app.css'), settings.STATIC_URL + css)
+        with staticfiles_storage.open(css) as file:
+            content = file.read()
+        # Ссылка на картинку внутри CSS тоже получила хэш.
+        self.assertIn(
+            staticfiles_storage.stored_name('img/logo.png').split('/')[-1],
+            content.decode()
+        )
+        with staticfiles_storage.open(css + '.gz') as file:
+            self.assertEqual(gzip.decompress(file.read()), content)
+        with staticfiles_storage.open(css + '.br') as file:
+            self.assertEqual(brotli.decompress(file.read()), content)
+        self.assertFalse(staticfiles_storage.exists(
+            staticfiles_storage.stored_name('img/logo.png') + '.gz'
+        ))
+        response = self.client.get(
+            reverse('static', args=[css]), HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(b''.join(response.streaming_content)), content
+        )
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class AssetsServeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        write(STATIC_ROOT, HASHED_CSS, CSS)
+        write(STATIC_ROOT, HASHED_CSS + '.gz', b'gzip')
+        write(STATIC_ROOT, HASHED_CSS + '.br', b'brotli')
+        write(STATIC_ROOT, 'css/app.css', CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def get(self, name, accept_encoding=None, **headers):
+        if accept_encoding is not None:
+            headers['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        return self.client.get(reverse('static', args=[name]), **headers)
+
+    def test_encoding_negotiation(self):
+        CASES = [
+            ('gzip, deflate, br', 'br', b'brotli'),
+            ('gzip', 'gzip', b'gzip'),
+            ('br;q=0, gzip;q=0.8', 'gzip', b'gzip'),
+            ('identity', None, CSS),
+            (None, None, CSS),
+        ]
+        for accept_encoding, encoding, body in CASES:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(HASHED_CSS, accept_encoding)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_cache_headers(self):
+        self.assertEqual(
+            self.get(HASHED_CSS)['Cache-Control'],
+            'public, max-age=31536000, immutable'
+        )
+        self.assertEqual(
+            self.get('css/app.css', 'gzip')['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        etag = self.get(HASHED_CSS, 'br')['ETag']
+        response = self.get(HASHED_CSS, 'br', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_missing_files(self):
+        for name in ('css/missing.css', 'css', '../manage.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name, 'gzip').status_code, 404)
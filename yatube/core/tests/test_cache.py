@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.cache.delete('key')
+        self.assertFalse(self.cache.has_key('key'))
+        self.cache.set('expired', 'value', -1)
+        self.assertIsNone(self.cache.get('expired'))
+
+    def test_incr_is_shared_between_instances(self):
+        """Счётчик виден другому экземпляру, как другому процессу."""
+        other = SQLiteCache(self.location, {})
+        self.cache.set('counter', 1)
+        self.assertEqual(other.incr('counter'), 2)
+        self.assertEqual(self.cache.incr('counter', 3), 5)
+        with self.assertRaises(ValueError):
+            other.incr('missing')
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        for i in range(10):
+            self.cache.set(f'key_{i}', i)
+        self.cache._db.execute(
+            'UPDATE cache SET accessed = accessed + 100 WHERE key LIKE ?',
+            ('%key_0',)
+        )
+        self.cache.set('key_10', 10)
+        self.assertEqual(self.cache.get('key_0'), 0)
+        self.assertIsNone(self.cache.get('key_1'))
+        self.assertLessEqual(
+            self.cache._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0],
+            10
+        )
+
+    def test_size_limit(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_SIZE': 1000}})
+        for i in range(10):
+            cache.set(f'key_{i}', 'x' * 300)
+        size, = cache._db.execute('SELECT SUM(size) FROM cache').fetchone()
+        self.assertLessEqual(size, 1000)
+        self.assertIsNotNone(cache.get('key_9'))
+
+    def test_totals_follow_writes(self):
+        """Счётчики cache_stats совпадают с таблицей после любых записей."""
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_SIZE': 1000}})
+        for i in range(10):
+            cache.set(f'key_{i}', 'x' * 100)
+        cache.set('key_0', 'x' * 200)
+        cache.add('counter', 1)
+        cache.incr('counter', 10 ** 12)
+        cache.delete('key_1')
+        cache.set('expired', 'value', -1)
+        cache.get('expired')
+        self.assertEqual(
+            cache._totals(cache._db),
+            cache._db.execute(
+                'SELECT COUNT(*), SUM(size) FROM cache'
+            ).fetchone()
+        )
+        cache.clear()
+        self.assertEqual(cache._totals(cache._db), (0, 0))
+
+    def test_cull_frequency_zero_clears(self):
+        cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 0}
+        })
+        for i in range(4):
+            cache.set(f'key_{i}', i)
+        self.assertEqual(cache._totals(cache._db), (0, 0))
+        cache.set('key', 1)
+        self.assertEqual(cache.get('key'), 1)
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..media import byte_range
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = b'0123456789'
+HASHED = f'posts/ab/{"a" * 64}.jpg'
+
+FILE_URL = reverse('media', args=['docs/file.txt'])
+HASHED_URL = reverse('media', args=[HASHED])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE_HEADER=None)
+class MediaServeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('docs/file.txt', HASHED):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_file(self):
+        response = self.client.get(FILE_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_MAX_AGE}'
+        )
+        self.assertIn('immutable', self.client.get(
+            HASHED_URL
+        )['Cache-Control'])
+
+    def test_not_modified(self):
+        etag = self.client.get(FILE_URL)['ETag']
+        response = self.client.get(FILE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_ranges(self):
+        etag = self.client.get(FILE_URL)['ETag']
+        CASES = [
+            ({'HTTP_RANGE': 'bytes=2-5'}, 206, b'2345', 'bytes 2-5/10'),
+            ({'HTTP_RANGE': 'bytes=7-'}, 206, b'789', 'bytes 7-9/10'),
+            ({'HTTP_RANGE': 'bytes=-3'}, 206, b'789', 'bytes 7-9/10'),
+            ({'HTTP_RANGE': 'bytes=8-100'}, 206, b'89', 'bytes 8-9/10'),
+            ({'HTTP_RANGE': 'bytes=0-1,4-5'}, 200, CONTENT, None),
+            ({'HTTP_RANGE': 'bytes=20-'}, 416, b'', 'bytes */10'),
+            ({'HTTP_RANGE': 'bytes=2-5', 'HTTP_IF_RANGE': etag},
+             206, b'2345', 'bytes 2-5/10'),
+            ({'HTTP_RANGE': 'bytes=2-5', 'HTTP_IF_RANGE': '"old"'},
+             200, CONTENT, None),
+        ]
+        for headers, status, body, content_range in CASES:
+            with self.subTest(headers=headers):
+                response = self.client.get(FILE_URL, **headers)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(b''.join(
+                    getattr(response, 'streaming_content', [])
+                ) or response.content, body)
+                self.assertEqual(response.get('Content-Range'), content_range)
+                if status == 206:
+                    self.assertEqual(
+                        response['Content-Length'], str(len(body))
+                    )
+
+    def test_byte_range(self):
+        self.assertIsNone(byte_range('', 10))
+        self.assertIsNone(byte_range('bytes=5-2', 10))
+        with self.assertRaises(ValueError):
+            byte_range('bytes=-0', 10)
+
+    def test_missing_files(self):
+        for path in ('docs/missing.txt', 'docs', '../manage.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(
+                    reverse('media', args=[path])
+                ).status_code, 404)
+        self.assertEqual(self.client.post(FILE_URL).status_code, 405)
+
+    def test_sendfile(self):
+        CASES = [
+            ('X-Accel-Redirect', '/protected-media/docs/file.txt'),
+            ('X-Sendfile', os.path.join(TEMP_MEDIA_ROOT, 'docs/file.txt')),
+        ]
+        for header, value in CASES:
+            with self.subTest(header=header), override_settings(
+                MEDIA_SENDFILE_HEADER=header,
+                MEDIA_SENDFILE_PREFIX='/protected-media/'
+            ):
+                response = self.client.get(FILE_URL)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response[header], value)
+                self.assertEqual(response.content, b'')
+                self.assertIn('ETag', response)
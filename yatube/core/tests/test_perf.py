@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import perf
+
+User = get_user_model()
+
+INDEX_URL = reverse('posts:index')
+PERF_URL = reverse('perf_stats')
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        perf.histograms.clear()
+        self.staff = User.objects.create_user(
+            username='staff', is_staff=True
+        )
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с запросами, шаблоном и кэшем."""
+        with self.assertLogs('core.perf', 'INFO') as logs:
+            response = self.client.get(INDEX_URL)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertIn('"view": "posts:index"', logs.output[0])
+
+    def test_cache_hits_and_misses(self):
+        """Повторный запрос ленты попадает в кэш и не ходит в БД."""
+        self.client.get(INDEX_URL)
+        self.client.get(INDEX_URL)
+        first, second = perf.histograms.samples['posts:index']
+        self.assertGreater(first['cache_misses'], 0)
+        self.assertGreater(second['cache_hits'], 0)
+        self.assertGreater(first['queries'], 0)
+        self.assertEqual(second['queries'], 0)
+        self.assertGreater(first['template_ms'], 0)
+
+    def test_sampling_disabled(self):
+        """При PERF_SAMPLE_RATE=0 запросы не замеряются."""
+        with self.settings(PERF_SAMPLE_RATE=0):
+            response = self.client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertNotIn('posts:index', perf.histograms.snapshot())
+
+    def test_perf_stats_for_staff_only(self):
+        """Гистограммы доступны только персоналу."""
+        self.client.get(INDEX_URL)
+        response = self.client.get(PERF_URL)
+        self.assertEqual(response.status_code, 302)
+        stats = self.staff_client.get(PERF_URL).json()['posts:index']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(sum(stats['histogram_ms'].values()), 1)
+        self.assertIn('p99', stats['queries'])
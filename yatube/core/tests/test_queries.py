@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..queries import QueryAssertionsMixin, inspect_queries, normalize
+
+User = get_user_model()
+
+
+class QueryInspectorTests(QueryAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'user_{i}') for i in range(5)
+        )
+
+    def test_normalize(self):
+        """Литералы и списки IN не влияют на форму запроса."""
+        self.assertEqual(
+            normalize('SELECT "a" FROM t WHERE id IN (%s, %s, %s)  LIMIT 21'),
+            normalize("SELECT \"a\" FROM t WHERE id IN (%s) LIMIT 5"),
+        )
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE name = 'x''y' AND n = 12"),
+            'SELECT * FROM t WHERE name = ? AND n = ?'
+        )
+
+    def test_repeated_queries_found(self):
+        """Запрос в цикле распознаётся как N+1 с местом вызова."""
+        with inspect_queries(threshold=3) as inspector:
+            for pk in User.objects.values_list('pk', flat=True):
+                User.objects.get(pk=pk)
+        [(shape, count, where)] = inspector.repeated
+        self.assertEqual(count, 5)
+        self.assertIn('core/tests/test_queries.py', where)
+
+    def test_assert_no_n_plus_one_fails(self):
+        with self.assertRaises(AssertionError):
+            with self.assertNoNPlusOne(threshold=2):
+                for user in User.objects.all():
+                    User.objects.filter(pk=user.pk).exists()
+
+    def test_slow_queries_logged(self):
+        """Запросы дольше порога попадают в лог с формой запроса."""
+        with inspect_queries(slow_ms=0) as inspector:
+            User.objects.count()
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            inspector.log('test')
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
@@ -0,0 +1,166 @@
+"""JSON API лент и подписок.
+
+Ленты доступны только для чтения. Посты сериализуются прямо из
+.values(), без создания моделей, и отдаются страницами CursorPaginator
+(?cursor=). Ответы несут ETag и Last-Modified (см. conditional):
+повторный опрос без изменений получает 304 до обращения к ленте.
+Комментарии поста отдаются так же страницами по курсору (created, id).
+Единственная запись — follow_bulk: подписка на список авторов одной
+транзакцией.
+"""
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from .conditional import (
+    conditional, follow_state, group_state, index_state, post_state,
+    profile_state
+)
+from .follows import follow_many
+from .models import Comment, Post
+from .paginators import CREATED_KEYS, DEFAULT_KEYS, CursorPaginator
+from .timeline import TIMELINE_KEYS, timeline_posts
+
+POST_VALUES = (
+    'id', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+)
+COMMENT_VALUES = ('id', 'text', 'created', 'author__username')
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    return request.build_absolute_uri(f'{request.path}?cursor={cursor}')
+
+
+def feed_response(request, queryset, keys=DEFAULT_KEYS):
+    page = CursorPaginator(
+        queryset.values(*POST_VALUES), settings.POSTS_ON_PAGE, keys=keys
+    ).get_cursor_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize_post(row) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    })
+
+
+@conditional(index_state, csrf=False)
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@conditional(group_state, csrf=False)
+def group_posts(request, slug):
+    return feed_response(request, Post.objects.filter(group__slug=slug))
+
+
+@conditional(profile_state, csrf=False)
+def profile(request, username):
+    return feed_response(
+        request, Post.objects.filter(author__username=username)
+    )
+
+
+@conditional(follow_state, csrf=False)
+def _follow_feed(request):
+    # Новые посты популярных авторов уже подтянуты в follow_state.
+    return feed_response(
+        request, timeline_posts(request.user, pull=False), keys=TIMELINE_KEYS
+    )
+
+
+def _unauthorized():
+    return JsonResponse({'detail': 'Требуется авторизация.'}, status=401)
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _unauthorized()
+    return _follow_feed(request)
+
+
+@require_POST
+def follow_bulk(request):
+    """Подписка на список авторов одной транзакцией.
+
+    Имена — JSON {"usernames": [...]} или поля формы usernames.
+    """
+    if not request.user.is_authenticated:
+        return _unauthorized()
+    if request.content_type != 'application/json':
+        usernames = request.POST.getlist('usernames')
+    else:
+        try:
+            usernames = json.loads(request.body)['usernames']
+        except (ValueError, KeyError, TypeError):
+            usernames = None
+    if not isinstance(usernames, list) or not all(
+        isinstance(username, str) for username in usernames
+    ):
+        return JsonResponse(
+            {'detail': 'Ожидается {"usernames": [...]}.'}, status=400
+        )
+    if len(usernames) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse({
+            'detail': f'Не больше {settings.FOLLOW_BULK_LIMIT} имён за раз.'
+        }, status=400)
+    return JsonResponse(follow_many(request.user, usernames))
+
+
+def comments_page(request, post_id):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_VALUES),
+        settings.COMMENTS_ON_PAGE,
+        keys=CREATED_KEYS,
+        date_field='created'
+    ).get_cursor_page(request.GET.get('cursor'))
+
+
+@conditional(post_state, csrf=False)
+def post_detail(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(*POST_VALUES).first()
+    if post is None:
+        raise Http404
+    page = comments_page(request, post_id)
+    return JsonResponse({
+        **serialize_post(post),
+        'comments': [serialize_comment(row) for row in page],
+        'comments_next': page.next_cursor and request.build_absolute_uri(
+            reverse('posts:api_post_comments', args=[post_id])
+            + f'?cursor={page.next_cursor}'
+        ),
+    })
+
+
+@conditional(post_state, csrf=False)
+def post_comments(request, post_id):
+    page = comments_page(request, post_id)
+    return JsonResponse({
+        'results': [serialize_comment(row) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    })
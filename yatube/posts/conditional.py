@@ -0,0 +1,185 @@
+"""Условные GET-ответы (ETag, Last-Modified) и Cache-Control для лент.
+
+ETag строится из версии пространства кэша лент (она меняется при любой
+записи в ленту, см. feed_cache), даты новейшей записи, пути с
+параметрами и пользователя. Last-Modified — дата новейшего поста или
+комментария. В HTML-страницах вошедшего есть CSRF-токен, поэтому их
+ETag зависит ещё от сессии и CSRF-cookie, а Last-Modified им не
+отдаётся: по дате старый токен не отличить. Ответ без изменений — 304
+до обращения к ленте и до рендера. Анонимные ответы помечаются public
+с FEED_MAX_AGE, чтобы их мог отдавать фронтовой прокси; ответы
+вошедшим пользователям — private.
+"""
+import hashlib
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_safe
+
+from . import feed_cache
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+from .timeline import pull_celebrities
+
+
+def _newest(posts):
+    return posts.order_by('-pub_date').values('pub_date')[:1]
+
+
+def _feed_state(namespace, queryset):
+    """Версия пространства и новейший pub_date, посчитанный раз на версию.
+
+    queryset — одна строка с полем newest или пустой, если ленты нет.
+    """
+    version, rows = feed_cache.memoize(
+        namespace, 'newest',
+        lambda: list(queryset.values_list('newest', flat=True)[:1])
+    )
+    return (version, rows[0]) if rows else None
+
+
+def index_state(request):
+    return feed_cache.memoize(
+        'index', 'newest', lambda: _newest(Post.objects).values_list(
+            'pub_date', flat=True
+        ).first()
+    )
+
+
+def group_state(request, slug):
+    return _feed_state(f'group:{slug}', Group.objects.filter(
+        slug=slug
+    ).annotate(newest=Subquery(_newest(Post.objects.filter(
+        group=OuterRef('pk')
+    )))))
+
+
+def profile_state(request, username):
+    return _feed_state(f'profile:{username}', User.objects.filter(
+        username=username
+    ).annotate(newest=Subquery(_newest(Post.objects.filter(
+        author=OuterRef('pk')
+    )))))
+
+
+def follow_state(request):
+    """Состояние ленты подписок без Last-Modified.
+
+    Правка поста в ленте не меняет ни числа записей, ни даты новейшей,
+    поэтому в маркер входят версии профилей авторов: их меняет любая
+    запись в пост автора. По дате такую правку не отличить, и
+    Last-Modified не отдаётся.
+    """
+    pull_celebrities(request.user)
+    timeline = TimelineEntry.objects.filter(user=request.user).aggregate(
+        newest=Max('pub_date'), count=Count('pk')
+    )
+    authors = Follow.objects.filter(user=request.user).order_by(
+        'author__username'
+    ).values_list('author__username', flat=True)
+    marker = hashlib.md5(':'.join(map(str, [
+        timeline['count'], timeline['newest'], *feed_cache.versions(*(
+            f'profile:{username}' for username in authors
+        ))
+    ])).encode()).hexdigest()
+    return marker, None
+
+
+def _post_row(post_id):
+    rows = Post.objects.filter(pk=post_id).annotate(
+        newest_comment=Subquery(Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by('-created').values('created')[:1])
+    ).values(
+        'pub_date', 'newest_comment', 'author__username', 'group__slug'
+    )
+    return rows[0] if rows else None
+
+
+def post_state(request, post_id):
+    version, post = feed_cache.memoize(
+        f'post:{post_id}', 'state', lambda: _post_row(post_id)
+    )
+    if post is None:
+        return None
+    # Страница поста показывает и счётчики автора, и название группы.
+    versions = [
+        version, feed_cache.version(f'profile:{post["author__username"]}')
+    ]
+    if post['group__slug']:
+        versions.append(feed_cache.version(f'group:{post["group__slug"]}'))
+    return (
+        ':'.join(map(str, versions)),
+        max(filter(None, [post['pub_date'], post['newest_comment']]))
+    )
+
+
+def _cached_state(state, request, *args, **kwargs):
+    """state(request, ...), посчитанный один раз на запрос."""
+    if not hasattr(request, '_conditional_state'):
+        request._conditional_state = state(request, *args, **kwargs)
+    return request._conditional_state
+
+
+def _etag(state, csrf, request, *args, **kwargs):
+    current = _cached_state(state, request, *args, **kwargs)
+    if current is None:
+        return None
+    parts = [*current, request.get_full_path(), request.user.pk]
+    if csrf and request.user.is_authenticated:
+        # В странице вошедшего пользователя — CSRF-токен его сессии:
+        # после нового входа сохранённая копия уже не годится.
+        # get_token заводит секрет, если cookie ещё нет, — тот же,
+        # что попадёт в форму и в ответ.
+        get_token(request)
+        parts += [request.session.session_key, request.META['CSRF_COOKIE']]
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _last_modified(state, csrf, request, *args, **kwargs):
+    if csrf and request.user.is_authenticated:
+        return None
+    current = _cached_state(state, request, *args, **kwargs)
+    return current[1] if current else None
+
+
+def _cache_control(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, max_age=0)
+    elif response.status_code in (200, 304):
+        patch_cache_control(
+            response, public=True, max_age=settings.FEED_MAX_AGE
+        )
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def conditional(state, csrf=True):
+    """GET- и HEAD-view с ETag и Last-Modified из state(request, ...).
+
+    state возвращает (маркер версии, дата последнего изменения) или
+    None, если ресурса нет — тогда 404; считается один раз на запрос.
+    csrf=False — для ответов без форм (API): ETag вошедшего не зависит
+    от сессии, и Last-Modified отдаётся всем.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _cached_state(state, request, *args, **kwargs) is None:
+                raise Http404
+            return view(request, *args, **kwargs)
+
+        conditional_view = condition(
+            etag_func=partial(_etag, state, csrf),
+            last_modified_func=partial(_last_modified, state, csrf)
+        )(wrapper)
+
+        @wraps(view)
+        def cache_control(request, *args, **kwargs):
+            return _cache_control(conditional_view, request, *args, **kwargs)
+        return require_safe(cache_control)
+    return decorator
@@ -0,0 +1,129 @@
+"""Кэш фрагментов лент с инвалидацией по версиям пространств имён.
+
+Ключ фрагмента включает версию пространства ('index', 'group:<slug>',
+'profile:<username>', 'post:<id>'). Запись в пост, комментарий или подписку
+увеличивает версию, и старые фрагменты больше не читаются. Кэш
+проверяется до обращения к ORM: при попадании данные контекста
+остаются ленивыми и не запрашиваются.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
+
+VERSION_KEY = 'feed-version:{}'
+MEMO_KEY = 'feed-memo:{}:{}:{}'
+STATS_KEYS = {
+    'hits': 'feed-cache:hits',
+    'misses': 'feed-cache:misses',
+}
+
+
+def _hash(value):
+    # Имена пользователей и слаги бывают не ASCII, что недопустимо
+    # в ключах memcached.
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _incr(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, initial, None)
+        return initial
+
+
+def version(namespace):
+    key = VERSION_KEY.format(_hash(namespace))
+    value = cache.get(key)
+    if value is None:
+        # Начальное значение от времени: если ключ вытеснен, старые
+        # версии не совпадут с новыми.
+        value = _incr(key, time.time_ns())
+    return value
+
+
+def versions(*namespaces):
+    """Версии нескольких пространств одним чтением кэша."""
+    keys = {
+        namespace: VERSION_KEY.format(_hash(namespace))
+        for namespace in namespaces
+    }
+    values = cache.get_many(keys.values())
+    return [
+        values[keys[namespace]] if keys[namespace] in values
+        else version(namespace)
+        for namespace in namespaces
+    ]
+
+
+def bump(*namespaces):
+    for namespace in namespaces:
+        _incr(VERSION_KEY.format(_hash(namespace)), time.time_ns())
+
+
+def memoize(namespace, name, func):
+    """(версия, func()), где func() считается раз на версию пространства."""
+    current = version(namespace)
+    key = MEMO_KEY.format(_hash(namespace), current, name)
+    value = cache.get(key)
+    if value is None:
+        # Кортеж отличает закэшированный None от промаха.
+        value = (func(),)
+        cache.set(key, value, settings.FEED_CACHE_TIMEOUT)
+    return current, value[0]
+
+
+def stats():
+    """Счётчики попаданий и промахов кэша лент."""
+    values = cache.get_many(STATS_KEYS.values())
+    return {
+        name: values.get(key, 0) for name, key in STATS_KEYS.items()
+    }
+
+
+def make_key(request, namespace):
+    return 'feed:{}:{}:{}:{}'.format(
+        _hash(namespace),
+        version(namespace),
+        int(request.user.is_authenticated),
+        _hash(request.GET.urlencode())
+    )
+
+
+class FeedCache:
+    """Фрагменты одной страницы ленты для тега {% feedcache %}."""
+
+    def __init__(self, request, namespace):
+        self.request = request
+        self.key = make_key(request, namespace)
+        self.fragments = cache.get(self.key)
+        self.hit = self.fragments is not None
+        if not self.hit:
+            self.fragments = {}
+        _incr(STATS_KEYS['hits' if self.hit else 'misses'], 1)
+
+    def lazy(self, func, *args, **kwargs):
+        """При промахе вычисляет значение сразу, при попадании — по запросу."""
+        if self.hit:
+            return SimpleLazyObject(partial(func, *args, **kwargs))
+        return func(*args, **kwargs)
+
+    def fragment(self, name, render):
+        """Фрагмент name из кэша; при промахе — render() с сохранением."""
+        if self.hit and name in self.fragments:
+            return self.fragments[name]
+        self.fragments[name] = render()
+        return self.fragments[name]
+
+    def render(self, template_name, context):
+        response = render(
+            self.request, template_name, {**context, 'feed_cache': self}
+        )
+        if not self.hit:
+            cache.set(self.key, self.fragments, settings.FEED_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,101 @@
+"""Подписки пачкой и проверка «подписан ли» для многих авторов сразу.
+
+follow_many подписывает на список авторов одной транзакцией через
+bulk_create(ignore_conflicts=True). Сигналы при этом не срабатывают,
+поэтому счётчики, ленты подписок, рекомендации и кэш профилей
+обновляются здесь же — пачкой, а не по запросу на автора.
+FollowingLookup отвечает, на кого из авторов подписан пользователь,
+одним запросом на пачку и помнит ответы до конца запроса.
+"""
+from django.db import transaction
+
+from . import feed_cache, recommendations, timeline
+from .models import Follow, User, UserStats
+
+# Сколько id подставлять в один IN: лимит переменных SQLite.
+CHUNK_SIZE = 500
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def follow_many(user, usernames):
+    """Подписывает user на авторов по именам.
+
+    Возвращает словарь со списками followed (новые подписки), already
+    (подписка уже была) и missing (нет такого пользователя или это сам
+    user).
+    """
+    usernames = list(dict.fromkeys(usernames))
+    authors = {}
+    for chunk in _chunks(usernames):
+        authors.update(User.objects.filter(username__in=chunk).exclude(
+            pk=user.pk
+        ).values_list('username', 'pk'))
+    with transaction.atomic():
+        existing = set()
+        for chunk in _chunks(authors.values()):
+            existing.update(Follow.objects.filter(
+                user=user, author_id__in=chunk
+            ).values_list('author_id', flat=True))
+        new = {pk for pk in authors.values() if pk not in existing}
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=pk) for pk in new],
+            batch_size=CHUNK_SIZE,
+            ignore_conflicts=True
+        )
+        # Параллельный запрос мог вставить часть подписок из new раньше
+        # нас, и ignore_conflicts их молча пропустил. Прибавка через F()
+        # посчитала бы их дважды, поэтому счётчики — пересчётом.
+        for chunk in _chunks(new):
+            UserStats.rebuild(chunk)
+            timeline.backfill(user.pk, *chunk)
+        if new:
+            UserStats.rebuild([user.pk])
+            recommendations.refresh(user.pk)
+    followed = [name for name, pk in authors.items() if pk in new]
+    if followed:
+        feed_cache.bump(*(
+            f'profile:{username}' for username in [user.username, *followed]
+        ))
+    return {
+        'followed': followed,
+        'already': [name for name, pk in authors.items() if pk in existing],
+        'missing': [name for name in usernames if name not in authors],
+    }
+
+
+class FollowingLookup:
+    """«Подписан ли user на автора» с кэшем на время запроса."""
+
+    def __init__(self, user):
+        self.user = user
+        self.known = {}
+
+    def prefetch(self, author_ids):
+        """Узнаёт ответ сразу для всех неизвестных авторов одним запросом."""
+        missing = {pk for pk in author_ids if pk not in self.known}
+        if not missing:
+            return
+        followed = set()
+        if self.user.is_authenticated:
+            for chunk in _chunks(missing):
+                followed.update(Follow.objects.filter(
+                    user=self.user, author_id__in=chunk
+                ).values_list('author_id', flat=True))
+        for pk in missing:
+            self.known[pk] = pk in followed
+
+    def __call__(self, author_id):
+        self.prefetch([author_id])
+        return self.known[author_id]
+
+
+def following_lookup(request):
+    """Общий для всего запроса FollowingLookup текущего пользователя."""
+    if not hasattr(request, '_following_lookup'):
+        request._following_lookup = FollowingLookup(request.user)
+    return request._following_lookup
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import uploads
 from .models import Post, Comment
 
 
@@ -8,6 +10,19 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        """Новая картинка перекодируется (см. posts.uploads)."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return uploads.process(image)
+        return image
+
+    def save(self, commit=True):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, uploads.ProcessedImage):
+            self.instance.image = uploads.store(image)
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
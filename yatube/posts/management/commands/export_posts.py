@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в JSONL '
+        'или в каталог CSV-файлов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Файл JSONL, каталог для CSV или «-» для stdout.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'csv'),
+            default='jsonl',
+            help='Формат выгрузки.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько строк читать из базы за один запрос.'
+        )
+
+    def handle(self, *args, output, format, batch_size, **options):
+        started = time.monotonic()
+        rows = transfer.export_rows(chunk_size=batch_size)
+        if format == 'csv':
+            count = transfer.write_csv(rows, output)
+        elif output == '-':
+            count = transfer.write_jsonl(rows, sys.stdout)
+        else:
+            with open(output, 'w', encoding='utf-8') as stream:
+                count = transfer.write_jsonl(rows, stream)
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено строк: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
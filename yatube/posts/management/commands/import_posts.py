@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками bulk_create. Авторы '
+        'и группы находятся по username и slug, недостающие создаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input',
+            help='Файл JSONL, каталог с CSV или «-» для stdin.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--defer-indexes',
+            action='store_true',
+            help='Снять составные индексы на время загрузки.'
+        )
+        parser.add_argument(
+            '--progress',
+            type=int,
+            default=100000,
+            help='Печатать скорость каждые N строк (0 — не печатать).'
+        )
+
+    def handle(self, *args, input, batch_size, defer_indexes, progress,
+               **options):
+        started = time.monotonic()
+        importer = transfer.Importer(batch_size=batch_size)
+        deferred = (Post, Comment, Follow) if defer_indexes else ()
+        with transfer.deferred_indexes(deferred), transfer.original_dates():
+            read = 0
+            for model, row in self.read(input):
+                importer.add(model, row)
+                read += 1
+                if progress and read % progress == 0:
+                    self.report('Прочитано строк', read, started)
+            importer.flush()
+        importer.finish()
+        for model in (User, Group, Post, Comment, Follow):
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{importer.created[model]}'
+            )
+        if importer.skipped:
+            self.stdout.write(f'Пропущено строк: {importer.skipped}')
+        self.report('Загружено строк', read, started, self.style.SUCCESS)
+
+    def read(self, path):
+        if path == '-':
+            return transfer.read_jsonl(sys.stdin)
+        if os.path.isdir(path):
+            return transfer.read_csv(path)
+        return self._read_file(path)
+
+    def _read_file(self, path):
+        with open(path, encoding='utf-8') as stream:
+            yield from transfer.read_jsonl(stream)
+
+    def report(self, message, count, started, style=None):
+        elapsed = time.monotonic() - started
+        line = (
+            f'{message}: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+        self.stdout.write(style(line) if style else line)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожих авторов и рекомендации по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Скольким пользователям записывать результат за раз.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        started = time.perf_counter()
+        users = recommendations.rebuild(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для {users} пользователей '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей пересчитывать за один проход.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            rebuilt += UserStats.rebuild(batch)
+            last_pk = batch[-1]
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано пользователей: {rebuilt}')
+        )
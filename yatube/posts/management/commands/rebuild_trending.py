@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает ленту «Популярное» и кладёт её в кэш.'
+
+    def handle(self, *args, **options):
+        current = trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярное пересчитано: постов {len(current["posts"])}, '
+            f'групп {len(current["groups"])}'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры картинок постов.'
+
+    def handle(self, *args, **options):
+        post_ids = Post.objects.exclude(image='').filter(
+            Q(thumbnail='') | Q(renditions='')
+        ).values_list('pk', flat=True)
+        rendered = 0
+        for post_id in post_ids.iterator():
+            thumbnails.render(post_id)
+            rendered += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано постов: {rendered}')
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts import uploads
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько места занимают медиафайлы и картинки постов.'
+
+    def handle(self, *args, **options):
+        report = uploads.usage()
+        for directory, (files, size) in sorted(
+            report['directories'].items()
+        ):
+            self.stdout.write(
+                f'{directory or "."}/: файлов {files}, '
+                f'{filesizeformat(size)}'
+            )
+        saved = report['bytes_without_dedup'] - report['bytes']
+        self.stdout.write(
+            f'Картинки: постов {report["posts"]}, файлов '
+            f'{report["files"]}, {filesizeformat(report["bytes"])}; '
+            f'дедупликация сэкономила {filesizeformat(saved)}'
+        )
+        self.stdout.write(
+            f'Без постов: файлов {report["orphans"]}, '
+            f'{filesizeformat(report["orphan_bytes"])}; '
+            f'нет в хранилище: {report["missing"]}; '
+            f'загружены до хэширования: {report["legacy"]}'
+        )
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+CREATE = (
+    'CREATE VIRTUAL TABLE posts_search USING fts5('
+    "text, comments, tokenize = 'unicode61 remove_diacritics 2')"
+)
+FILL = (
+    'INSERT INTO posts_search (rowid, text, comments) '
+    'SELECT p.id, p.text, COALESCE(('
+    ' SELECT group_concat(c.text, char(10)) FROM posts_comment c'
+    ' WHERE c.post_id = p.id'
+    "), '') FROM posts_post p"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE)
+    schema_editor.execute(FILL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name='Дата подписки'
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(
+                fields=['author', '-created', '-id'],
+                name='follow_author_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(
+                fields=['user', '-created', '-id'],
+                name='follow_user_created_idx'
+            ),
+        ),
+    ]
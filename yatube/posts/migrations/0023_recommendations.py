@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0022_follow_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_authors', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Похожий автор')),
+            ],
+            options={
+                'verbose_name': 'Похожий автор',
+                'verbose_name_plural': 'Похожие авторы',
+            },
+        ),
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('mutual', models.PositiveIntegerField(default=0, verbose_name='Подписок пользователя, читающих автора')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='similarauthor',
+            index=models.Index(fields=['author', '-score'], name='similar_author_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='similarauthor',
+            constraint=models.UniqueConstraint(fields=('author', 'similar'), name='unique_similar_author'),
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(fields=['user', '-score'], name='recommendation_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recommendation',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_recommendation'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+CREATE = (
+    f'CREATE VIRTUAL TABLE posts_search USING fts5(text, {TOKENIZE})',
+    'CREATE VIRTUAL TABLE posts_search_comments USING fts5('
+    f'text, post UNINDEXED, {TOKENIZE})',
+)
+FILL = (
+    'INSERT INTO posts_search (rowid, text) SELECT id, text FROM posts_post',
+    'INSERT INTO posts_search_comments (rowid, text, post) '
+    'SELECT id, text, post_id FROM posts_comment',
+)
+OLD_CREATE = (
+    'CREATE VIRTUAL TABLE posts_search USING fts5('
+    f'text, comments, {TOKENIZE})'
+)
+OLD_FILL = (
+    'INSERT INTO posts_search (rowid, text, comments) '
+    'SELECT p.id, p.text, COALESCE(('
+    ' SELECT group_concat(c.text, char(10)) FROM posts_comment c'
+    ' WHERE c.post_id = p.id'
+    "), '') FROM posts_post p"
+)
+
+
+def split_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+    for sql in (*CREATE, *FILL):
+        schema_editor.execute(sql)
+
+
+def join_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS posts_search_comments')
+    schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+    schema_editor.execute(OLD_CREATE)
+    schema_editor.execute(OLD_FILL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_post_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_search_index, join_search_index),
+    ]
@@ -1,9 +1,21 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 
 User = get_user_model()
 IMAGE_UPLOAD_PATH = 'posts/'
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'image',
+    'thumbnail',
+    'renditions',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'group__title',
+)
 
 
 class Group(models.Model):
@@ -19,6 +31,17 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self, comments_count=False):
+        """Посты для карточек ленты за один запрос, без N+1."""
+        queryset = self.select_related('author', 'group').only(*FEED_FIELDS)
+        if comments_count:
+            queryset = queryset.annotate(
+                comments_count=models.Count('comments')
+            )
+        return queryset
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -48,9 +71,35 @@ class Post(models.Model):
         upload_to=IMAGE_UPLOAD_PATH,
         blank=True
     )
+    thumbnail = models.ImageField(
+        'Миниатюра',
+        blank=True,
+        editable=False
+    )
+    # JSON [[mime, ширина, путь], ...], см. posts.thumbnails.
+    renditions = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -79,6 +128,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -103,6 +158,10 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Блогер'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата подписки'
+    )
 
     class Meta:
         constraints = [
@@ -115,5 +174,279 @@ class Follow(models.Model):
                 name='user_not_author'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+            # Списки подписчиков и подписок по курсору (created, id).
+            models.Index(
+                fields=['author', '-created', '-id'],
+                name='follow_author_created_idx'
+            ),
+            models.Index(
+                fields=['user', '-created', '-id'],
+                name='follow_user_created_idx'
+            ),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок читателя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+
+    def __str__(self):
+        return f'Timeline {self.user_id}: {self.post_id}'
+
+
+class PostActivity(models.Model):
+    """Комментарии к посту за час — основа ленты «Популярное»."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Пост'
+    )
+    hour = models.DateTimeField(verbose_name='Час')
+    comments = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'hour'],
+                name='unique_post_activity'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='post_activity_hour_idx'),
+        ]
+        verbose_name = 'Активность поста'
+        verbose_name_plural = 'Активность постов'
+
+    def __str__(self):
+        return f'Activity {self.post_id}: {self.hour}'
+
+    @classmethod
+    def increment(cls, post_id, when, comments=1):
+        """Атомарно прибавляет комментарии к часу, в который попал when."""
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        rows = cls.objects.filter(post_id=post_id, hour=hour)
+        if rows.update(comments=models.F('comments') + comments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    post_id=post_id, hour=hour, comments=comments
+                )
+        except IntegrityError:
+            # Строку часа уже создал параллельный запрос.
+            rows.update(comments=models.F('comments') + comments)
+
+
+class SimilarAuthor(models.Model):
+    """Автор, которого часто читают вместе с данным (со-подписки)."""
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='similar_authors',
+        verbose_name='Автор'
+    )
+    similar = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий автор'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'similar'],
+                name='unique_similar_author'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['author', '-score'], name='similar_author_score_idx'
+            ),
+        ]
+        verbose_name = 'Похожий автор'
+        verbose_name_plural = 'Похожие авторы'
+
+    def __str__(self):
+        return f'Similar {self.author_id}: {self.similar_id}'
+
+
+class Recommendation(models.Model):
+    """Автор, на которого стоит подписаться пользователю."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+    mutual = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок пользователя, читающих автора'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_recommendation'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='recommendation_score_idx'
+            ),
+        ]
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+    def __str__(self):
+        return f'Recommendation {self.user_id}: {self.author_id}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя для профиля и поста."""
+
+    COUNTERS = (
+        'posts_count',
+        'followers_count',
+        'following_count',
+        'comments_count',
+    )
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'Stats {self.user_id}'
+
+    @classmethod
+    def increment(cls, user_id, field, delta=1):
+        """Атомарно меняет счётчик через F().
+
+        Отсутствующая строка пересчитывается целиком, но только при
+        увеличении: уменьшения приходят и из каскадного удаления
+        пользователя, когда создавать строку уже нельзя.
+        """
+        updated = cls.objects.filter(
+            user_id=user_id, **{f'{field}__gte': max(-delta, 0)}
+        ).update(**{field: models.F(field) + delta})
+        if not updated and delta > 0:
+            cls.rebuild([user_id])
+
+    @classmethod
+    def for_user(cls, user):
+        """Возвращает счётчики пользователя, создавая их при отсутствии."""
+        try:
+            return user.stats
+        except cls.DoesNotExist:
+            cls.rebuild([user.pk])
+            user.stats = cls.objects.get(pk=user.pk)
+            return user.stats
+
+    @classmethod
+    def rebuild(cls, user_ids):
+        """Пересчитывает счётчики пачки пользователей четырьмя запросами."""
+        user_ids = list(user_ids)
+        counters = {
+            'posts_count': Post.objects.filter(
+                author_id__in=user_ids
+            ).values_list('author_id'),
+            'followers_count': Follow.objects.filter(
+                author_id__in=user_ids
+            ).values_list('author_id'),
+            'following_count': Follow.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user_id'),
+            'comments_count': Comment.objects.filter(
+                author_id__in=user_ids
+            ).values_list('author_id'),
+        }
+        stats = {user_id: cls(user_id=user_id) for user_id in user_ids}
+        for field, queryset in counters.items():
+            for user_id, count in queryset.annotate(
+                count=models.Count('pk')
+            ).order_by():
+                setattr(stats[user_id], field, count)
+        try:
+            with transaction.atomic():
+                cls.objects.filter(user_id__in=user_ids).delete()
+                cls.objects.bulk_create(stats.values())
+        except IntegrityError:
+            # Строку уже создал параллельный запрос.
+            pass
+        return len(stats)
@@ -0,0 +1,194 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+DEFAULT_KEYS = ('pub_date', 'pk')
+CREATED_KEYS = ('created', 'pk')
+ELLIPSIS = '…'
+
+
+def encode_cursor(post, direction=NEXT, date_field='pub_date'):
+    """Упаковывает позицию записи (дата, id) в строку для URL.
+
+    post — модель или строка .values() с полями date_field и id.
+    """
+    if isinstance(post, dict):
+        pub_date, pk = post[date_field], post['id']
+    else:
+        pub_date, pk = getattr(post, date_field), post.pk
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, pub_date, id) или None для битого курсора."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def elided_page_range(paginator, number=1, on_each_side=None,
+                      on_ends=None):
+    """Номера страниц вокруг number и у краёв, пропуски — ELLIPSIS.
+
+    Длина не зависит от числа страниц: не больше
+    2 · (on_each_side + on_ends) + 3 элементов. То же, что
+    Paginator.get_elided_page_range из Django 3.2.
+    """
+    if on_each_side is None:
+        on_each_side = settings.PAGE_RANGE_ON_EACH_SIDE
+    if on_ends is None:
+        on_ends = settings.PAGE_RANGE_ON_ENDS
+    number = paginator.validate_number(number)
+    num_pages = paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from paginator.page_range
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+class WindowedPaginator(Paginator):
+    """Paginator с сокращённым списком номеров страниц."""
+
+    def get_elided_page_range(self, number=1, on_each_side=None,
+                              on_ends=None):
+        return elided_page_range(self, number, on_each_side, on_ends)
+
+
+class CursorPage(Page):
+    """Страница ленты, совместимая с Page, но без номера и OFFSET."""
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(
+            object_list, None if previous_cursor else 1, paginator
+        )
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.previous_cursor}:{self.next_cursor}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id): WHERE (pub_date, id) < cursor.
+
+    Стоимость страницы не зависит от её глубины. Общее количество
+    записей не считается, пока его не запросят; с count_limit оно
+    ограничено сверху и не сканирует всю таблицу. keys задаёт поля
+    (или аннотации) с теми же значениями, что pub_date и id поста, по
+    которым есть индекс; date_field — поле записи, из которого берётся
+    дата курсора (created для комментариев).
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, count_limit=None,
+                 keys=DEFAULT_KEYS, date_field='pub_date', **kwargs):
+        self.date_key, self.id_key = keys
+        self.date_field = date_field
+        super().__init__(
+            object_list.order_by(f'-{self.date_key}', f'-{self.id_key}'),
+            per_page,
+            **kwargs
+        )
+        self.count_limit = count_limit
+
+    @cached_property
+    def count(self):
+        if self.count_limit is None:
+            return super().count
+        return self.object_list[:self.count_limit].count()
+
+    @property
+    def count_is_capped(self):
+        return (
+            self.count_limit is not None and self.count >= self.count_limit
+        )
+
+    def encode(self, row, direction):
+        return encode_cursor(row, direction, self.date_field)
+
+    def get_cursor_page(self, cursor=None):
+        """Возвращает страницу после/до курсора; битый курсор — первая."""
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._page_after(self.object_list, has_previous=False)
+        direction, pub_date, pk = position
+        if direction == NEXT:
+            return self._page_after(
+                self.object_list.filter(self._beyond('lt', pub_date, pk)),
+                has_previous=True
+            )
+        return self._page_before(
+            self.object_list.filter(
+                self._beyond('gt', pub_date, pk)
+            ).order_by(self.date_key, self.id_key)
+        )
+
+    def _beyond(self, lookup, pub_date, pk):
+        return Q(**{f'{self.date_key}__{lookup}': pub_date}) | Q(**{
+            self.date_key: pub_date, f'{self.id_key}__{lookup}': pk
+        })
+
+    def _page_after(self, queryset, has_previous):
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode(rows[-1], NEXT) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode(rows[0], PREVIOUS)
+                if has_previous and rows else None
+            )
+        )
+
+    def _page_before(self, queryset):
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        if not has_previous:
+            return self._page_after(self.object_list, has_previous=False)
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self.encode(rows[-1], NEXT),
+            previous_cursor=self.encode(rows[0], PREVIOUS)
+        )
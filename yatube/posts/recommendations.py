@@ -0,0 +1,229 @@
+"""Рекомендации авторов по графу подписок («кого читать»).
+
+Оценка автора c для пользователя u складывается из двух частей:
+- друзья друзей: сколько авторов, которых читает u, подписаны на c
+  (mutual);
+- со-подписки: сходство c с авторами u. Сходство авторов a и c —
+  косинус по подписчикам: сколько из последних RECOMMENDATIONS_SAMPLE
+  подписчиков a читают c, с поправкой на популярность c.
+
+rebuild() — пакетный пересчёт: граф читается одним проходом по индексу
+подписок в массивы смежности по id пользователей, сходства и
+рекомендации считаются в памяти и пишутся пачками. refresh() обновляет
+одного читателя после его подписки: друзья друзей считаются агрегатом
+в БД, сходства берутся готовые из SimilarAuthor. Изменения подписок
+других пользователей попадают в рекомендации u при следующем rebuild().
+"""
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from . import feed_cache
+from .models import Follow, Recommendation, SimilarAuthor, User
+
+# Сколько id подставлять в один IN: лимит переменных SQLite.
+CHUNK_SIZE = 500
+SIMILAR_FIELDS = ('author', 'similar', 'score')
+RECOMMENDATION_FIELDS = ('user', 'author', 'score', 'mutual')
+
+
+class Graph:
+    """Граф подписок: массивы id подписок и подписчиков пользователей.
+
+    Подписчики в массиве идут от новых к старым.
+    """
+
+    def __init__(self):
+        self.following = defaultdict(lambda: array('q'))
+        self.followers = defaultdict(lambda: array('q'))
+
+    @classmethod
+    def load(cls, edges=None):
+        """Строит граф из пар (user_id, author_id); по умолчанию — из БД."""
+        if edges is None:
+            edges = Follow.objects.order_by(
+                'author', '-created', '-id'
+            ).values_list('user_id', 'author_id').iterator(chunk_size=10000)
+        graph = cls()
+        for user_id, author_id in edges:
+            graph.following[user_id].append(author_id)
+            graph.followers[author_id].append(user_id)
+        return graph
+
+    def similar(self, author_id):
+        """Самые похожие на автора авторы: [(id, сходство), ...]."""
+        sample = self.followers.get(author_id, ())[
+            :settings.RECOMMENDATIONS_SAMPLE
+        ]
+        counts = Counter()
+        for user_id in sample:
+            counts.update(self.following[user_id])
+        scores = {
+            other: count / math.sqrt(len(sample) * len(self.followers[other]))
+            for other, count in counts.items()
+        }
+        return [
+            (other, scores[other]) for other in top(
+                scores, settings.RECOMMENDATIONS_SIMILAR, [author_id]
+            )
+        ]
+
+    def mutual(self, user_id):
+        """Сколько подписок user_id читают каждого автора."""
+        counts = Counter()
+        for author_id in self.following.get(user_id, ()):
+            counts.update(self.following.get(author_id, ()))
+        return counts
+
+
+def top(scores, limit, exclude=()):
+    """limit ключей scores с наибольшими значениями, без exclude.
+
+    При равных значениях выше меньший id, чтобы пакетный пересчёт и
+    refresh() давали одинаковый порядок.
+    """
+    candidates = scores.keys() - set(exclude)
+    best = heapq.nlargest(limit, candidates, key=scores.__getitem__)
+    if best and len(best) == limit:
+        # Добираем равных последнему, чтобы отрезать их по id.
+        edge = scores[best[-1]]
+        best = [key for key in candidates if scores[key] >= edge]
+    best.sort(key=lambda key: (-scores[key], key))
+    return best[:limit]
+
+
+def rank(user_id, followed, mutual, similar):
+    """Лучшие RECOMMENDATIONS_TOP_K кандидатов: [(id, оценка, mutual), ...].
+
+    followed — авторы, на которых user_id уже подписан, mutual — Counter
+    друзей друзей, similar — пары (автор, сходство) от его подписок.
+    """
+    scores = defaultdict(float, mutual)
+    for author_id, score in similar:
+        scores[author_id] += score
+    return [
+        (author_id, scores[author_id], mutual.get(author_id, 0))
+        for author_id in top(
+            scores, settings.RECOMMENDATIONS_TOP_K, [user_id, *followed]
+        )
+    ]
+
+
+def _replace(model, fields, first_pk, last_pk, rows):
+    """Заменяет строки model пользователей first_pk..last_pk на rows.
+
+    Первое из fields — владелец строки. Строк миллионы, поэтому они
+    пишутся кортежами через executemany, без экземпляров моделей.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(field).column) for field in fields
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        model.objects.filter(**{
+            f'{fields[0]}__gte': first_pk, f'{fields[0]}__lte': last_pk
+        }).delete()
+        cursor.executemany(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))})',
+            rows
+        )
+
+
+def _user_batches(batch_size):
+    """Пачки (pk, username) всех пользователей по возрастанию pk."""
+    users = User.objects.order_by('pk').values_list('pk', 'username')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def rebuild(batch_size=1000, graph=None):
+    """Пересчитывает похожих авторов и рекомендации всех пользователей.
+
+    Возвращает число обработанных пользователей.
+    """
+    if graph is None:
+        graph = Graph.load()
+    similar = {}
+    for batch in _user_batches(batch_size):
+        rows = []
+        for pk, _ in batch:
+            similar[pk] = graph.similar(pk)
+            rows += [(pk, *pair) for pair in similar[pk]]
+        _replace(
+            SimilarAuthor, SIMILAR_FIELDS, batch[0][0], batch[-1][0], rows
+        )
+        # Похожие авторы показываются в кэшированном профиле.
+        feed_cache.bump(*(f'profile:{username}' for _, username in batch))
+    users = 0
+    for batch in _user_batches(batch_size):
+        rows = []
+        for pk, _ in batch:
+            followed = graph.following.get(pk, ())
+            rows += [(pk, *row) for row in rank(
+                pk, set(followed), graph.mutual(pk), (
+                    pair for author in followed for pair in similar[author]
+                )
+            )]
+        _replace(
+            Recommendation, RECOMMENDATION_FIELDS,
+            batch[0][0], batch[-1][0], rows
+        )
+        users += len(batch)
+    return users
+
+
+def refresh(user_id):
+    """Пересчитывает рекомендации одного пользователя после подписки."""
+    followed = list(Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    ))
+    mutual = Counter()
+    similar = []
+    for start in range(0, len(followed), CHUNK_SIZE):
+        chunk = followed[start:start + CHUNK_SIZE]
+        mutual.update(dict(Follow.objects.filter(
+            user_id__in=chunk
+        ).values_list('author_id').annotate(count=Count('pk')).order_by()))
+        similar += SimilarAuthor.objects.filter(
+            author_id__in=chunk
+        ).values_list('similar_id', 'score')
+    rows = rank(user_id, set(followed), mutual, similar)
+    _replace(
+        Recommendation, RECOMMENDATION_FIELDS, user_id, user_id,
+        [(user_id, *row) for row in rows]
+    )
+
+
+def suggestions(user, limit=None):
+    """Рекомендованные пользователю авторы; у каждого есть поле mutual."""
+    if not user.is_authenticated:
+        return []
+    authors = []
+    for row in Recommendation.objects.filter(user=user).select_related(
+        'author__stats'
+    ).order_by('-score')[:limit or settings.RECOMMENDATIONS_ON_PAGE]:
+        row.author.mutual = row.mutual
+        authors.append(row.author)
+    return authors
+
+
+def similar_authors(author, limit=None):
+    """Авторы, которых читают вместе с author, самые похожие первыми."""
+    return [
+        row.similar for row in SimilarAuthor.objects.filter(
+            author=author
+        ).select_related('similar__stats').order_by('-score')[
+            :limit or settings.RECOMMENDATIONS_ON_PAGE
+        ]
+    ]
@@ -0,0 +1,331 @@
+"""Полнотекстовый поиск по постам и комментариям к ним.
+
+Бэкенд задаётся POSTS_SEARCH_BACKEND. SQLiteFTSBackend хранит тексты
+в виртуальных таблицах FTS5: posts_search — документ на пост (rowid —
+id поста), posts_search_comments — документ на комментарий (rowid — id
+комментария, post — id поста). Запись комментария меняет одну строку
+индекса, сколько бы комментариев ни было у поста. Пост находится, если
+все слова запроса есть в его тексте или в одном из комментариев;
+выдача ранжируется по лучшему bm25 среди его документов. SimpleBackend
+ищет через LIKE и годится для других СУБД и как база для сравнения.
+Индекс обновляется сигналами сохранения и удаления постов и
+комментариев (см. signals.py).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+WORDS = re.compile(r'\w+')
+MARK_START = '\x02'
+MARK_END = '\x03'
+# Сколько id подставлять в один IN: лимит переменных SQLite.
+CHUNK_SIZE = 500
+
+_backends = {}
+
+
+def terms(query):
+    return WORDS.findall(query.lower())
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и превращает маркеры совпадений в <mark>."""
+    return mark_safe(
+        escape(snippet).replace(MARK_START, '<mark>').replace(
+            MARK_END, '</mark>'
+        )
+    )
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+class SearchResults:
+    """Выдача для Paginator: count() и срезы — отдельные запросы к индексу.
+
+    Элементы среза — посты для карточек ленты с полем search_snippet.
+    """
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+
+    @cached_property
+    def _count(self):
+        return self.backend.count(self.query)
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        offset = item.start or 0
+        hits = self.backend.hits(self.query, offset, item.stop - offset)
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in hits])
+        results = []
+        for pk, snippet in hits:
+            if pk in posts:
+                posts[pk].search_snippet = snippet
+                results.append(posts[pk])
+        return results
+
+
+class BaseSearchBackend:
+    def update(self, post_ids, comments=True):
+        """Переиндексирует посты, с comments — и все их комментарии."""
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def update_comments(self, comment_ids):
+        raise NotImplementedError
+
+    def remove_comments(self, comment_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def hits(self, query, offset, limit):
+        """[(id поста, фрагмент с подсветкой)] в порядке релевантности."""
+        raise NotImplementedError
+
+    def search(self, query):
+        return SearchResults(self, query)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    TABLE = 'posts_search'
+    COMMENTS_TABLE = 'posts_search_comments'
+    # Совпадение в тексте поста весит вдвое больше, чем в комментарии.
+    POST_WEIGHT = 2.0
+    SNIPPET_TOKENS = 24
+    INSERT = (
+        'INSERT INTO posts_search (rowid, text) '
+        'SELECT id, text FROM posts_post'
+    )
+    INSERT_COMMENTS = (
+        'INSERT INTO posts_search_comments (rowid, text, post) '
+        'SELECT id, text, post_id FROM posts_comment'
+    )
+    # Комментарии постов в индексе ищутся по rowid через posts_comment:
+    # колонка post в FTS5 не проиндексирована.
+    POST_COMMENTS = 'SELECT id FROM posts_comment WHERE post_id IN ({})'
+    # Лучший документ каждого поста: kind (0 — пост, 1 — комментарий)
+    # и document берутся из строки с минимальным score — так SQLite
+    # считает голые колонки рядом с min().
+    MATCHES = (
+        'SELECT post, kind, document, min(score) AS best FROM ('
+        ' SELECT rowid AS post, 0 AS kind, rowid AS document,'
+        ' bm25(posts_search) * %s AS score'
+        ' FROM posts_search WHERE posts_search MATCH %s'
+        ' UNION ALL'
+        ' SELECT post, 1, rowid, bm25(posts_search_comments)'
+        ' FROM posts_search_comments WHERE posts_search_comments MATCH %s'
+        ') GROUP BY post'
+    )
+
+    def match(self, query):
+        """Выражение MATCH: все слова запроса, последнее — как префикс."""
+        words = [f'"{word}"' for word in terms(query)]
+        if words:
+            words[-1] += '*'
+        return ' '.join(words)
+
+    def _execute(self, cursor, sql, ids):
+        for chunk in _chunks(ids):
+            cursor.execute(
+                sql.format(', '.join(['%s'] * len(chunk))), chunk
+            )
+
+    def update(self, post_ids, comments=True):
+        with connection.cursor() as cursor:
+            self._execute(
+                cursor, f'DELETE FROM {self.TABLE} WHERE rowid IN ({{}})',
+                post_ids
+            )
+            self._execute(
+                cursor, f'{self.INSERT} WHERE id IN ({{}})', post_ids
+            )
+            if not comments:
+                return
+            self._execute(
+                cursor, f'DELETE FROM {self.COMMENTS_TABLE} '
+                f'WHERE rowid IN ({self.POST_COMMENTS})', post_ids
+            )
+            self._execute(
+                cursor, f'{self.INSERT_COMMENTS} WHERE post_id IN ({{}})',
+                post_ids
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            self._execute(
+                cursor, f'DELETE FROM {self.TABLE} WHERE rowid IN ({{}})',
+                post_ids
+            )
+            self._execute(
+                cursor, f'DELETE FROM {self.COMMENTS_TABLE} '
+                f'WHERE rowid IN ({self.POST_COMMENTS})', post_ids
+            )
+
+    def update_comments(self, comment_ids):
+        self.remove_comments(comment_ids)
+        with connection.cursor() as cursor:
+            self._execute(
+                cursor, f'{self.INSERT_COMMENTS} WHERE id IN ({{}})',
+                comment_ids
+            )
+
+    def remove_comments(self, comment_ids):
+        with connection.cursor() as cursor:
+            self._execute(
+                cursor,
+                f'DELETE FROM {self.COMMENTS_TABLE} WHERE rowid IN ({{}})',
+                comment_ids
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.TABLE}')
+            cursor.execute(f'DELETE FROM {self.COMMENTS_TABLE}')
+            cursor.execute(self.INSERT)
+            cursor.execute(self.INSERT_COMMENTS)
+
+    def count(self, query):
+        match = self.match(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT rowid FROM {self.TABLE} '
+                f'WHERE {self.TABLE} MATCH %s UNION SELECT post '
+                f'FROM {self.COMMENTS_TABLE} '
+                f'WHERE {self.COMMENTS_TABLE} MATCH %s)', [match, match]
+            )
+            return cursor.fetchone()[0]
+
+    def _snippets(self, cursor, table, match, ids):
+        """Фрагменты документов ids таблицы table: {rowid: фрагмент}."""
+        if not ids:
+            return {}
+        cursor.execute(
+            f'SELECT rowid, snippet({table}, 0, %s, %s, %s, %s) '
+            f'FROM {table} WHERE {table} MATCH %s '
+            f'AND rowid IN ({", ".join(["%s"] * len(ids))})',
+            [MARK_START, MARK_END, '…', self.SNIPPET_TOKENS, match, *ids]
+        )
+        return {rowid: highlight(snippet) for rowid, snippet in cursor}
+
+    def hits(self, query, offset, limit):
+        match = self.match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{self.MATCHES} ORDER BY best, post LIMIT %s OFFSET %s',
+                [self.POST_WEIGHT, match, match, limit, offset]
+            )
+            rows = cursor.fetchall()
+            # Фрагменты — только для страницы, по запросу на таблицу.
+            snippets = [
+                self._snippets(cursor, table, match, [
+                    document for _, kind, document, _ in rows
+                    if kind == number
+                ])
+                for number, table in enumerate(
+                    (self.TABLE, self.COMMENTS_TABLE)
+                )
+            ]
+        return [
+            (post, snippets[kind][document])
+            for post, kind, document, _ in rows
+        ]
+
+
+class SimpleBackend(BaseSearchBackend):
+    """LIKE по постам и комментариям: без индекса, новые посты выше."""
+
+    SNIPPET_CHARS = 160
+
+    def update(self, post_ids, comments=True):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def update_comments(self, comment_ids):
+        pass
+
+    def remove_comments(self, comment_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def queryset(self, query):
+        words = terms(query)
+        if not words:
+            return Post.objects.none()
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(text__icontains=word) | Q(comments__text__icontains=word)
+            )
+        return Post.objects.filter(condition).distinct().order_by(
+            '-pub_date', '-pk'
+        )
+
+    def count(self, query):
+        return self.queryset(query).count()
+
+    def snippet(self, text, words):
+        lower = text.lower()
+        found = [lower.find(word) for word in words if word in lower]
+        start = max(min(found, default=0) - self.SNIPPET_CHARS // 4, 0)
+        fragment = text[start:start + self.SNIPPET_CHARS]
+        pattern = re.compile(
+            '|'.join(re.escape(word) for word in words), re.IGNORECASE
+        )
+        fragment = pattern.sub(
+            lambda match: MARK_START + match.group() + MARK_END, fragment
+        )
+        return highlight(
+            ('…' if start else '') + fragment
+            + ('…' if start + self.SNIPPET_CHARS < len(text) else '')
+        )
+
+    def hits(self, query, offset, limit):
+        words = terms(query)
+        return [
+            (pk, self.snippet(text, words))
+            for pk, text in self.queryset(query).values_list(
+                'pk', 'text'
+            )[offset:offset + limit]
+        ]
+
+
+def get_backend():
+    path = settings.POSTS_SEARCH_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -0,0 +1,159 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import feed_cache, recommendations, search, timeline, trending
+from .models import (
+    Comment, Follow, Group, Post, PostActivity, User, UserStats
+)
+
+
+def profiles(*user_ids):
+    return [
+        f'profile:{username}' for username in User.objects.filter(
+            pk__in=user_ids
+        ).values_list('username', flat=True)
+    ]
+
+
+def groups(*group_ids):
+    return [
+        f'group:{slug}' for slug in Group.objects.filter(
+            pk__in=[group_id for group_id in group_ids if group_id]
+        ).values_list('slug', flat=True)
+    ]
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    instance._old_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    feed_cache.bump(
+        'index',
+        f'post:{instance.pk}',
+        *profiles(instance.author_id),
+        *groups(instance.group_id, getattr(instance, '_old_group_id', None))
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    feed_cache.bump(
+        f'post:{instance.post_id}', *profiles(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    feed_cache.bump(*profiles(instance.user_id, instance.author_id))
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    instance._old_slug = Group.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    feed_cache.bump('index', f'group:{instance.slug}')
+    if getattr(instance, '_old_slug', None):
+        feed_cache.bump(f'group:{instance._old_slug}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    feed_cache.bump('index', f'profile:{instance.username}')
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        UserStats.increment(instance.author_id, 'posts_count')
+        timeline.schedule_fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    UserStats.increment(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_trending_changed(sender, instance, created, update_fields=None,
+                          **kwargs):
+    if created or (
+        update_fields and not trending.CARD_FIELDS & set(update_fields)
+    ):
+        return
+    trending.patch(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_trending_deleted(sender, instance, **kwargs):
+    trending.patch(instance.pk, deleted=True)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        UserStats.increment(instance.author_id, 'comments_count')
+        PostActivity.increment(instance.post_id, instance.created)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    UserStats.increment(instance.author_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        UserStats.increment(instance.author_id, 'followers_count')
+        UserStats.increment(instance.user_id, 'following_count')
+        timeline.backfill(instance.user_id, instance.author_id)
+        recommendations.refresh(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    UserStats.increment(instance.author_id, 'followers_count', -1)
+    UserStats.increment(instance.user_id, 'following_count', -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    recommendations.refresh(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'text' not in update_fields:
+        return
+    # Комментарии индексируются отдельно, см. comment_indexed.
+    search.get_backend().update([instance.pk], comments=False)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    search.get_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'text' not in update_fields:
+        return
+    search.get_backend().update_comments([instance.pk])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, **kwargs):
+    search.get_backend().remove_comments([instance.pk])
@@ -0,0 +1,31 @@
+from django import template
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, name):
+        self.nodelist = nodelist
+        self.name = name
+
+    def render(self, context):
+        feed = context.get('feed_cache')
+        if feed is None:
+            return self.nodelist.render(context)
+        return feed.fragment(
+            self.name, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def feedcache(parser, token):
+    """{% feedcache 'name' %} ... {% endfeedcache %}"""
+    try:
+        tag_name, name = token.split_contents()
+    except ValueError:
+        raise template.TemplateSyntaxError(
+            f'{token.contents.split()[0]} ожидает имя фрагмента'
+        )
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, name.strip('\'"'))
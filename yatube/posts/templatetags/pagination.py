@@ -0,0 +1,11 @@
+from django import template
+
+from ..paginators import elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_range(page_obj):
+    """{% page_range page_obj as pages %}: номера страниц с пропусками."""
+    return list(elided_page_range(page_obj.paginator, page_obj.number))
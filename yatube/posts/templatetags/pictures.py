@@ -0,0 +1,41 @@
+from django import template
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+def _srcset(storage, variants):
+    return ', '.join(
+        f'{storage.url(name)} {width}w' for width, name in variants
+    )
+
+
+@register.simple_tag
+def post_picture(post, sizes=None, css_class='card-img my-2'):
+    """{% post_picture post %}: картинка поста с srcset и <picture>.
+
+    Формат самой картинки — в srcset у <img>, остальные (WebP) — в
+    <source> перед ним; браузер выбирает первый знакомый ему формат и
+    самую маленькую подходящую ширину. Без вариантов — прежняя
+    миниатюра карточки.
+    """
+    groups = thumbnails.renditions(post)
+    if not groups:
+        return format_html(
+            '<img class="{}" src="{}">', css_class, post.thumbnail.url
+        )
+    storage = post.thumbnail.storage
+    sizes = sizes or settings.POST_PICTURE_SIZES
+    *sources, (mime, variants) = groups.items()
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'loading="lazy" alt=""></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+            (source_mime, _srcset(storage, source_variants), sizes)
+            for source_mime, source_variants in sources
+        )),
+        css_class, post.thumbnail.url, _srcset(storage, variants), sizes
+    )
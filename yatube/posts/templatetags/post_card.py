@@ -0,0 +1,42 @@
+from django import template
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/marking_post.html'
+
+
+class PostCardNode(template.Node):
+    """Карточка поста из уже разобранного шаблона.
+
+    В отличие от {% include %}, шаблон карточки ищется один раз за
+    рендер страницы, а на каждый пост рендерится только его nodelist —
+    без отдельного состояния рендера и привязки шаблона к контексту.
+    """
+
+    def __init__(self, options):
+        self.options = options
+
+    def render(self, context):
+        card = context.render_context.get(self)
+        if card is None:
+            card = context.template.engine.get_template(CARD_TEMPLATE)
+            context.render_context[self] = card
+        if not self.options:
+            return card.nodelist.render(context)
+        with context.push(**{
+            name: value.resolve(context)
+            for name, value in self.options.items()
+        }):
+            return card.nodelist.render(context)
+
+
+@register.tag
+def post_card(parser, token):
+    """{% post_card [hide_groups=True] %} — карточка поста post."""
+    bits = token.split_contents()
+    options = template.base.token_kwargs(bits[1:], parser)
+    if len(options) != len(bits) - 1:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает только именованные параметры'
+        )
+    return PostCardNode(options)
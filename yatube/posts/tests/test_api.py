@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'TestUser'
+USERNAME_2 = 'TestUser_2'
+SLUG = 'test-slug'
+
+API_INDEX_URL = reverse('posts:api_index')
+API_GROUP_URL = reverse('posts:api_group_list', args=[SLUG])
+API_PROFILE_URL = reverse('posts:api_profile', args=[USERNAME])
+API_FOLLOW_URL = reverse('posts:api_follow_index')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(settings.POSTS_ON_PAGE + 3):
+            cls.post = Post.objects.create(
+                text=f'Тестовый текст {i}', author=cls.author, group=cls.group
+            )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        cls.API_POST_URL = reverse('posts:api_post_detail', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отдают посты новыми сверху и курсор следующей страницы."""
+        CASES = [
+            (API_INDEX_URL, self.guest_client),
+            (API_GROUP_URL, self.guest_client),
+            (API_PROFILE_URL, self.guest_client),
+            (API_FOLLOW_URL, self.reader_client),
+        ]
+        for url, client in CASES:
+            with self.subTest(url=url):
+                data = client.get(url).json()
+                self.assertEqual(
+                    len(data['results']), settings.POSTS_ON_PAGE
+                )
+                self.assertEqual(data['results'][0], {
+                    'id': self.post.pk,
+                    'text': self.post.text,
+                    'pub_date': data['results'][0]['pub_date'],
+                    'author': USERNAME,
+                    'group': SLUG,
+                    'image': None,
+                })
+                self.assertIsNone(data['previous'])
+                second = client.get(data['next']).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+
+    def test_post_detail_with_comments(self):
+        data = self.guest_client.get(self.API_POST_URL).json()
+        self.assertEqual(data['id'], self.post.pk)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий']
+        )
+
+    def test_not_found_and_unauthorized(self):
+        CASES = [
+            (reverse('posts:api_group_list', args=['missing']), 404),
+            (reverse('posts:api_profile', args=['missing']), 404),
+            (reverse('posts:api_post_detail', args=[0]), 404),
+            (API_FOLLOW_URL, 401),
+        ]
+        for url, status in CASES:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, status
+                )
+
+    def test_unchanged_poll_returns_304(self):
+        """Повторный опрос с ETag без изменений — 304 без запроса ленты."""
+        CASES = [
+            (API_INDEX_URL, self.guest_client),
+            (API_GROUP_URL, self.guest_client),
+            (API_PROFILE_URL, self.guest_client),
+            (self.API_POST_URL, self.guest_client),
+        ]
+        for url, client in CASES:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                repeated = client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.content, b'')
+                since = client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(since.status_code, 304)
+        response = self.reader_client.get(API_FOLLOW_URL)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.reader_client.get(
+            API_FOLLOW_URL, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, правка или комментарий меняют ETag."""
+        def etags():
+            return [
+                self.guest_client.get(url)['ETag']
+                for url in (API_INDEX_URL, API_GROUP_URL, API_PROFILE_URL)
+            ] + [self.reader_client.get(API_FOLLOW_URL)['ETag']]
+
+        before = etags()
+        Post.objects.create(text='Новый', author=self.author, group=self.group)
+        after_create = etags()
+        for old, new in zip(before, after_create):
+            self.assertNotEqual(old, new)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        for old, new in zip(after_create, etags()):
+            self.assertNotEqual(old, new)
+        etag = self.guest_client.get(self.API_POST_URL)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Ещё комментарий'
+        )
+        self.assertNotEqual(
+            self.guest_client.get(self.API_POST_URL)['ETag'], etag
+        )
+
+    def test_serialized_without_models(self):
+        """Лента сериализуется из .values() одним запросом."""
+        self.guest_client.get(API_INDEX_URL)
+        with self.assertNumQueries(1):
+            self.guest_client.get(API_INDEX_URL)
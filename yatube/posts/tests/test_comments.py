@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post, User
+
+USERNAME = 'TestUser'
+COMMENTS_ON_PAGE = 3
+COMMENTS = 2 * COMMENTS_ON_PAGE + 1
+
+
+@override_settings(COMMENTS_ON_PAGE=COMMENTS_ON_PAGE)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author
+        )
+        cls.quiet_post = Post.objects.create(
+            text='Без обсуждения', author=cls.author
+        )
+        now = timezone.now()
+        for i in range(COMMENTS):
+            comment = Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {i}'
+            )
+            # У двух последних одна дата: порядок между ними решает id.
+            Comment.objects.filter(pk=comment.pk).update(
+                created=now - timedelta(minutes=min(i, COMMENTS - 2))
+            )
+        Comment.objects.create(
+            post=cls.quiet_post, author=cls.author, text='Единственный'
+        )
+        cls.expected = list(Comment.objects.filter(post=cls.post).order_by(
+            '-created', '-pk'
+        ).values_list('text', flat=True))
+        cls.POST_DETAIL_URL = reverse('posts:post_detail', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_comments_are_loaded_by_pages(self):
+        """Первая страница — в посте, остальные — фрагментами по курсору."""
+        response = self.guest_client.get(self.POST_DETAIL_URL)
+        page = response.context['comments_page']
+        texts = [comment.text for comment in page]
+        self.assertEqual(len(texts), COMMENTS_ON_PAGE)
+        self.assertContains(response, 'data-fragment')
+        while page.has_next():
+            response = self.guest_client.get(
+                reverse('posts:post_comments', args=[self.post.pk]),
+                {'cursor': page.next_cursor}
+            )
+            self.assertNotContains(response, '<html')
+            page = response.context['comments_page']
+            texts += [comment.text for comment in page]
+        self.assertEqual(texts, self.expected)
+        self.assertNotContains(response, 'data-fragment')
+
+    def test_post_detail_accepts_comments_cursor(self):
+        """Без JS «Показать ещё» ведёт на страницу поста с курсором."""
+        first = self.guest_client.get(self.POST_DETAIL_URL)
+        response = self.guest_client.get(
+            self.POST_DETAIL_URL,
+            {'comments': first.context['comments_page'].next_cursor}
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments_page']],
+            self.expected[COMMENTS_ON_PAGE:2 * COMMENTS_ON_PAGE]
+        )
+
+    def test_post_detail_does_not_depend_on_comment_count(self):
+        """Запросы и размер страницы поста не растут с числом комментариев."""
+        counts = []
+        for post in (self.quiet_post, self.post):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.guest_client.get(
+                    reverse('posts:post_detail', args=[post.pk])
+                )
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_api_comments_pages(self):
+        data = self.guest_client.get(
+            reverse('posts:api_post_detail', args=[self.post.pk])
+        ).json()
+        texts = [comment['text'] for comment in data['comments']]
+        url = data['comments_next']
+        while url:
+            page = self.guest_client.get(url).json()
+            texts += [comment['text'] for comment in page['results']]
+            url = page['next']
+        self.assertEqual(texts, self.expected)
+        self.assertIsNone(self.guest_client.get(reverse(
+            'posts:api_post_detail', args=[self.quiet_post.pk]
+        )).json()['comments_next'])
+
+    def test_missing_post_comments_not_found(self):
+        for name in ('posts:post_comments', 'posts:api_post_comments'):
+            with self.subTest(name=name):
+                self.assertEqual(self.guest_client.get(
+                    reverse(name, args=[0])
+                ).status_code, 404)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+USERNAME = 'TestUser'
+SLUG = 'test-slug'
+
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+
+
+class ConditionalPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author, group=cls.group
+        )
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', args=[cls.post.pk]
+        )
+        cls.URLS = [
+            INDEX_URL, GROUP_LIST_URL, PROFILE_URL, cls.POST_DETAIL_URL
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_anonymous_pages_are_public(self):
+        """Анонимные страницы кэшируемы прокси и отдают 304 без запросов."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn(
+                    f'max-age={settings.FEED_MAX_AGE}',
+                    response['Cache-Control']
+                )
+                self.assertIn('Last-Modified', response)
+                with self.assertNumQueries(0):
+                    repeated = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertIn('public', repeated['Cache-Control'])
+
+    def test_head_requests(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.guest_client.head(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+
+    def test_authenticated_pages_are_private(self):
+        """Страницы вошедшего пользователя private и со своим ETag."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.author_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertNotEqual(
+                    response['ETag'], self.guest_client.get(url)['ETag']
+                )
+                self.assertEqual(self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code, 304)
+
+    def test_new_login_invalidates_pages(self):
+        """После нового входа страница не отдаётся 304 со старым токеном."""
+        response = self.author_client.get(self.POST_DETAIL_URL)
+        self.assertNotIn('Last-Modified', response)
+        self.author_client.logout()
+        self.author_client.force_login(self.author)
+        self.assertEqual(self.author_client.get(
+            self.POST_DETAIL_URL, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 200)
+
+    def test_changes_invalidate_pages(self):
+        """Новый комментарий и правка поста меняют ETag страниц."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.URLS}
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.assertNotEqual(
+            self.guest_client.get(self.POST_DETAIL_URL)['ETag'],
+            etags[self.POST_DETAIL_URL]
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый текст')
+
+    def test_empty_group_is_not_missing(self):
+        Group.objects.create(title='Пустая', slug='empty')
+        self.assertEqual(self.guest_client.get(
+            reverse('posts:group_list', args=['empty'])
+        ).status_code, 200)
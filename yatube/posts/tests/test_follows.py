@@ -0,0 +1,223 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryAssertionsMixin
+
+from .. import timeline
+from ..follows import FollowingLookup, follow_many
+from ..models import Follow, Post, TimelineEntry, User, UserStats
+
+READER = 'Reader'
+AUTHORS = [f'author_{i}' for i in range(5)]
+
+BULK_URL = reverse('posts:api_follow_bulk')
+
+
+def stats(username):
+    return UserStats.objects.get(user__username=username)
+
+
+class FollowManyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=READER)
+        cls.authors = [
+            User.objects.create_user(username=name) for name in AUTHORS
+        ]
+        for author in cls.authors:
+            Post.objects.create(text='Тестовый текст', author=author)
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def test_follow_many(self):
+        """Новые подписки, уже существующие и неизвестные имена."""
+        result = follow_many(
+            self.reader, [*AUTHORS, AUTHORS[1], READER, 'missing']
+        )
+        self.assertEqual(result, {
+            'followed': AUTHORS[1:],
+            'already': AUTHORS[:1],
+            'missing': [READER, 'missing'],
+        })
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), len(AUTHORS)
+        )
+        self.assertEqual(stats(READER).following_count, len(AUTHORS))
+        for name in AUTHORS:
+            with self.subTest(author=name):
+                self.assertEqual(stats(name).followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(),
+            len(AUTHORS)
+        )
+        self.assertEqual(
+            follow_many(self.reader, AUTHORS)['already'], AUTHORS
+        )
+        self.assertEqual(stats(AUTHORS[1]).followers_count, 1)
+
+    def test_concurrent_follow_is_counted_once(self):
+        """Подписка, вставленная параллельно, не удваивает счётчик."""
+        bulk_create = Follow.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            Follow.objects.create(user=self.reader, author=self.authors[1])
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(
+            Follow.objects, 'bulk_create', racing_bulk_create
+        ):
+            follow_many(self.reader, AUTHORS[1:3])
+        self.assertEqual(stats(AUTHORS[1]).followers_count, 1)
+        self.assertEqual(stats(AUTHORS[2]).followers_count, 1)
+        self.assertEqual(stats(READER).following_count, 3)
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=10)
+    def test_backfill_large_author(self):
+        """Сразу — последние посты автора, вся история — в фоне."""
+        Post.objects.bulk_create(
+            Post(text='Тестовый текст', author=self.authors[1])
+            for _ in range(600)
+        )
+        UserStats.rebuild([self.authors[1].pk])
+        follow_many(self.reader, AUTHORS[1:2])
+        entries = TimelineEntry.objects.filter(
+            user=self.reader, post__author=self.authors[1]
+        )
+        self.assertEqual(
+            set(entries.values_list('post', flat=True)),
+            set(Post.objects.filter(author=self.authors[1]).order_by(
+                '-pub_date', '-pk'
+            ).values_list('pk', flat=True)[:10])
+        )
+        timeline._backfill_history(self.reader.pk, [self.authors[1].pk])
+        self.assertEqual(entries.count(), 601)
+
+    def test_following_lookup(self):
+        """Ответ для пачки авторов — одним запросом и кэшируется."""
+        lookup = FollowingLookup(self.reader)
+        with self.assertNumQueries(1):
+            lookup.prefetch(author.pk for author in self.authors)
+        with self.assertNumQueries(0):
+            answers = [lookup(author.pk) for author in self.authors]
+        self.assertEqual(answers, [True] + [False] * (len(AUTHORS) - 1))
+
+    def test_bulk_api(self):
+        client = Client()
+        self.assertEqual(client.post(
+            BULK_URL, {'usernames': AUTHORS}, content_type='application/json'
+        ).status_code, 401)
+        client.force_login(self.reader)
+        CASES = [
+            ('{"usernames": "author_1"}', 400),
+            ('{"users": []}', 400),
+            ('не json', 400),
+            (json.dumps({'usernames': AUTHORS[:2]}), 200),
+        ]
+        for body, status in CASES:
+            with self.subTest(body=body):
+                self.assertEqual(client.post(
+                    BULK_URL, body, content_type='application/json'
+                ).status_code, status)
+        self.assertEqual(client.post(
+            BULK_URL, {'usernames': AUTHORS[2:4]}
+        ).json()['followed'], AUTHORS[2:4])
+        self.assertEqual(client.get(BULK_URL).status_code, 405)
+        with override_settings(FOLLOW_BULK_LIMIT=1):
+            self.assertEqual(client.post(
+                BULK_URL, {'usernames': AUTHORS},
+                content_type='application/json'
+            ).status_code, 400)
+
+    def test_profile_follow(self):
+        client = Client()
+        client.force_login(self.reader)
+        CASES = [
+            (AUTHORS[2], 302),
+            (READER, 302),
+            ('missing', 404),
+        ]
+        for username, status in CASES:
+            with self.subTest(username=username):
+                self.assertEqual(client.get(reverse(
+                    'posts:profile_follow', args=[username]
+                )).status_code, status)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author__username=AUTHORS[2]
+        ).exists())
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=self.reader
+        ).exists())
+        self.assertTrue(client.get(reverse(
+            'posts:profile', args=[AUTHORS[2]]
+        )).context['following'])
+
+
+@override_settings(POSTS_ON_PAGE=2)
+class FollowListsTests(QueryAssertionsMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=READER)
+        cls.authors = [
+            User.objects.create_user(username=name) for name in AUTHORS
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+            Follow.objects.create(user=author, author=cls.reader)
+        Follow.objects.create(user=cls.authors[1], author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.authors[1])
+
+    def collect(self, name, username):
+        response = self.client.get(reverse(name, args=[username]))
+        people = [person.username for person in response.context['people']]
+        following = set(response.context['following_ids'])
+        page = response.context['page_obj']
+        while page.has_next():
+            response = self.client.get(
+                reverse(name, args=[username]), {'cursor': page.next_cursor}
+            )
+            people += [p.username for p in response.context['people']]
+            following |= response.context['following_ids']
+            page = response.context['page_obj']
+        return people, following
+
+    def test_lists_are_paginated(self):
+        """Списки — новые подписки первыми, все страницы без повторов."""
+        CASES = [
+            ('posts:followers', READER, AUTHORS[::-1]),
+            ('posts:following', READER, AUTHORS[::-1]),
+            ('posts:followers', AUTHORS[0], [AUTHORS[1], READER]),
+        ]
+        for name, username, expected in CASES:
+            with self.subTest(name=name, username=username):
+                people, _ = self.collect(name, username)
+                self.assertEqual(people, expected)
+
+    def test_lists_mark_followed_people(self):
+        _, following = self.collect('posts:followers', READER)
+        self.assertEqual(following, {self.authors[0].pk})
+        self.assertContains(
+            self.client.get(reverse('posts:followers', args=[AUTHORS[0]])),
+            'Отписаться'
+        )
+
+    def test_lists_have_no_n_plus_one(self):
+        for name in ('posts:followers', 'posts:following'):
+            with self.subTest(name=name):
+                with self.assertNoNPlusOne():
+                    self.client.get(reverse(name, args=[READER]))
+
+    def test_missing_user(self):
+        for name in ('posts:followers', 'posts:following'):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(
+                    reverse(name, args=['missing'])
+                ).status_code, 404)
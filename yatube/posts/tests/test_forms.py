@@ -7,7 +7,8 @@ from django.conf import settings
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from ..models import Group, Post, User, Comment, IMAGE_UPLOAD_PATH
+from ..models import Group, Post, User, Comment
+from ..uploads import HASHED_NAME
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -95,10 +96,29 @@ class FormsTests(TestCase):
         post = posts.pop()
         self.assertEqual(form_data['text'], post.text)
         self.assertEqual(form_data['group'], post.group.pk)
-        self.assertEqual(f'{IMAGE_UPLOAD_PATH}{image}', post.image)
+        self.assertRegex(post.image.name, HASHED_NAME)
         self.assertEqual(post.author, self.user)
         self.assertRedirects(response, PROFILE_URL)
 
+    @override_settings(POST_THUMBNAIL_ASYNC=False)
+    def test_create_post_renders_thumbnail(self):
+        """Миниатюра строится при сохранении, а не при показе ленты."""
+        image = SimpleUploadedFile(
+            name='small_4.gif',
+            content=GIF,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            POST_CREATE_URL,
+            data={'text': 'Пост с картинкой', 'image': image}
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.thumbnail)
+        self.assertTrue(post.thumbnail.storage.exists(post.thumbnail.name))
+        self.assertContains(
+            self.authorized_client.get(PROFILE_URL), post.thumbnail.url
+        )
+
     def test_create_post_show_correct_fields(self):
         response = self.authorized_client.get(POST_CREATE_URL)
         form_fields = {
@@ -132,7 +152,7 @@ class FormsTests(TestCase):
         self.assertEqual(form_data['text'], post.text)
         self.assertEqual(form_data['group'], post.group.pk)
         self.assertEqual(post.author, self.post.author)
-        self.assertEqual(f'{IMAGE_UPLOAD_PATH}{image.name}', post.image.name)
+        self.assertRegex(post.image.name, HASHED_NAME)
 
     def test_comment_add(self):
         """Авторизованный пользователь создает комментарий"""
@@ -0,0 +1,76 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'TestUser'
+USERNAME_2 = 'TestUser_2'
+SLUG = 'test-slug'
+
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text='Тестовый текст', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Комментарий'
+            )
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', args=[cls.post.pk]
+        )
+
+    def query_plans(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and 'ORDER BY' in sql:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                    yield sql, ' | '.join(row[-1] for row in cursor)
+
+    def test_feeds_are_sorted_by_index(self):
+        """Сортировка лент и комментариев идёт по индексу, без temp B-tree."""
+        CASES = [
+            (INDEX_URL, self.guest_client),
+            (INDEX_URL + '?cursor=', self.guest_client),
+            (GROUP_LIST_URL, self.guest_client),
+            (GROUP_LIST_URL + '?cursor=', self.guest_client),
+            (PROFILE_URL, self.guest_client),
+            (PROFILE_URL + '?cursor=', self.guest_client),
+            (self.POST_DETAIL_URL, self.guest_client),
+            (FOLLOW_URL, self.reader_client),
+            (FOLLOW_URL + '?cursor=', self.reader_client),
+        ]
+        for url, client in CASES:
+            for sql, plan in self.query_plans(client, url):
+                with self.subTest(url=url, sql=sql):
+                    self.assertIn('INDEX', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
@@ -1,8 +1,12 @@
+import io
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import Comment, Follow, Group, Post, User, UserStats
 
 USERNAME = 'TestUser'
+USERNAME_2 = 'TestUser_2'
 
 
 class PostModelTest(TestCase):
@@ -57,3 +61,43 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     Post._meta.get_field(field).help_text, expected_value)
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.user_2 = User.objects.create_user(username=USERNAME_2)
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(user=user.username, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.user, text='Текст')
+        Comment.objects.create(post=post, author=self.user_2, text='Текст')
+        Follow.objects.create(user=self.user_2, author=self.user)
+        self.assertStats(self.user, posts_count=1, followers_count=1)
+        self.assertStats(
+            self.user_2, comments_count=1, following_count=1
+        )
+        Follow.objects.all().delete()
+        post.delete()
+        self.assertStats(self.user, posts_count=0, followers_count=0)
+        self.assertStats(
+            self.user_2, comments_count=0, following_count=0
+        )
+
+    def test_rebuild_stats_command(self):
+        """Команда rebuild_stats исправляет разошедшиеся счётчики."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Текст') for i in range(3)
+        )
+        UserStats.objects.create(user=self.user, posts_count=7)
+        call_command('rebuild_stats', batch_size=1, stdout=io.StringIO())
+        self.assertStats(self.user, posts_count=3)
+        self.assertStats(self.user_2, posts_count=0)
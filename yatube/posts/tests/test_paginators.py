@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..paginators import (
+    ELLIPSIS, CursorPage, CursorPaginator, WindowedPaginator, decode_cursor
+)
+
+USERNAME = 'TestUser'
+INDEX_URL = reverse('posts:index')
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+NUMBER_FOR_TEST = 3
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {i}', author=cls.user)
+            for i in range(settings.POSTS_ON_PAGE * 2 + NUMBER_FOR_TEST)
+        )
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def test_pages_follow_each_other(self):
+        """Курсоры проходят ленту без пропусков и повторов."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_ON_PAGE
+        )
+        page = paginator.get_cursor_page()
+        posts = list(page)
+        while page.has_next():
+            page = paginator.get_cursor_page(page.next_cursor)
+            posts += list(page)
+        self.assertEqual(posts, self.expected)
+        self.assertEqual(len(page), NUMBER_FOR_TEST)
+        previous = paginator.get_cursor_page(page.previous_cursor)
+        self.assertEqual(
+            list(previous),
+            self.expected[
+                settings.POSTS_ON_PAGE:settings.POSTS_ON_PAGE * 2
+            ]
+        )
+
+    def test_page_query_has_no_offset_and_count(self):
+        """Страница по курсору — один запрос без OFFSET и COUNT."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_ON_PAGE
+        )
+        cursor = paginator.get_cursor_page().next_cursor
+        with self.assertNumQueries(1) as context:
+            paginator.get_cursor_page(cursor)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT', sql)
+
+    def test_count_limit(self):
+        """count_limit ограничивает подсчёт записей."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_ON_PAGE, count_limit=5
+        )
+        self.assertEqual(paginator.count, 5)
+        self.assertTrue(paginator.count_is_capped)
+
+    def test_broken_cursor_returns_first_page(self):
+        self.assertIsNone(decode_cursor('не-курсор'))
+        response = self.guest_client.get(PROFILE_URL + '?cursor=abc')
+        page = response.context['page_obj']
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(
+            list(page), self.expected[:settings.POSTS_ON_PAGE]
+        )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_pagination_setting(self):
+        response = self.guest_client.get(PROFILE_URL)
+        page = response.context['page_obj']
+        self.assertIsInstance(page, CursorPage)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+        response = self.guest_client.get(PROFILE_URL + '?page=2')
+        self.assertNotIsInstance(response.context['page_obj'], CursorPage)
+
+
+@override_settings(PAGE_RANGE_ON_EACH_SIDE=2, PAGE_RANGE_ON_ENDS=1)
+class WindowedPaginatorTests(SimpleTestCase):
+    def test_elided_page_range(self):
+        paginator = WindowedPaginator(range(100), 1)
+        CASES = [
+            (1, [1, 2, 3, ELLIPSIS, 100]),
+            (5, [1, 2, 3, 4, 5, 6, 7, ELLIPSIS, 100]),
+            (50, [1, ELLIPSIS, 48, 49, 50, 51, 52, ELLIPSIS, 100]),
+            (100, [1, ELLIPSIS, 98, 99, 100]),
+        ]
+        for number, expected in CASES:
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected
+                )
+        self.assertEqual(
+            list(WindowedPaginator(range(5), 1).get_elided_page_range(3)),
+            [1, 2, 3, 4, 5]
+        )
+
+    def test_rendered_size_does_not_grow(self):
+        """Пагинатор страницы одинаков для тысячи и миллиарда постов."""
+        sizes = set()
+        for count in (10 ** 3, 10 ** 6, 10 ** 9):
+            with self.subTest(count=count):
+                paginator = WindowedPaginator(
+                    range(count), settings.POSTS_ON_PAGE
+                )
+                page = paginator.page(paginator.num_pages // 2)
+                html = render_to_string(
+                    'posts/includes/paginator.html', {'page_obj': page}
+                )
+                self.assertEqual(html.count('<li'), 13)
+                self.assertEqual(html.count(ELLIPSIS), 2)
+                # Разница — только в числе цифр номеров страниц.
+                sizes.add(len(html) - len(''.join(
+                    char for char in html if char.isdigit()
+                )))
+        self.assertEqual(len(sizes), 1)
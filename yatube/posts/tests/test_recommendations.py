@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import recommendations
+from ..follows import follow_many
+from ..models import Follow, Recommendation, SimilarAuthor, User
+
+READER = 'reader'
+# Кто на кого подписан: читатель читает a и b, a и b читают c,
+# b читает d, а x и y вместе с читателем читают a и ещё e.
+EDGES = {
+    READER: ['a', 'b'],
+    'a': ['c'],
+    'b': ['c', 'd'],
+    'x': ['a', 'e'],
+    'y': ['a', 'e'],
+}
+
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+def recommended(username):
+    return list(Recommendation.objects.filter(
+        user__username=username
+    ).order_by('-score').values_list('author__username', 'mutual'))
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in [READER, 'a', 'b', 'c', 'd', 'e', 'x', 'y']
+        }
+        for name, authors in EDGES.items():
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[name], author=cls.users[author]
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.users[READER])
+
+    def test_rebuild(self):
+        """Друзья друзей выше со-подписок, свои подписки не советуются."""
+        self.assertEqual(recommendations.rebuild(), len(self.users))
+        self.assertEqual(
+            recommended(READER), [('c', 2), ('d', 1), ('e', 0)]
+        )
+        self.assertEqual(recommended('x'), [('c', 1), ('b', 0)])
+        self.assertEqual(list(SimilarAuthor.objects.filter(
+            author=self.users['a']
+        ).order_by('-score').values_list('similar__username', flat=True)),
+            ['e', 'b'])
+
+    def test_rebuild_from_edges(self):
+        """Граф можно передать парами id без чтения из БД."""
+        graph = recommendations.Graph.load(
+            (self.users[name].pk, self.users[author].pk)
+            for name, authors in EDGES.items() for author in authors
+        )
+        recommendations.rebuild(batch_size=3, graph=graph)
+        self.assertEqual(
+            recommended(READER), [('c', 2), ('d', 1), ('e', 0)]
+        )
+
+    def test_refresh_on_follow(self):
+        """Подписка пересчитывает рекомендации так же, как rebuild."""
+        recommendations.rebuild()
+        Follow.objects.create(
+            user=self.users[READER], author=self.users['c']
+        )
+        self.assertNotIn('c', dict(recommended(READER)))
+        refreshed = recommended(READER)
+        recommendations.rebuild()
+        self.assertEqual(refreshed, recommended(READER))
+        follow_many(self.users['x'], ['b'])
+        self.assertEqual(recommended('x'), [('c', 2), ('d', 1)])
+
+    def test_refresh_on_unfollow(self):
+        """Отписка возвращает автора в рекомендации без rebuild."""
+        recommendations.rebuild()
+        Follow.objects.filter(
+            user=self.users[READER], author=self.users['b']
+        ).delete()
+        self.assertIn('b', dict(recommended(READER)))
+
+    def test_deleted_user_leaves_no_recommendations(self):
+        recommendations.rebuild()
+        User.objects.filter(username='e').delete()
+        connection.check_constraints()
+        self.assertNotIn('e', dict(recommended('x')))
+
+    def test_suggestions_on_pages(self):
+        recommendations.rebuild()
+        response = self.reader_client.get(FOLLOW_URL)
+        self.assertEqual(
+            [author.username for author in response.context['suggested']],
+            ['c', 'd', 'e']
+        )
+        self.assertContains(
+            response, reverse('posts:profile_follow', args=['c'])
+        )
+        response = Client().get(reverse('posts:profile', args=['a']))
+        self.assertEqual(
+            [author.username for author in response.context[
+                'similar_authors'
+            ]],
+            ['e', 'b']
+        )
+        self.reader_client.get(reverse('posts:profile_follow', args=['c']))
+        self.assertNotIn('c', [
+            author.username for author in self.reader_client.get(
+                FOLLOW_URL
+            ).context['suggested']
+        ])
@@ -0,0 +1,121 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post, User
+from ..uploads import walk
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+USERNAME = 'TestUser'
+WIDTHS = (320, 480, 640, 960, 1440)
+
+
+def jpeg(width=1200, height=600):
+    file = io.BytesIO()
+    Image.new('RGB', (width, height), 'blue').save(file, 'JPEG')
+    return ContentFile(file.getvalue(), name='photo.jpg')
+
+
+def render(post):
+    return Template(
+        '{% load pictures %}{% post_picture post %}'
+    ).render(Context({'post': post}))
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_THUMBNAIL_ASYNC=False,
+    POST_RENDITION_WIDTHS=WIDTHS,
+    POST_RENDITION_FORMATS=('WEBP', None),
+)
+class RenditionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.webp = 'WEBP' in thumbnails.rendition_formats('photo.jpg')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, image):
+        post = Post.objects.create(
+            text='Тестовый текст', author=self.user, image=image
+        )
+        thumbnails.render(post.pk)
+        return Post.objects.get(pk=post.pk)
+
+    def test_renditions_are_built_once(self):
+        post = self.create(jpeg())
+        groups = thumbnails.renditions(post)
+        expected = ['image/webp', 'image/jpeg'] if self.webp else [
+            'image/jpeg'
+        ]
+        self.assertEqual(list(groups), expected)
+        for mime, variants in groups.items():
+            with self.subTest(mime=mime):
+                # 1440 шире картинки — не строится.
+                self.assertEqual(
+                    [width for width, _ in variants], [320, 480, 640, 960]
+                )
+                for width, name in variants:
+                    with Image.open(post.image.storage.path(name)) as image:
+                        self.assertEqual(image.width, width)
+        files = set(walk(post.image.storage))
+        same = Post.objects.create(
+            text='Та же картинка', author=self.user, image=post.image.name
+        )
+        thumbnails.render(same.pk)
+        self.assertEqual(set(walk(post.image.storage)), files)
+        self.assertEqual(
+            Post.objects.get(pk=same.pk).renditions, post.renditions
+        )
+
+    @override_settings(POST_RENDITION_FORMATS=('PNG', None))
+    def test_picture_markup(self):
+        """Дополнительный формат — в <source>, формат картинки — в <img>."""
+        post = self.create(jpeg(400, 200))
+        html = render(post)
+        self.assertTrue(html.startswith('<picture><source type="image/png"'))
+        self.assertIn(f'src="{post.thumbnail.url}"', html)
+        self.assertEqual(
+            html.count(f'sizes="{settings.POST_PICTURE_SIZES}"'), 2
+        )
+        groups = thumbnails.renditions(post)
+        self.assertEqual(list(groups), ['image/png', 'image/jpeg'])
+        for mime, variants in groups.items():
+            with self.subTest(mime=mime):
+                self.assertEqual([width for width, _ in variants], [320])
+                srcset = ', '.join(
+                    f'{post.image.storage.url(name)} {width}w'
+                    for width, name in variants
+                )
+                self.assertIn(f'srcset="{srcset}"', html)
+
+    def test_small_image_keeps_own_width(self):
+        """Картинка уже всех ширин — один вариант без увеличения."""
+        post = self.create(jpeg(200, 100))
+        groups = thumbnails.renditions(post)
+        self.assertTrue(groups)
+        for mime, variants in groups.items():
+            with self.subTest(mime=mime):
+                self.assertEqual([width for width, _ in variants], [200])
+
+    def test_post_without_renditions(self):
+        """Посты, обработанные до вариантов, показывают миниатюру."""
+        post = self.create(jpeg())
+        post.renditions = ''
+        self.assertEqual(
+            render(post),
+            f'<img class="card-img my-2" src="{post.thumbnail.url}">'
+        )
@@ -14,7 +14,11 @@ CASES = [
     ('post_edit', f'/posts/{POST_ID}/edit/', [POST_ID]),
     ('post_create', '/create/', []),
     ('follow_index', '/follow/', []),
+    ('trending', '/trending/', []),
+    ('search', '/search/', []),
     ('add_comment', f'/posts/{POST_ID}/comment/', [POST_ID]),
+    ('followers', f'/profile/{USERNAME}/followers/', [USERNAME]),
+    ('following', f'/profile/{USERNAME}/following/', [USERNAME]),
     ('profile_follow', f'/profile/{USERNAME}/follow/', [USERNAME]),
     ('profile_unfollow', f'/profile/{USERNAME}/unfollow/', [USERNAME])
 ]
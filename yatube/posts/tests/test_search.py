@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import get_backend
+
+SEARCH_URL = reverse('posts:search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.in_text = Post.objects.create(
+            text='Рецепт борща <b>по-домашнему</b>', author=cls.author
+        )
+        cls.in_comment = Post.objects.create(
+            text='Что приготовить на ужин?', author=cls.author
+        )
+        Comment.objects.create(
+            post=cls.in_comment, author=cls.author, text='Сварите борщ!'
+        )
+        cls.other = Post.objects.create(
+            text='Совсем другой пост', author=cls.author
+        )
+
+    def search(self, query, **params):
+        response = self.guest_client.get(SEARCH_URL, {'q': query, **params})
+        return response, list(response.context['page_obj'])
+
+    def test_finds_posts_and_comments(self):
+        """Находит посты по тексту и комментариям, текст поста выше."""
+        response, posts = self.search('борщ')
+        self.assertEqual(posts, [self.in_text, self.in_comment])
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response, posts = self.search('рецепт')
+        self.assertIn('<mark>Рецепт</mark>', posts[0].search_snippet)
+        self.assertIn('&lt;b&gt;', posts[0].search_snippet)
+        self.assertContains(response, '<mark>Рецепт</mark>')
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении постов и комментариев."""
+        self.other.text = 'Теперь тоже про борщ'
+        self.other.save()
+        self.assertEqual(len(self.search('борщ')[1]), 3)
+        Comment.objects.filter(post=self.in_comment).delete()
+        self.other.delete()
+        self.assertEqual(self.search('борщ')[1], [self.in_text])
+
+    def test_comments_are_indexed_one_by_one(self):
+        """Комментарий — своя строка индекса; фрагмент берётся из него."""
+        comments = [
+            Comment.objects.create(
+                post=self.other, author=self.author, text=f'Пусто {i}'
+            )
+            for i in range(20)
+        ]
+        comments[5].text = 'Лучше борщ со сметаной'
+        with CaptureQueriesContext(connection) as queries:
+            comments[5].save()
+        self.assertEqual([
+            query['sql'] for query in queries
+            if 'posts_search' in query['sql']
+        ], [
+            'DELETE FROM posts_search_comments '
+            f'WHERE rowid IN ({comments[5].pk})',
+            'INSERT INTO posts_search_comments (rowid, text, post) '
+            'SELECT id, text, post_id FROM posts_comment '
+            f'WHERE id IN ({comments[5].pk})',
+        ])
+        posts = self.search('сметаной')[1]
+        self.assertEqual(posts, [self.other])
+        self.assertIn('<mark>сметаной</mark>', posts[0].search_snippet)
+        comments[5].delete()
+        self.assertEqual(self.search('сметаной')[1], [])
+
+    def test_prefix_and_empty_queries(self):
+        self.assertEqual(self.search('приготов')[1], [self.in_comment])
+        response = self.guest_client.get(SEARCH_URL, {'q': '  "*( '})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(self.guest_client.get(
+            SEARCH_URL
+        ).context['page_obj'])
+
+    def test_pages_keep_query(self):
+        for i in range(12):
+            Post.objects.create(text=f'Борщ номер {i}', author=self.author)
+        response, posts = self.search('борщ', page=2)
+        self.assertEqual(len(posts), 4)
+        self.assertContains(
+            response, 'href="?q=%D0%B1%D0%BE%D1%80%D1%89&amp;page=1"'
+        )
+
+    @override_settings(POSTS_SEARCH_BACKEND='posts.search.SimpleBackend')
+    def test_simple_backend(self):
+        get_backend().rebuild()
+        response, posts = self.search('ужин')
+        self.assertEqual(posts, [self.in_comment])
+        self.assertIn('<mark>ужин</mark>', posts[0].search_snippet)
@@ -0,0 +1,137 @@
+import os
+import re
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import recommendations
+from ..models import Follow, Group, Post, User
+
+USERNAME = 'TestUser'
+FOLLOWER = 'Follower'
+SLUG = 'test-slug'
+
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[USERNAME])
+FOLLOW_URL = reverse('posts:follow_index')
+SEARCH_URL = reverse('posts:search') + '?q=текст'
+CREATE_URL = reverse('posts:post_create')
+FOLLOWERS_URL = reverse('posts:followers', args=[USERNAME])
+TRENDING_URL = reverse('posts:trending')
+
+CARD_LOOP = (
+    '{{% for post in posts %}}{}'
+    '{{% if not forloop.last %}}<hr>{{% endif %}}{{% endfor %}}'
+)
+JINJA2_TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(settings.TEMPLATE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+            'context_processors': settings.TEMPLATE_CONTEXT_PROCESSORS,
+        },
+    },
+    *settings.TEMPLATES,
+]
+
+
+def compact(html):
+    return re.sub(r'\s+', '', html)
+
+
+class TemplatesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        for index in range(3):
+            Post.objects.create(
+                text=f'Тестовый текст {index}\nвторая строка',
+                author=cls.author,
+                group=cls.group if index % 2 else None,
+            )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        # Рекомендации: follower'у — other, на профиле автора — other.
+        other = User.objects.create_user(username='Other')
+        reader = User.objects.create_user(username='Reader')
+        for user, author in [
+            (cls.author, other), (reader, cls.author), (reader, other)
+        ]:
+            Follow.objects.create(user=user, author=author)
+        recommendations.rebuild()
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', args=[Post.objects.first().pk]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_post_card_matches_include(self):
+        """{% post_card %} даёт ту же разметку, что include карточки."""
+        posts = list(Post.objects.for_feed())
+        for options in ['', ' hide_groups=True']:
+            with self.subTest(options=options):
+                expected = Template(CARD_LOOP.format(
+                    "{% include 'posts/includes/marking_post.html'"
+                    + (' with' + options if options else '') + ' %}'
+                )).render(Context({'posts': posts}))
+                actual = Template(
+                    '{% load post_card %}'
+                    + CARD_LOOP.format('{% post_card' + options + ' %}')
+                ).render(Context({'posts': posts}))
+                self.assertEqual(compact(actual), compact(expected))
+
+    @skipUnless(find_spec('jinja2'), 'jinja2 не установлен')
+    def test_jinja2_pages_match_django(self):
+        """Шаблоны Jinja2 рендерят те же страницы, что шаблоны Django."""
+        cases = [
+            (self.guest_client, INDEX_URL),
+            (self.guest_client, GROUP_LIST_URL),
+            (self.guest_client, PROFILE_URL),
+            (self.guest_client, self.POST_DETAIL_URL),
+            (self.guest_client, SEARCH_URL),
+            (self.follower_client, INDEX_URL),
+            (self.follower_client, PROFILE_URL),
+            (self.follower_client, FOLLOW_URL),
+            (self.guest_client, FOLLOWERS_URL),
+            (self.follower_client, FOLLOWERS_URL),
+            (self.guest_client, TRENDING_URL),
+            (self.follower_client, TRENDING_URL),
+        ]
+        for client, url in cases:
+            with self.subTest(url=url):
+                cache.clear()
+                expected = client.get(url).content.decode()
+                self.assertNotIn('{%', expected)
+                cache.clear()
+                with override_settings(TEMPLATES=JINJA2_TEMPLATES):
+                    actual = client.get(url).content.decode()
+                self.assertEqual(compact(actual), compact(expected))
+
+    @skipUnless(find_spec('jinja2'), 'jinja2 не установлен')
+    def test_jinja2_forms(self):
+        """Формы в шаблонах Jinja2 содержат поля и csrf-токен."""
+        self.follower_client.force_login(self.author)
+        for url in [CREATE_URL, self.POST_DETAIL_URL]:
+            with self.subTest(url=url):
+                with override_settings(TEMPLATES=JINJA2_TEMPLATES):
+                    response = self.follower_client.get(url)
+                self.assertContains(response, 'csrfmiddlewaretoken')
+                self.assertContains(response, 'name="text"')
+                self.assertContains(response, 'form-control')
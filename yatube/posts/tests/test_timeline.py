@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Follow, Post, TimelineEntry, User
+from ..timeline import timeline_posts
+
+USERNAME = 'TestUser'
+USERNAME_2 = 'TestUser_2'
+USERNAME_3 = 'TestUser_3'
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старый пост'
+        )
+
+    def test_follow_backfills_and_post_fans_out(self):
+        """Подписка заполняет ленту, новый пост в неё раскладывается."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list('post', flat=True)),
+            {self.old_post.pk, post.pk}
+        )
+        self.assertEqual(
+            list(timeline_posts(self.reader)), [post, self.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_INLINE=0)
+    def test_large_fan_out_is_deferred(self):
+        """Раскладка для многих подписчиков ждёт коммита, а не идёт сразу."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+    def test_unfollow_prunes_timeline(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertFalse(timeline_posts(self.reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты популярных авторов не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(
+            list(timeline_posts(self.reader)), [post, self.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_late_commit_is_pulled(self):
+        """Пост, закоммиченный после подтяжки с ранним pub_date, виден."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        list(timeline_posts(self.reader))
+        post = Post.objects.create(author=self.author, text='Поздний пост')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(seconds=30)
+        )
+        TimelineEntry.objects.filter(post=post).delete()
+        self.assertIn(post, list(timeline_posts(self.reader)))
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_second_celebrity_history_is_backfilled(self):
+        """Старые посты второго популярного автора попадают в ленту."""
+        author = User.objects.create_user(username=USERNAME_3)
+        post = Post.objects.create(author=author, text='Пост до подписки')
+        Follow.objects.create(user=self.reader, author=self.author)
+        list(timeline_posts(self.reader))
+        Follow.objects.create(user=self.reader, author=author)
+        self.assertEqual(
+            list(timeline_posts(self.reader)), [post, self.old_post]
+        )
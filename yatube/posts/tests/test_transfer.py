@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+from ..transfer import Importer
+
+USERNAME = 'TestUser'
+USERNAME_2 = 'TestUser_2'
+SLUG = 'test-slug'
+
+
+class TransferCommandsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.reader = User.objects.create_user(username=USERNAME_2)
+        self.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        self.pub_date = timezone.now() - timedelta(days=30)
+        for i in range(3):
+            post = Post.objects.create(
+                text=f'Тестовый текст {i}',
+                author=self.author,
+                group=self.group if i else None
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {i}'
+            )
+        Post.objects.update(pub_date=self.pub_date)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def snapshot(self):
+        return {
+            'posts': sorted(Post.objects.values_list(
+                'text', 'pub_date', 'author__username', 'group__slug'
+            )),
+            'comments': sorted(Comment.objects.values_list(
+                'post__text', 'author__username', 'text'
+            )),
+            'follows': sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            'groups': sorted(Group.objects.values_list(
+                'slug', 'title', 'description'
+            )),
+        }
+
+    def round_trip(self, output, *options):
+        expected = self.snapshot()
+        call_command(
+            'export_posts', output, *options, stderr=StringIO()
+        )
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        call_command(
+            'import_posts', output, '--batch-size=2', stdout=StringIO()
+        )
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_jsonl_round_trip(self):
+        """JSONL-выгрузка загружается обратно без потерь."""
+        self.round_trip(os.path.join(self.directory, 'posts.jsonl'))
+
+    def test_csv_round_trip(self):
+        """Выгрузка в каталог CSV загружается обратно без потерь."""
+        self.round_trip(
+            os.path.join(self.directory, 'csv'), '--format=csv'
+        )
+
+    def test_import_rebuilds_derived_data(self):
+        """После загрузки пересчитаны счётчики и ленты подписок."""
+        self.round_trip(os.path.join(self.directory, 'posts.jsonl'))
+        author = User.objects.get(username=USERNAME)
+        reader = User.objects.get(username=USERNAME_2)
+        self.assertEqual(author.stats.posts_count, 3)
+        self.assertEqual(author.stats.followers_count, 1)
+        self.assertEqual(reader.stats.comments_count, 3)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), 3
+        )
+        self.assertFalse(reader.has_usable_password())
+
+    def test_import_into_existing_data(self):
+        """Загрузка переиспользует существующих авторов и группы."""
+        output = os.path.join(self.directory, 'posts.jsonl')
+        call_command('export_posts', output, stderr=StringIO())
+        call_command(
+            'import_posts', output, '--defer-indexes', stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertEqual(Comment.objects.count(), 6)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(
+            Post.objects.create(text='Новый', author=self.author).pk,
+            Post.objects.order_by('pk').last().pk
+        )
+
+    def test_import_alongside_live_writes(self):
+        """Строки, записанные сайтом во время загрузки, не теряют id."""
+        importer = Importer(batch_size=2)
+        importer.add('post', {
+            'id': 1, 'text': 'Загруженный', 'author': 'imported',
+            'pub_date': self.pub_date.isoformat(), 'group': SLUG,
+        })
+        live = Post.objects.create(text='Живой', author=self.author)
+        importer.add('comment', {
+            'post': 1, 'author': USERNAME_2, 'text': 'К загруженному',
+            'created': self.pub_date.isoformat(),
+        })
+        importer.add('follow', {'user': USERNAME_2, 'author': 'imported'})
+        importer.finish()
+        self.assertEqual(Post.objects.get(pk=live.pk).text, 'Живой')
+        post = Post.objects.get(text='Загруженный')
+        self.assertEqual(post.author.username, 'imported')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(
+            list(post.comments.values_list('text', flat=True)),
+            ['К загруженному']
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Group, Post, PostActivity, User
+
+TRENDING_URL = reverse('posts:trending')
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.reader = User.objects.create_user(username='reader')
+        for index in range(20):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan_{index}'),
+                author=cls.popular
+            )
+        cls.group = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Описание'
+        )
+        cls.hot_group = Group.objects.create(
+            title='Горячая группа', slug='hot', description='Описание'
+        )
+        cls.quiet = Post.objects.create(
+            text='Тихий пост', author=cls.author, group=cls.group
+        )
+        cls.famous = Post.objects.create(
+            text='Пост популярного автора', author=cls.popular
+        )
+        cls.hot = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.author, group=cls.hot_group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_counted_by_hour(self):
+        for _ in range(2):
+            Comment.objects.create(
+                post=self.hot, author=self.reader, text='Комментарий'
+            )
+        activity = PostActivity.objects.get(post=self.hot)
+        self.assertEqual(activity.comments, 2)
+        self.assertEqual(activity.hour.minute, 0)
+
+    def test_ranking(self):
+        """Обсуждение и подписчики автора поднимают пост, время — топит."""
+        now = timezone.now()
+        PostActivity.increment(self.hot.pk, now, 3)
+        posts = trending.rebuild(now)['posts']
+        self.assertEqual(posts, [self.hot, self.famous, self.quiet])
+        # Через сутки свежий комментарий к тихому посту весит больше.
+        later = now + timedelta(days=1)
+        PostActivity.increment(self.quiet.pk, later, 1)
+        self.assertEqual(
+            trending.rebuild(later)['posts'][0], self.quiet
+        )
+
+    def test_window(self):
+        """Посты и активность старше окна не учитываются и удаляются."""
+        old = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=self.quiet.pk).update(pub_date=old)
+        PostActivity.increment(self.famous.pk, old, 10)
+        posts = trending.rebuild()['posts']
+        self.assertNotIn(self.quiet, posts)
+        self.assertFalse(
+            PostActivity.objects.filter(post=self.famous).exists()
+        )
+
+    def test_groups(self):
+        PostActivity.increment(self.hot.pk, timezone.now(), 5)
+        self.assertEqual(
+            trending.rebuild()['groups'], [self.hot_group, self.group]
+        )
+
+    def test_page_reads_cache_only(self):
+        """Страница без запросов к БД, пока «Популярное» в кэше."""
+        call_command('rebuild_trending', stdout=StringIO())
+        client = Client()
+        with self.assertNumQueries(0):
+            response = client.get(TRENDING_URL)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.famous, self.hot, self.quiet]
+        )
+        self.assertContains(
+            response, reverse('posts:group_list', args=[self.hot_group.slug])
+        )
+
+    def test_changed_post_forgotten(self):
+        trending.rebuild()
+        Post.objects.get(pk=self.hot.pk).delete()
+        self.assertNotIn(self.hot, trending.get()['posts'])
+
+    def test_changed_post_patched_in_place(self):
+        """Правка поста подменяет карточку в ключе без пересчёта."""
+        built = trending.rebuild()['built']
+        post = Post.objects.get(pk=self.hot.pk)
+        post.thumbnail = 'cache/hot.jpg'
+        post.save(update_fields=['thumbnail'])
+        with self.assertNumQueries(0):
+            current = trending.get()
+        self.assertEqual(current['built'], built)
+        self.assertEqual(
+            [post.pk for post in current['posts']],
+            [self.famous.pk, self.hot.pk, self.quiet.pk]
+        )
+        self.assertEqual(current['posts'][1].thumbnail, 'cache/hot.jpg')
+
+    def test_cold_cache_rebuilt_once(self):
+        """Пока один запрос пересчитывает, остальные не ждут."""
+        cache.add(trending.LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(trending.get()['posts'], [])
+        cache.delete(trending.LOCK_KEY)
+        self.assertEqual(len(trending.get()['posts']), 3)
+        self.assertIsNone(cache.get(trending.LOCK_KEY))
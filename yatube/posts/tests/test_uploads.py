@@ -0,0 +1,110 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..forms import PostForm
+from ..models import Post, User
+from ..uploads import HASHED_NAME, usage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+USERNAME = 'TestUser'
+POST_CREATE_URL = reverse('posts:post_create')
+# Тег EXIF Orientation: 6 — повернуть на 90° по часовой.
+ORIENTATION = 0x0112
+GPS_INFO = 0x8825
+
+
+def upload(name='photo.jpg', size=(300, 100), image_format='JPEG',
+           mode='RGB', exif=None):
+    file = io.BytesIO()
+    image = Image.new(mode, size, 'red')
+    options = {'exif': exif} if exif is not None else {}
+    image.save(file, image_format, **options)
+    return SimpleUploadedFile(
+        name, file.getvalue(), content_type=f'image/{image_format.lower()}'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_UPLOAD_MAX_SIZE=100)
+class UploadsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, text, image):
+        form = PostForm(data={'text': text}, files={'image': image})
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.user
+        post.save()
+        return post
+
+    def test_image_is_reencoded_without_exif(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[GPS_INFO] = {1: 'N'}
+        post = self.create('Фото', upload(exif=exif))
+        self.assertRegex(post.image.name, HASHED_NAME)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            # Повёрнута по EXIF и уменьшена до 100 по длинной стороне.
+            self.assertEqual(image.size, (33, 100))
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_transparent_image_stays_png(self):
+        post = self.create(
+            'Прозрачная', upload('logo.png', image_format='PNG', mode='RGBA')
+        )
+        self.assertTrue(post.image.name.endswith('.png'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.size, (100, 33))
+
+    def test_same_image_is_stored_once(self):
+        """Одинаковые картинки разных постов — один файл."""
+        for text in ('Первый', 'Второй'):
+            self.client.post(POST_CREATE_URL, data={
+                'text': text, 'image': upload('copy.jpg')
+            })
+        first, second = Post.objects.filter(text__in=('Первый', 'Второй'))
+        self.assertEqual(first.image.name, second.image.name)
+        report = usage()
+        self.assertEqual(report['posts'], 2)
+        self.assertEqual(report['files'], 1)
+        self.assertEqual(
+            report['bytes_without_dedup'], 2 * report['bytes']
+        )
+        output = io.StringIO()
+        call_command('storage_report', stdout=output)
+        self.assertIn('Картинки: постов 2, файлов 1', output.getvalue())
+
+    def test_invalid_uploads(self):
+        CASES = [
+            ('Файл больше', upload(), {'IMAGE_UPLOAD_MAX_BYTES': 10}),
+            ('Загрузите правильное изображение', SimpleUploadedFile(
+                'broken.jpg', b'not an image', content_type='image/jpeg'
+            ), {}),
+        ]
+        for error, image, options in CASES:
+            with self.subTest(error=error), override_settings(**options):
+                form = PostForm(data={'text': 'Текст'}, files={'image': image})
+                self.assertFalse(form.is_valid())
+                self.assertIn(error, form.errors['image'][0])
@@ -13,6 +13,7 @@ INDEX_URL = reverse('posts:index')
 PROFILE_URL = reverse('posts:profile', args=[USERNAME_2])
 POST_CREATE_URL = reverse('posts:post_create')
 FOLLOW_URL = reverse('posts:follow_index')
+SEARCH_URL = reverse('posts:search')
 GROUP_LIST_URL = reverse('posts:group_list', args=[SLUG])
 PROFILE_FOLLOW = reverse('posts:profile_follow', args=[USERNAME_2])
 PROFILE_UNFOLLOW = reverse('posts:profile_unfollow', args=[USERNAME_2])
@@ -50,6 +51,7 @@ class PostURLTests(TestCase):
         """Код запроса соответствупет ожидаемому."""
         CASES = [
             (INDEX_URL, self.guest, 200),
+            (SEARCH_URL, self.guest, 200),
             (GROUP_LIST_URL, self.author, 200),
             (PROFILE_URL, self.author, 200),
             (self.POST_DETAIL_URL, self.author, 200),
@@ -104,6 +106,7 @@ class PostURLTests(TestCase):
             (POST_CREATE_URL, self.author, 'posts/create_post.html'),
             ('/unexisting_page/', self.author, 'core/404.html'),
             (FOLLOW_URL, self.another, 'posts/follow.html'),
+            (SEARCH_URL, self.guest, 'posts/search.html'),
         ]
         for url, client, template in TEMPLATE_TESTS:
             with self.subTest(url=url):
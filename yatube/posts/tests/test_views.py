@@ -7,6 +7,9 @@ from django.conf import settings
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
+from core.queries import QueryAssertionsMixin
+
+from .. import feed_cache
 from ..models import Group, Post, User, Comment, Follow
 
 
@@ -114,16 +117,22 @@ class ViewsTests(TestCase):
                 self.assertEqual(post.image, self.post.image)
 
     def test_cache(self):
-        """Данные в кэше хранятся до его обновления/очистки"""
-        response = self.guest_client.get(INDEX_URL)
+        """Ленты берутся из кэша без запросов до изменения постов."""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    self.assertEqual(
+                        response.content, self.guest_client.get(url).content
+                    )
+        hits = feed_cache.stats()['hits']
         Post.objects.all().delete()
-        self.assertEqual(
-            response.content, self.guest_client.get(INDEX_URL).content
-        )
-        cache.clear()
-        self.assertNotEqual(
-            response.content, self.guest_client.get(INDEX_URL).content
-        )
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertNotIn(
+                    self.post.text, self.guest_client.get(url).content.decode()
+                )
+        self.assertEqual(feed_cache.stats()['hits'], hits)
 
     def test_profile_in_context(self):
         """Шаблон profile сформирован с правильным контекстом."""
@@ -194,3 +203,59 @@ class ViewsTests(TestCase):
                     len(client.get(url).context['page_obj']),
                     count_posts
                 )
+
+
+class FeedQueriesTests(QueryAssertionsMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.follower = User.objects.create_user(username=USERNAME_2)
+        cls.follower_client = Client()
+        cls.follower_client.force_login(cls.follower)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        for i in range(settings.POSTS_ON_PAGE):
+            author = User.objects.create_user(username=f'author_{i}')
+            Follow.objects.create(user=cls.follower, author=author)
+            Post.objects.create(
+                text='Тестовый текст',
+                group=cls.group,
+                author=author if i else cls.user
+            )
+
+    def test_feed_queries_count(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        CASES = [
+            (INDEX_URL, self.guest_client, 3),
+            (GROUP_LIST_URL, self.guest_client, 4),
+            (PROFILE_URL, self.guest_client, 5),
+            (FOLLOW_URL, self.follower_client, 6),
+        ]
+        for url, client, queries in CASES:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    client.get(url)
+
+    def test_views_have_no_n_plus_one(self):
+        """Ленты и комментарии не делают запрос на каждый пост или автора."""
+        post = Post.objects.filter(author=self.user).first()
+        for author in User.objects.exclude(pk=self.user.pk):
+            Comment.objects.create(post=post, author=author, text='Текст')
+        CASES = [
+            (INDEX_URL, self.guest_client),
+            (GROUP_LIST_URL, self.guest_client),
+            (PROFILE_URL, self.guest_client),
+            (FOLLOW_URL, self.follower_client),
+            (reverse('posts:post_detail', args=[post.pk]), self.guest_client),
+        ]
+        for url, client in CASES:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNoNPlusOne():
+                    client.get(url)
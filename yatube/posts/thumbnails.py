@@ -0,0 +1,132 @@
+"""Заранее подготовленные миниатюры картинок постов.
+
+Миниатюры строятся в фоновом пуле потоков после сохранения поста,
+а не sorl-тегом во время рендера страницы. Путь к миниатюре карточки
+сохраняется в Post.thumbnail; пока его нет, шаблоны показывают
+заглушку.
+
+Для srcset там же строятся варианты картинки: ширины
+POST_RENDITION_WIDTHS с пропорциями карточки в форматах
+POST_RENDITION_FORMATS. Их список хранится в Post.renditions, а файлы —
+в кэше sorl, поэтому каждый вариант картинки, размера и формата
+строится один раз, в том числе для одинаковых картинок разных постов.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+ORIGINAL_FORMATS = {'.png': 'PNG', '.gif': 'GIF', '.webp': 'WEBP'}
+
+
+def rendition_formats(name):
+    """Форматы вариантов картинки name, которые умеют Pillow и sorl.
+
+    None в POST_RENDITION_FORMATS — формат самой картинки.
+    """
+    Image.init()
+    formats = []
+    for image_format in settings.POST_RENDITION_FORMATS:
+        image_format = image_format or ORIGINAL_FORMATS.get(
+            os.path.splitext(name)[1].lower(), 'JPEG'
+        )
+        if (
+            image_format in Image.SAVE and image_format in EXTENSIONS
+            and image_format not in formats
+        ):
+            formats.append(image_format)
+    return formats
+
+
+def build_renditions(image):
+    """Строит варианты картинки: [[mime, ширина, путь], ...]."""
+    card_width, card_height = map(
+        int, settings.POST_THUMBNAIL_SIZES[0].split('x')
+    )
+    # Шире оригинала не строим: это были бы увеличенные копии тех же
+    # пикселей. Картинке уже всех ширин — один вариант в её ширину.
+    widths = [
+        width for width in settings.POST_RENDITION_WIDTHS
+        if width <= image.width
+    ] or [image.width]
+    return [
+        [Image.MIME[image_format], width, get_thumbnail(
+            image, f'{width}x{round(width * card_height / card_width)}',
+            format=image_format, **settings.POST_THUMBNAIL_OPTIONS
+        ).name]
+        for image_format in rendition_formats(image.name)
+        for width in widths
+    ]
+
+
+def renditions(post):
+    """Варианты картинки поста по форматам: {mime: [(ширина, путь)]}.
+
+    Испорченный список — как пустой: покажется миниатюра карточки.
+    """
+    try:
+        variants = json.loads(post.renditions or '[]')
+        groups = {}
+        for mime, width, name in variants:
+            groups.setdefault(mime, []).append((width, name))
+    except (TypeError, ValueError):
+        return {}
+    return groups
+
+
+def render(post_id):
+    """Строит миниатюры POST_THUMBNAIL_SIZES и варианты картинки.
+
+    Первая миниатюра — для карточки.
+    """
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    image = post.image.name
+    thumbnails = [
+        get_thumbnail(post.image, size, **settings.POST_THUMBNAIL_OPTIONS)
+        for size in settings.POST_THUMBNAIL_SIZES
+    ]
+    renditions = json.dumps(build_renditions(post.image))
+    # Картинку могли заменить, пока строились миниатюры.
+    post = Post.objects.filter(pk=post_id, image=image).first()
+    if post is not None:
+        post.thumbnail = thumbnails[0].name
+        post.renditions = renditions
+        post.save(update_fields=['thumbnail', 'renditions'])
+
+
+def _run_in_background(post_id):
+    try:
+        render(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+    finally:
+        connections.close_all()
+
+
+def schedule(post):
+    """Ставит построение миниатюр в очередь после коммита транзакции."""
+    global _executor
+    if not settings.POST_THUMBNAIL_ASYNC:
+        render(post.pk)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_THUMBNAIL_WORKERS
+        )
+    transaction.on_commit(
+        lambda: _executor.submit(_run_in_background, post.pk)
+    )
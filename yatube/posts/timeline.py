@@ -0,0 +1,238 @@
+"""Материализованные ленты подписок (fan-out-on-write).
+
+Новый пост раскладывается пачками в ленты подписчиков автора. Посты
+авторов, у которых подписчиков больше TIMELINE_FANOUT_THRESHOLD, при
+публикации не раскладываются: читатель подтягивает их в свою ленту,
+когда открывает её. Уже опубликованные посты автора копируются в ленту
+при подписке, какой бы популярный он ни был: последние
+TIMELINE_BACKFILL_LIMIT сразу, остальные — в фоновом пуле. Лента
+читается одним проходом по индексу (user, -pub_date, -post).
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from datetime import timedelta
+
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+PULLED_KEY = 'timeline-pulled:{}'
+# Поля ленты для CursorPaginator: значения совпадают с pub_date и id
+# поста, но берутся из индекса записей ленты.
+TIMELINE_KEYS = ('timeline_pub_date', 'timeline_post')
+
+_executor = None
+
+
+def _followers(author_id):
+    return UserStats.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+
+
+def is_celebrity(author_id):
+    return _followers(author_id) > settings.TIMELINE_FANOUT_THRESHOLD
+
+
+def _insert(entries):
+    # Размер пачки INSERT выбирает бэкенд: на SQLite он не больше 500
+    # строк, а пачки _batches по TIMELINE_BATCH_SIZE могут быть крупнее.
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def _batches(queryset, *fields):
+    """Отдаёт строки (pk, *fields) пачками по возрастанию pk."""
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', *fields
+            )[:settings.TIMELINE_BATCH_SIZE]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def _copy_posts(user_id, posts):
+    for rows in _batches(posts, 'pub_date'):
+        _insert(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in rows
+        )
+
+
+def fan_out(post_id, author_id, pub_date):
+    """Кладёт пост в ленты всех подписчиков автора."""
+    if is_celebrity(author_id):
+        return
+    for rows in _batches(
+        Follow.objects.filter(author_id=author_id), 'user_id'
+    ):
+        _insert(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for _, user_id in rows
+        )
+
+
+def _run_in_background(func, *args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+def _submit(func, *args):
+    """Ставит func(*args) в фоновый пул после коммита транзакции."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TIMELINE_FANOUT_WORKERS
+        )
+    transaction.on_commit(
+        lambda: _executor.submit(_run_in_background, func, *args)
+    )
+
+
+def schedule_fan_out(post):
+    """Раскладывает пост в фоне после коммита транзакции.
+
+    Пост автора, у которого не больше TIMELINE_FANOUT_INLINE
+    подписчиков, раскладывается сразу: это дешевле потока с отдельным
+    соединением.
+    """
+    followers = _followers(post.author_id)
+    if followers > settings.TIMELINE_FANOUT_THRESHOLD:
+        return
+    args = (post.pk, post.author_id, post.pub_date)
+    if (
+        not settings.TIMELINE_FANOUT_ASYNC
+        or followers <= settings.TIMELINE_FANOUT_INLINE
+    ):
+        fan_out(*args)
+        return
+    _submit(fan_out, *args)
+
+
+def _newest(author_ids, limit):
+    """Последние limit постов каждого автора одним запросом."""
+    return Post.objects.raw(
+        'SELECT id, pub_date FROM (SELECT id, pub_date, ROW_NUMBER() OVER ('
+        'PARTITION BY author_id ORDER BY pub_date DESC, id DESC) AS position '
+        f'FROM {Post._meta.db_table} WHERE author_id IN '
+        f'({", ".join(["%s"] * len(author_ids))})) AS newest '
+        'WHERE position <= %s', [*author_ids, limit]
+    )
+
+
+def _backfill_history(user_id, author_ids):
+    # Пока пул дошёл до задачи, читатель мог отписаться.
+    following = Follow.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).values('author_id')
+    _copy_posts(user_id, Post.objects.filter(author_id__in=following))
+
+
+def backfill(user_id, *author_ids):
+    """Добавляет в ленту читателя посты авторов, на которых он подписался.
+
+    Популярные авторы не исключение: pull_celebrities берёт только посты
+    новее отметки читателя, общей для всех авторов. Сразу копируются
+    последние TIMELINE_BACKFILL_LIMIT постов каждого автора, более
+    старые — в фоне после коммита.
+    """
+    if not author_ids:
+        return
+    if not settings.TIMELINE_FANOUT_ASYNC:
+        _copy_posts(user_id, Post.objects.filter(author_id__in=author_ids))
+        return
+    limit = settings.TIMELINE_BACKFILL_LIMIT
+    _insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for post in _newest(author_ids, limit)
+    )
+    counts = dict(UserStats.objects.filter(pk__in=author_ids).values_list(
+        'pk', 'posts_count'
+    ))
+    # Без строки счётчиков число постов неизвестно — тоже в фон.
+    older = [pk for pk in author_ids if counts.get(pk, limit + 1) > limit]
+    if older:
+        _submit(_backfill_history, user_id, older)
+
+
+def backfill_followers(author_ids):
+    """Копирует все посты авторов в ленты их подписчиков одним запросом.
+
+    Для пакетной загрузки: подписки и посты уже в базе, сигналов не
+    было, и вставка по одной подписке стоила бы запросов на каждую.
+    """
+    if not author_ids:
+        return
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{TimelineEntry._meta.db_table} (user_id, post_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.pub_date '
+            f'FROM {Follow._meta.db_table} AS follow '
+            f'JOIN {Post._meta.db_table} AS post '
+            'ON post.author_id = follow.author_id '
+            'WHERE follow.author_id IN '
+            f'({", ".join(["%s"] * len(author_ids))}) '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            author_ids
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты читателя посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def pull_celebrities(user):
+    """Подтягивает в ленту новые посты популярных авторов (fan-out-on-read).
+
+    Время прошлой подтяжки хранится в кэше; если его нет, посты
+    копируются целиком. Читаются посты начиная с отметки минус
+    TIMELINE_PULL_OVERLAP секунд: пост с более ранним pub_date мог
+    закоммититься уже после прошлого чтения. Записываются только посты,
+    которых ещё нет в ленте. Посты, вышедшие до подписки, кладёт в
+    ленту backfill.
+    """
+    started = timezone.now()
+    authors = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=(
+            settings.TIMELINE_FANOUT_THRESHOLD
+        )
+    ).values_list('author', flat=True))
+    if not authors:
+        return
+    key = PULLED_KEY.format(user.pk)
+    pulled = cache.get(key)
+    posts = Post.objects.filter(author__in=authors).exclude(
+        pk__in=TimelineEntry.objects.filter(user=user).values('post_id')
+    )
+    if pulled is not None:
+        posts = posts.filter(pub_date__gte=pulled - timedelta(
+            seconds=settings.TIMELINE_PULL_OVERLAP
+        ))
+    _copy_posts(user.pk, posts)
+    cache.set(key, started, None)
+
+
+def timeline_posts(user, pull=True):
+    """Посты ленты подписок в порядке индекса TIMELINE_KEYS."""
+    if pull:
+        pull_celebrities(user)
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        timeline_pub_date=F('timeline_entries__pub_date'),
+        timeline_post=F('timeline_entries__post')
+    ).order_by('-timeline_pub_date', '-timeline_post')
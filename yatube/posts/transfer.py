@@ -0,0 +1,326 @@
+"""Потоковый перенос групп, постов, комментариев и подписок.
+
+Формат JSONL — одна запись на строку с полем model. Формат CSV —
+каталог с файлами group.csv, post.csv, comment.csv и follow.csv.
+Пользователи и группы указываются натуральными ключами (username,
+slug), посты — исходным id, на который ссылаются комментарии.
+Записи идут в порядке зависимостей: группы, посты, комментарии,
+подписки.
+"""
+import csv
+import json
+import os
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache, recommendations, search, timeline
+from .models import (
+    Comment, Follow, Group, Post, PostActivity, User, UserStats
+)
+
+MODELS = ('group', 'post', 'comment', 'follow')
+FIELDS = {
+    'group': ('slug', 'title', 'description'),
+    'post': ('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    'comment': ('post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+EXPORT_QUERYSETS = {
+    'group': lambda: Group.objects.values_list(*FIELDS['group']),
+    'post': lambda: Post.objects.order_by('pk').values_list(
+        'id', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    ),
+    'comment': lambda: Comment.objects.order_by('pk').values_list(
+        'post_id', 'author__username', 'text', 'created'
+    ),
+    'follow': lambda: Follow.objects.values_list(
+        'user__username', 'author__username'
+    ),
+}
+
+
+def export_rows(chunk_size=2000):
+    """Отдаёт (model, dict) по всем таблицам, не загружая их в память."""
+    for model in MODELS:
+        for row in EXPORT_QUERYSETS[model]().iterator(chunk_size=chunk_size):
+            yield model, dict(zip(FIELDS[model], row))
+
+
+def _serialize(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def write_jsonl(rows, stream):
+    count = 0
+    for model, row in rows:
+        row = {key: _serialize(value) for key, value in row.items()}
+        stream.write(
+            json.dumps({'model': model, **row}, ensure_ascii=False) + '\n'
+        )
+        count += 1
+    return count
+
+
+def write_csv(rows, directory):
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    writers = {}
+    count = 0
+    try:
+        for model, row in rows:
+            if model not in writers:
+                files[model] = open(
+                    os.path.join(directory, f'{model}.csv'), 'w',
+                    newline='', encoding='utf-8'
+                )
+                writers[model] = csv.DictWriter(files[model], FIELDS[model])
+                writers[model].writeheader()
+            writers[model].writerow(
+                {key: _serialize(value) for key, value in row.items()}
+            )
+            count += 1
+    finally:
+        for file in files.values():
+            file.close()
+    return count
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            row = json.loads(line)
+            yield row.pop('model'), row
+
+
+def read_csv(directory):
+    for model in MODELS:
+        path = os.path.join(directory, f'{model}.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                yield model, {
+                    key: value if value != '' else None
+                    for key, value in row.items()
+                }
+
+
+@contextmanager
+def deferred_indexes(models):
+    """Снимает Meta.indexes на время загрузки и строит их заново в конце."""
+    indexes = [
+        (model, index) for model in models for index in model._meta.indexes
+    ]
+    # SQL берётся у индексов напрямую: на SQLite schema_editor нельзя
+    # открыть внутри транзакции.
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for model, index in indexes:
+            cursor.execute(str(index.remove_sql(model, editor)))
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(str(index.create_sql(model, editor)))
+
+
+@contextmanager
+def original_dates():
+    """Отключает auto_now_add, чтобы сохранить даты из выгрузки."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _link(name, value):
+    """Ссылка по id записанной строки или на объект, ждущий записи."""
+    if isinstance(value, Model):
+        return {name: value}
+    return {f'{name}_id': value}
+
+
+def _resolve_links(obj):
+    """Проставляет id объектов, которые были записаны позже ссылки."""
+    for field in obj._meta.concrete_fields:
+        if field.is_relation and field.is_cached(obj):
+            parent = field.get_cached_value(obj)
+            if parent is not None:
+                setattr(obj, field.attname, parent.pk)
+
+
+def _fetch_pks(model, objs):
+    """Проставляет id, которые база дала строкам bulk_create.
+
+    SQLite не возвращает их из пакетной вставки. Пока транзакция
+    держит запись, другие соединения в таблицу не пишут, поэтому
+    вставленные строки — последние len(objs) по id, в том же порядке.
+    """
+    if objs[0].pk is not None:
+        return
+    pks = list(model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    )[:len(objs)])
+    for obj, pk in zip(objs, reversed(pks)):
+        obj.pk = pk
+
+
+class Importer:
+    """Пакетная загрузка с картами натуральных ключей в id.
+
+    id новым пользователям, группам и постам даёт база при записи
+    пачки, поэтому загрузка не сталкивается со строками, которые сайт
+    пишет в это время. До записи ссылки на новые строки держатся на
+    самих объектах, а перед записью пачки сбрасываются пачки моделей,
+    от которых она зависит; после записи в картах остаются только id.
+    """
+
+    ORDER = (User, Group, Post, Comment, Follow)
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.posts = {}
+        self.keys = {User: self.users, Group: self.groups, Post: self.posts}
+        self.pending = {model: [] for model in self.ORDER}
+        self.created = {model: 0 for model in self.ORDER}
+        self.skipped = 0
+        self.touched = set()
+        self.authors = set()
+        self.namespaces = {'index'}
+        # Свежие комментарии для «Популярного»: (пост, время) -> число.
+        self.activity = Counter()
+        self.recent = timezone.now() - timedelta(
+            seconds=settings.TRENDING_WINDOW
+        )
+
+    def _user(self, username):
+        if username not in self.users:
+            self.users[username] = User(
+                username=username, password=make_password(None)
+            )
+            self._add(self.users[username], username)
+        self.touched.add(username)
+        self.namespaces.add(f'profile:{username}')
+        return self.users[username]
+
+    def _group(self, row):
+        if row['slug'] not in self.groups:
+            self.groups[row['slug']] = Group(**row)
+            self._add(self.groups[row['slug']], row['slug'])
+
+    def _add(self, obj, key=None):
+        batch = self.pending[type(obj)]
+        batch.append((key, obj))
+        if len(batch) >= self.batch_size:
+            self.flush(type(obj))
+
+    def flush(self, model=None):
+        """Записывает пачку model и всех моделей, от которых она зависит."""
+        last = self.ORDER.index(model) if model else len(self.ORDER) - 1
+        for current in self.ORDER[:last + 1]:
+            batch = self.pending[current]
+            if not batch:
+                continue
+            objs = [obj for _, obj in batch]
+            for obj in objs:
+                _resolve_links(obj)
+            with transaction.atomic():
+                current.objects.bulk_create(
+                    objs, ignore_conflicts=current is Follow
+                )
+                if current in self.keys:
+                    _fetch_pks(current, objs)
+            for key, obj in batch:
+                if key is not None:
+                    self.keys[current][key] = obj.pk
+            self.created[current] += len(batch)
+            self.pending[current] = []
+
+    def add(self, model, row):
+        if model == 'group':
+            self._group(row)
+        elif model == 'post':
+            author = self._user(row['author'])
+            self.authors.add(row['author'])
+            if row.get('group'):
+                self.namespaces.add(f'group:{row["group"]}')
+            post = Post(
+                text=row['text'],
+                pub_date=parse_datetime(row['pub_date']),
+                image=row.get('image') or '',
+                **_link('author', author),
+                **_link('group', self.groups.get(row.get('group')))
+            )
+            self.posts[int(row['id'])] = post
+            self._add(post, int(row['id']))
+        elif model == 'comment':
+            post = self.posts.get(int(row['post']))
+            if post is None:
+                self.skipped += 1
+                return
+            created = parse_datetime(row['created'])
+            if created >= self.recent:
+                self.activity[int(row['post']), created.replace(
+                    minute=0, second=0, microsecond=0
+                )] += 1
+            self._add(Comment(
+                text=row['text'],
+                created=created,
+                **_link('post', post),
+                **_link('author', self._user(row['author']))
+            ))
+        elif model == 'follow':
+            if row['user'] == row['author']:
+                self.skipped += 1
+                return
+            author = self._user(row['author'])
+            self.authors.add(row['author'])
+            self._add(Follow(
+                **_link('user', self._user(row['user'])),
+                **_link('author', author)
+            ))
+        else:
+            self.skipped += 1
+
+    def finish(self):
+        """Дописывает хвосты пачек и пересчитывает производные данные.
+
+        bulk_create не шлёт сигналы, поэтому счётчики, ленты подписок,
+        рекомендации, активность для «Популярного», поисковый индекс и
+        версии кэша лент обновляются здесь одним проходом.
+        """
+        self.flush()
+        touched = sorted(self.users[name] for name in self.touched)
+        for start in range(0, len(touched), self.batch_size):
+            UserStats.rebuild(touched[start:start + self.batch_size])
+        authors = sorted(self.users[name] for name in self.authors)
+        for start in range(0, len(authors), self.batch_size):
+            timeline.backfill_followers(
+                authors[start:start + self.batch_size]
+            )
+        for (source, hour), comments in self.activity.items():
+            PostActivity.increment(self.posts[source], hour, comments)
+        if self.created[Follow]:
+            recommendations.rebuild(self.batch_size)
+        search.get_backend().update(self.posts.values())
+        feed_cache.bump(*self.namespaces)
@@ -0,0 +1,139 @@
+"""Лента «Популярное»: посты и группы по затухающей активности.
+
+Входные данные копятся по мере событий: комментарии — по часам в
+PostActivity (F() на каждый комментарий), подписчики автора — в
+UserStats. rebuild() считает оценки постов за окно TRENDING_WINDOW:
+
+    оценка = Σ комментарии часа · 2^(−возраст часа / T)
+             + (1 + TRENDING_FOLLOWERS_WEIGHT · ln(1 + подписчики))
+               · 2^(−возраст поста / T),
+
+где T — TRENDING_HALF_LIFE, и кладёт в кэш одним ключом первые
+TRENDING_SIZE постов (готовые объекты для карточек) и TRENDING_GROUPS
+групп с суммой оценок их постов. Пересчёт запускается командой
+rebuild_trending раз в TRENDING_TIMEOUT; ключ живёт вдвое дольше,
+чтобы не истечь между запусками. Страница читает только этот ключ и
+пересчитывает его сама лишь при холодном кэше, причём один запрос
+за раз. Правка поста из списка подменяет его карточку в ключе, а не
+сбрасывает ключ.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import FEED_FIELDS, Group, Post, PostActivity
+
+CACHE_KEY = 'trending'
+LOCK_KEY = 'trending-lock'
+# Поля поста, которые видны в карточке: правка других не трогает ключ.
+CARD_FIELDS = {name.split('__')[0] for name in FEED_FIELDS}
+# Сколько id подставлять в один IN: лимит переменных SQLite.
+CHUNK_SIZE = 500
+POST_VALUES = ('pk', 'pub_date', 'group', 'author__stats__followers_count')
+
+
+def decay(age):
+    return 0.5 ** (age.total_seconds() / settings.TRENDING_HALF_LIFE)
+
+
+def scores(now):
+    """Оценки постов и групп окна: ({post_id: оценка}, {group_id: ...})."""
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    comments = defaultdict(float)
+    for post_id, hour, count in PostActivity.objects.filter(
+        hour__gte=since
+    ).values_list('post', 'hour', 'comments').iterator():
+        comments[post_id] += count * decay(now - hour)
+    rows = list(Post.objects.filter(pub_date__gte=since).values_list(
+        *POST_VALUES
+    ))
+    # Старые посты, которые обсуждают сейчас.
+    older = list(comments.keys() - {row[0] for row in rows})
+    for start in range(0, len(older), CHUNK_SIZE):
+        rows += Post.objects.filter(
+            pk__in=older[start:start + CHUNK_SIZE]
+        ).values_list(*POST_VALUES)
+    posts = {}
+    groups = defaultdict(float)
+    for post_id, pub_date, group_id, followers in rows:
+        posts[post_id] = comments[post_id] + (
+            1 + settings.TRENDING_FOLLOWERS_WEIGHT * math.log1p(
+                followers or 0
+            )
+        ) * decay(now - pub_date)
+        if group_id:
+            groups[group_id] += posts[post_id]
+    return posts, groups
+
+
+def _best(objects, scores, limit):
+    best = heapq.nlargest(limit, scores, key=scores.__getitem__)
+    objects = objects.in_bulk(best)
+    return [objects[pk] for pk in best if pk in objects]
+
+
+def _lifetime():
+    return 2 * settings.TRENDING_TIMEOUT
+
+
+def rebuild(now=None):
+    """Пересчитывает «Популярное», кладёт в кэш и возвращает."""
+    now = now or timezone.now()
+    posts, groups = scores(now)
+    trending = {
+        'posts': _best(Post.objects.for_feed(), posts, settings.TRENDING_SIZE),
+        'groups': _best(Group.objects.all(), groups, settings.TRENDING_GROUPS),
+        'built': now,
+    }
+    cache.set(CACHE_KEY, trending, _lifetime())
+    PostActivity.objects.filter(
+        hour__lt=now - timedelta(seconds=settings.TRENDING_WINDOW)
+    ).delete()
+    return trending
+
+
+def get():
+    """Текущее «Популярное» одним чтением кэша.
+
+    При холодном кэше пересчитывает один запрос, остальные до конца
+    пересчёта получают пустой список.
+    """
+    trending = cache.get(CACHE_KEY)
+    if trending is not None:
+        return trending
+    if not cache.add(LOCK_KEY, True, settings.TRENDING_TIMEOUT):
+        return {'posts': [], 'groups': [], 'built': None}
+    try:
+        return rebuild()
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def patch(post_id, deleted=False):
+    """Подменяет или убирает карточку поста в «Популярном», если он там."""
+    trending = cache.get(CACHE_KEY)
+    if not trending:
+        return
+    posts = trending['posts']
+    index = next(
+        (index for index, post in enumerate(posts) if post.pk == post_id),
+        None
+    )
+    if index is None:
+        return
+    post = None if deleted else Post.objects.for_feed().filter(
+        pk=post_id
+    ).first()
+    trending['posts'] = (
+        posts[:index] + ([post] if post else []) + posts[index + 1:]
+    )
+    remaining = _lifetime() - (
+        timezone.now() - trending['built']
+    ).total_seconds()
+    if remaining > 0:
+        cache.set(CACHE_KEY, trending, remaining)
@@ -0,0 +1,153 @@
+"""Обработка картинок постов при загрузке.
+
+Загрузка пишется во временный файл (FILE_UPLOAD_HANDLERS), а не в
+память. Картинка поворачивается по EXIF, уменьшается до
+IMAGE_UPLOAD_MAX_SIZE по длинной стороне и перекодируется без
+метаданных: в JPEG, а с прозрачностью — в PNG. Анимация GIF не
+сохраняется, остаётся первый кадр. Файл хранится под хэшем
+содержимого, поэтому одна и та же картинка в разных постах — один
+файл, и миниатюры sorl для неё тоже строятся один раз.
+"""
+import hashlib
+import io
+import os
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import IMAGE_UPLOAD_PATH, Post
+
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png'}
+HASHED_NAME = re.compile(
+    rf'^{re.escape(IMAGE_UPLOAD_PATH)}[0-9a-f]{{2}}/[0-9a-f]{{64}}\.\w+$'
+)
+
+
+class ProcessedImage(ContentFile):
+    """Перекодированная картинка; name — путь в хранилище по хэшу."""
+
+    def __init__(self, content, image_format):
+        digest = hashlib.sha256(content).hexdigest()
+        super().__init__(content, name=(
+            f'{IMAGE_UPLOAD_PATH}{digest[:2]}/{digest}.'
+            f'{FORMATS[image_format]}'
+        ))
+        self.format = image_format
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def process(upload):
+    """Перекодирует загруженный файл в ProcessedImage.
+
+    ValidationError — если файл больше IMAGE_UPLOAD_MAX_BYTES или не
+    читается как картинка.
+    """
+    if upload.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.IMAGE_UPLOAD_MAX_BYTES // 2 ** 20}
+        )
+    limit = settings.IMAGE_UPLOAD_MAX_SIZE
+    upload.seek(0)
+    try:
+        with Image.open(upload) as image:
+            # JPEG сразу декодируется в уменьшенном масштабе (1/2..1/8).
+            image.draft('RGB', (limit, limit))
+            icc_profile = image.info.get('icc_profile')
+            alpha = _has_alpha(image)
+            image = image.convert('RGBA' if alpha else 'RGB')
+            image.thumbnail((limit, limit), Image.LANCZOS)
+            # Поворот после уменьшения: так он дешевле, а рамка квадратная.
+            image = ImageOps.exif_transpose(image)
+            output = io.BytesIO()
+            if alpha:
+                image_format = 'PNG'
+                image.save(output, image_format, optimize=True,
+                           icc_profile=icc_profile)
+            else:
+                image_format = 'JPEG'
+                image.save(
+                    output, image_format,
+                    quality=settings.IMAGE_UPLOAD_JPEG_QUALITY,
+                    optimize=True, progressive=True,
+                    icc_profile=icc_profile
+                )
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось обработать картинку.', code='invalid_image'
+        )
+    return ProcessedImage(output.getvalue(), image_format)
+
+
+def _storage():
+    return Post._meta.get_field('image').storage
+
+
+def store(image, storage=None):
+    """Сохраняет ProcessedImage, если его ещё нет; возвращает путь."""
+    storage = storage or _storage()
+    if storage.exists(image.name):
+        return image.name
+    # При гонке двух одинаковых загрузок вторая получит другое имя.
+    return storage.save(image.name, image)
+
+
+def walk(storage, path=''):
+    """Пути всех файлов хранилища под path."""
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name).replace(os.sep, '/')
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+def usage(storage=None):
+    """Сводка по занятому месту для отчёта storage_report.
+
+    directories — {каталог верхнего уровня: (файлов, байт)}; остальные
+    ключи — о картинках постов: сколько постов с картинками и разных
+    файлов, сколько байт заняли бы копии без дедупликации, файлы без
+    постов (orphans) и файлы, загруженные до хэширования (legacy).
+    """
+    storage = storage or _storage()
+    directories = {}
+    sizes = {}
+    if storage.exists(''):
+        for name in walk(storage):
+            size = storage.size(name)
+            top = name.split('/', 1)[0] if '/' in name else ''
+            files, total = directories.get(top, (0, 0))
+            directories[top] = (files + 1, total + size)
+            if name.startswith(IMAGE_UPLOAD_PATH):
+                sizes[name] = size
+    references = Counter(
+        Post.objects.exclude(image='').values_list('image', flat=True)
+    )
+    return {
+        'directories': directories,
+        'posts': sum(references.values()),
+        'files': len(references.keys() & sizes.keys()),
+        'bytes': sum(sizes[name] for name in references if name in sizes),
+        'bytes_without_dedup': sum(
+            sizes[name] * count
+            for name, count in references.items() if name in sizes
+        ),
+        'missing': len(references.keys() - sizes.keys()),
+        'orphans': len(sizes.keys() - references.keys()),
+        'orphan_bytes': sum(
+            size for name, size in sizes.items() if name not in references
+        ),
+        'legacy': sum(
+            1 for name in references if not HASHED_NAME.match(name)
+        ),
+    }
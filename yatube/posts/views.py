@@ -1,52 +1,195 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.conf import settings
-from django.db import IntegrityError
+from django.utils.http import urlencode
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils.functional import SimpleLazyObject
 
+from . import (
+    recommendations, search as search_index, thumbnails, trending as hot
+)
+from .conditional import (
+    conditional, group_state, index_state, post_state, profile_state
+)
+from .feed_cache import FeedCache
+from .follows import follow_many, following_lookup
 from .forms import CommentForm, PostForm
-from .models import Follow, Post, Group, User
+from .models import Comment, Follow, Post, Group, User, UserStats
+from .paginators import (
+    CREATED_KEYS, DEFAULT_KEYS, CursorPaginator, WindowedPaginator
+)
+from .timeline import TIMELINE_KEYS, timeline_posts
 
 
-def get_page_obj(request, post_list):
-    return Paginator(
+def get_page_obj(request, post_list, keys=DEFAULT_KEYS):
+    cursor = request.GET.get('cursor')
+    if cursor is not None or (
+        settings.POSTS_CURSOR_PAGINATION and 'page' not in request.GET
+    ):
+        return CursorPaginator(
+            post_list,
+            settings.POSTS_ON_PAGE,
+            count_limit=settings.POSTS_COUNT_LIMIT,
+            keys=keys
+        ).get_cursor_page(cursor)
+    return WindowedPaginator(
         post_list,
         settings.POSTS_ON_PAGE).get_page(request.GET.get('page'))
 
 
+@conditional(index_state)
 def index(request):
-    return render(request, 'posts/index.html', {
-        'page_obj': get_page_obj(request, Post.objects.all())
+    feed = FeedCache(request, 'index')
+    return feed.render('posts/index.html', {
+        'page_obj': feed.lazy(
+            get_page_obj, request, Post.objects.for_feed()
+        )
     })
 
 
+@conditional(group_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    return render(request, 'posts/group_list.html', {
+    feed = FeedCache(request, f'group:{slug}')
+    group = feed.lazy(get_object_or_404, Group, slug=slug)
+    return feed.render('posts/group_list.html', {
         'group': group,
-        'page_obj': get_page_obj(request, group.posts.all())
+        'page_obj': feed.lazy(
+            lambda: get_page_obj(request, group.posts.for_feed())
+        )
+    })
+
+
+def trending(request):
+    """«Популярное»: посты и группы из одного ключа кэша."""
+    current = hot.get()
+    return render(request, 'posts/trending.html', {
+        'page_obj': WindowedPaginator(
+            current['posts'], settings.POSTS_ON_PAGE
+        ).get_page(request.GET.get('page')),
+        'groups': current['groups'],
+    })
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = WindowedPaginator(
+            search_index.get_backend().search(query), settings.POSTS_ON_PAGE
+        ).get_page(request.GET.get('page'))
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
     })
 
 
+def get_author(username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    UserStats.for_user(author)
+    return author
+
+
+@conditional(profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    context = {
-        'page_obj': get_page_obj(request, author.posts.all()),
+    feed = FeedCache(request, f'profile:{username}')
+    author = feed.lazy(get_author, username)
+    return feed.render('posts/profile.html', {
+        'page_obj': feed.lazy(
+            lambda: get_page_obj(request, author.posts.for_feed())
+        ),
         'author': author,
-        'following': Follow.objects.filter(
-            author=author, user=request.user.is_authenticated
-        ).exclude(user__username=request.user.username).exists()
-    }
-    return render(request, 'posts/profile.html', context)
+        'similar_authors': feed.lazy(
+            lambda: with_stats(recommendations.similar_authors(author))
+        ),
+        'following': SimpleLazyObject(
+            lambda: following_lookup(request)(author.pk)
+        )
+    })
+
 
+def with_stats(users):
+    """Досоздаёт счётчики пользователям, у которых их ещё нет."""
+    missing = [user.pk for user in users if not hasattr(user, 'stats')]
+    if missing:
+        UserStats.rebuild(missing)
+        stats = UserStats.objects.in_bulk(missing)
+        for user in users:
+            if user.pk in stats:
+                user.stats = stats[user.pk]
+    return users
 
+
+def follow_list(request, username, owner, other, title):
+    """Подписчики или подписки username по курсору (created, id)."""
+    author = get_author(username)
+    page_obj = CursorPaginator(
+        Follow.objects.filter(**{owner: author}).select_related(
+            f'{other}__stats'
+        ),
+        settings.POSTS_ON_PAGE,
+        keys=CREATED_KEYS,
+        date_field='created'
+    ).get_cursor_page(request.GET.get('cursor'))
+    people = with_stats([getattr(follow, other) for follow in page_obj])
+    lookup = following_lookup(request)
+    lookup.prefetch(person.pk for person in people)
+    return render(request, 'posts/follow_list.html', {
+        'author': author,
+        'title': title,
+        'page_obj': page_obj,
+        'people': people,
+        'following_ids': {person.pk for person in people if lookup(person.pk)},
+    })
+
+
+def followers(request, username):
+    return follow_list(request, username, 'author', 'user', 'Подписчики')
+
+
+def following(request, username):
+    return follow_list(request, username, 'user', 'author', 'Подписки')
+
+
+def get_comments_page(post_id, cursor):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related(
+            'author'
+        ).only('post', 'text', 'created', 'author__username'),
+        settings.COMMENTS_ON_PAGE,
+        keys=CREATED_KEYS,
+        date_field='created'
+    ).get_cursor_page(cursor)
+
+
+@conditional(post_state)
 def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
+    UserStats.for_user(post.author)
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, id=post_id),
+        'post': post,
+        'comments_page': get_comments_page(
+            post_id, request.GET.get('comments')
+        ),
         'form': CommentForm(request.POST or None)
     })
 
 
+@conditional(post_state)
+def post_comments(request, post_id):
+    """Следующая страница комментариев (?cursor=) HTML-фрагментом."""
+    return render(request, 'posts/includes/comment_list.html', {
+        'post_id': post_id,
+        'comments_page': get_comments_page(
+            post_id, request.GET.get('cursor')
+        ),
+    })
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -57,6 +200,8 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        thumbnails.schedule(post)
     return redirect('posts:profile', request.user.username)
 
 
@@ -71,7 +216,12 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
+        if 'image' in form.changed_data:
+            post.thumbnail = ''
+            post.renditions = ''
         form.save()
+        if post.image and 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', {
         'form': form,
@@ -101,23 +251,19 @@ def follow_index(request):
     return render(request, 'posts/follow.html', {
         'page_obj': get_page_obj(
             request,
-            Post.objects.filter(author__following__user=request.user)
-        )
+            timeline_posts(request.user).for_feed(),
+            keys=TIMELINE_KEYS
+        ),
+        'suggested': with_stats(recommendations.suggestions(request.user))
     })
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    redirect_page = redirect('posts:profile', username)
-    if author == user:
-        return redirect_page
-    try:
-        Follow.objects.create(user=user, author=author)
-    except IntegrityError:
-        return redirect_page
-    return redirect_page
+    if username != request.user.username:
+        if follow_many(request.user, [username])['missing']:
+            raise Http404
+    return redirect('posts:profile', username)
 
 
 @login_required
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import json
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,22 +62,46 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_CONTEXT_PROCESSORS = [
+    'django.template.context_processors.debug',
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+    'core.context_processors.year.year',
+]
+# Вне DEBUG разобранные шаблоны держит cached.Loader: файлы читаются и
+# компилируются один раз на процесс. TEMPLATE_CACHE=1/0 — явно.
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', '0' if DEBUG else '1') == '1'
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATE_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year',
-            ],
+            'context_processors': TEMPLATE_CONTEXT_PROCESSORS,
+            'loaders': TEMPLATE_LOADERS,
         },
     },
 ]
+# Необязательный Jinja2 (TEMPLATE_ENGINE=jinja2, нужен пакет jinja2):
+# шаблоны из templates/jinja2 перекрывают одноимённые шаблоны Django,
+# остальные по-прежнему рендерит DjangoTemplates.
+if os.getenv('TEMPLATE_ENGINE') == 'jinja2' and find_spec('jinja2'):
+    TEMPLATES.insert(0, {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(TEMPLATE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+            'context_processors': TEMPLATE_CONTEXT_PROCESSORS,
+        },
+    })
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -127,9 +154,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+# Вне DEBUG collectstatic пишет файлы с хэшем в имени, манифест и
+# сжатые копии .gz/.br (core.storage), а {% static %} ссылается на
+# хэшированные имена. STATIC_ROOT отдаёт core.assets: сжатая копия по
+# Accept-Encoding, файлы с хэшем — с кэшем навсегда.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', '0' if DEBUG else '1') == '1'
+if STATIC_MANIFEST:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_IMMUTABLE_PATTERN = r'\.[0-9a-f]{12}\.\w+$'
+STATIC_MAX_AGE = 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -138,14 +174,130 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_ON_PAGE = 10
+# Keyset-пагинация лент по (pub_date, id) вместо OFFSET.
+# Включается всегда параметром ?cursor=, а для страниц без ?page= —
+# этим флагом.
+POSTS_CURSOR_PAGINATION = False
+# Верхняя граница подсчёта записей в курсорной пагинации
+# (None — точный COUNT(*)).
+POSTS_COUNT_LIMIT = None
+# Номера страниц в пагинаторе: по PAGE_RANGE_ON_ENDS с краёв и по
+# PAGE_RANGE_ON_EACH_SIDE вокруг текущей, остальные — многоточием.
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 1
+# Комментарии на странице поста: первые COMMENTS_ON_PAGE, остальные
+# подгружаются по курсору (created, id).
+COMMENTS_ON_PAGE = 20
+# Сколько авторов можно передать в api/follow/bulk/ за раз.
+FOLLOW_BULK_LIMIT = 1000
+
+# Ленты подписок: посты раскладываются подписчикам при публикации,
+# кроме авторов с числом подписчиков больше порога. Раскладка идёт
+# в фоновом пуле, а для авторов до TIMELINE_FANOUT_INLINE подписчиков —
+# сразу.
+TIMELINE_FANOUT_THRESHOLD = 10000
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_FANOUT_ASYNC = True
+TIMELINE_FANOUT_INLINE = 100
+# При подписке сразу копируются последние TIMELINE_BACKFILL_LIMIT постов
+# автора, остальные — в том же фоновом пуле.
+TIMELINE_BACKFILL_LIMIT = 50
+# Подтяжка постов популярных авторов перечитывает столько секунд до
+# прошлой отметки: столько может длиться транзакция публикации.
+TIMELINE_PULL_OVERLAP = 60
+TIMELINE_FANOUT_WORKERS = 2
+
+# Рекомендации авторов: считаются командой rebuild_recommendations
+# по графу подписок и обновляются для читателя при новой подписке.
+# Сходство авторов — по последним RECOMMENDATIONS_SAMPLE подписчикам.
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_SIMILAR = 20
+RECOMMENDATIONS_SAMPLE = 200
+RECOMMENDATIONS_ON_PAGE = 5
+
+# Лента «Популярное»: комментарии по часам и подписчики автора
+# с периодом полураспада TRENDING_HALF_LIFE за окно TRENDING_WINDOW
+# (секунды). Первые TRENDING_SIZE постов и TRENDING_GROUPS групп
+# пересчитываются командой rebuild_trending (её запускают раз
+# в TRENDING_TIMEOUT) или первым запросом при холодном кэше.
+TRENDING_HALF_LIFE = 60 * 60 * 12
+TRENDING_WINDOW = 60 * 60 * 24 * 3
+TRENDING_FOLLOWERS_WEIGHT = 0.5
+TRENDING_SIZE = 100
+TRENDING_GROUPS = 10
+TRENDING_TIMEOUT = 60 * 15
+
+# Картинки постов при загрузке (posts.uploads): приём во временный
+# файл, не больше IMAGE_UPLOAD_MAX_BYTES, уменьшение до
+# IMAGE_UPLOAD_MAX_SIZE по длинной стороне и перекодирование без EXIF.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_SIZE = 2048
+IMAGE_UPLOAD_JPEG_QUALITY = 85
+
+# Миниатюры картинок постов строятся в фоне после сохранения.
+# Первый размер используется в карточке поста.
+POST_THUMBNAIL_SIZES = ('960x339',)
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+POST_THUMBNAIL_ASYNC = True
+POST_THUMBNAIL_WORKERS = 2
+# Варианты картинки для srcset: ширины с пропорциями карточки в каждом
+# из форматов (None — формат самой картинки). Форматы, которые не
+# умеет кодировать установленный Pillow, пропускаются.
+POST_RENDITION_WIDTHS = (320, 480, 640, 960, 1440)
+POST_RENDITION_FORMATS = ('WEBP', None)
+# Атрибут sizes картинки в карточке ленты.
+POST_PICTURE_SIZES = '(min-width: 1200px) 1110px, 100vw'
+
+# Поиск по постам: FTS5 для SQLite; для других СУБД —
+# posts.search.SimpleBackend (LIKE).
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Замеры запросов (core.middleware.PerformanceMiddleware): доля
+# замеряемых запросов и размер окна гистограмм на каждый view.
+PERF_SAMPLE_RATE = float(
+    os.getenv('PERF_SAMPLE_RATE', '1.0' if DEBUG else '0.01')
+)
+PERF_WINDOW = 1000
+# Для тех же запросов в лог core.queries пишутся запросы к БД дольше
+# SLOW_QUERY_MS и SELECT одной формы, повторённые от
+# QUERY_REPEAT_THRESHOLD раз (N+1).
+SLOW_QUERY_MS = 100
+QUERY_REPEAT_THRESHOLD = 3
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
+# Медиафайлы отдаёт core.media.serve. Файлы с именами по содержимому
+# (картинки постов и миниатюры sorl) кэшируются навсегда, остальные —
+# на MEDIA_MAX_AGE секунд. MEDIA_SENDFILE_HEADER (X-Accel-Redirect или
+# X-Sendfile) передаёт отдачу файла фронтовому прокси; для nginx
+# MEDIA_SENDFILE_PREFIX — internal location с alias на MEDIA_ROOT.
+MEDIA_IMMUTABLE_PATTERN = r'^(cache/|posts/[0-9a-f]{2}/[0-9a-f]{64}\.)'
+MEDIA_MAX_AGE = 60 * 60
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER') or None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
+# Фрагменты лент инвалидируются по версиям при записи,
+# таймаут лишь ограничивает время жизни неиспользуемых записей.
+FEED_CACHE_TIMEOUT = 60 * 15
+# Сколько секунд прокси может отдавать анонимным пользователям ленты
+# и страницы постов без перепроверки (Cache-Control: public, max-age).
+FEED_MAX_AGE = 60
+
+# Кэш настраивается переменными окружения. Для нескольких воркеров
+# без внешних сервисов: CACHE_BACKEND=core.cache.SQLiteCache,
+# CACHE_LOCATION=/path/to/cache.sqlite3,
+# CACHE_OPTIONS='{"MAX_ENTRIES": 50000, "MAX_SIZE": 268435456}'.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'OPTIONS': json.loads(os.getenv('CACHE_OPTIONS', '{}')),
     }
 }
@@ -1,7 +1,12 @@
+import re
+from urllib.parse import urlsplit
+
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core import assets, media
+from core.views import perf_stats
 
 
 handler404 = 'core.views.page_not_found'
@@ -14,8 +19,13 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('perf/', perf_stats, name='perf_stats'),
 ]
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+for prefix, view, name in (
+    (settings.MEDIA_URL, media.serve, 'media'),
+    (settings.STATIC_URL, assets.serve, 'static'),
+):
+    if not urlsplit(prefix).netloc:
+        urlpatterns.append(re_path(
+            rf'^{re.escape(prefix.lstrip("/"))}(?P<path>.*)$', view, name=name
+        ))